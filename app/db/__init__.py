@@ -1 +1 @@
-from app.db.db import get_db
\ No newline at end of file
+from app.db.db import get_db, get_request_db, database
\ No newline at end of file
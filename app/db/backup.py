@@ -0,0 +1,455 @@
+import hashlib
+import json
+import os
+import shutil
+import sys
+import time
+import zlib
+from datetime import datetime
+from pathlib import Path
+from threading import Lock
+
+import duckdb
+
+from app.db.snapshot import BACKUP_DIR, SNAPSHOT_PATH
+
+# Average chunk size of the export (chunks end on a line, at content-
+# defined points, between 1/4 and 4x this size)
+BACKUP_CHUNK_SIZE = int(os.getenv("BACKUP_CHUNK_SIZE", "16384"))
+# Backups (manifests) kept; chunks only they reference are deleted
+BACKUP_KEEP = int(os.getenv("BACKUP_KEEP", "14"))
+
+LATEST = "latest.json"
+
+# Manifest versions: 1 = fixed slices of the DuckDB file (restore only),
+# 2 = chunks of an EXPORT DATABASE (CSV) of the snapshot
+FORMAT_VERSION = 2
+
+_backup_lock = Lock()
+
+
+class BackupError(Exception):
+    pass
+
+
+def _chunk_dir(store: Path) -> Path:
+    return store / "chunks"
+
+
+def _manifest_dir(store: Path) -> Path:
+    return store / "manifests"
+
+
+def _chunk_path(store: Path, digest: str) -> Path:
+    return _chunk_dir(store) / digest[:2] / digest
+
+
+def _write_atomic(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+def _read_chunks(f, chunk_size: int):
+    """
+    Split an export file into content-defined chunks, on line ends.
+
+    A chunk ends after a line whose crc32 falls below len(line) / chunk_size
+    of the hash range, so on average every `chunk_size` bytes, and where
+    it ends depends only on the lines themselves: an inserted, deleted
+    or updated row changes the chunk it is in, and the chunks after it
+    line up with the previous backup's again. Chunks are kept between
+    chunk_size / 4 and 4 * chunk_size (a longer single line stays whole).
+    """
+    low, high = chunk_size >> 2, chunk_size << 2
+    lines, size = [], 0
+
+    for line in f:
+        lines.append(line)
+        size += len(line)
+
+        if size >= high or (
+            size >= low and zlib.crc32(line) * chunk_size < len(line) << 32
+        ):
+            yield b"".join(lines)
+            lines, size = [], 0
+
+    if lines:
+        yield b"".join(lines)
+
+
+def _export_files(path: Path) -> list[Path]:
+    # schema.sql / load.sql first, then one CSV per table
+    return sorted(path.iterdir(), key=lambda p: (p.suffix != ".sql", p.name))
+
+
+def _export(snapshot_path: Path, target: Path):
+    """
+    EXPORT DATABASE (CSV) of a snapshot file into `target`. Rows come
+    out in storage (insertion) order, so the files only change where the
+    data did.
+    """
+    shutil.rmtree(target, ignore_errors=True)
+
+    con = duckdb.connect(str(snapshot_path), read_only=True)
+    try:
+        escaped = str(target).replace("'", "''")
+        con.execute(f"EXPORT DATABASE '{escaped}' (FORMAT csv)")
+    finally:
+        con.close()
+
+
+def write_backup(
+    snapshot_path: Path = SNAPSHOT_PATH,
+    fingerprint: str | None = None,
+    store: Path = BACKUP_DIR,
+) -> dict:
+    """
+    Store a snapshot as a chunked, content-addressed backup.
+
+    The snapshot is exported (EXPORT DATABASE, CSV: schema.sql, load.sql
+    and one file per table), not stored as a DuckDB file: DuckDB lays
+    data out differently on every write, an export is the same bytes
+    for the same rows. Each file is cut into content-defined chunks
+    (see _read_chunks) named by their sha256 (zlib-compressed under
+    chunks/ab/abcd...); only chunks not already in the store are
+    written. So a backup costs about one chunk per place the data
+    changed, not the database size: appended rows and clustered updates
+    are nearly free, updates scattered over a table cost up to a chunk
+    each. The export itself is still a full pass over the snapshot.
+
+    A manifest (files, chunk list, sizes, sha256s, content fingerprint)
+    goes to manifests/ and is copied to manifests/latest.json last. Old
+    backups are then GC'd.
+
+    A snapshot whose `fingerprint` matches the latest backup's isn't
+    stored again: that backup is returned with "unchanged": True.
+
+    Returns the manifest summary plus "manifest" (its path),
+    "unchanged", "duration_ms" and "gc"; new_chunks / new_bytes /
+    stored_bytes count what this call wrote.
+    """
+    with _backup_lock:
+        start = time.perf_counter()
+
+        latest = _manifest_dir(store) / LATEST
+        if fingerprint is not None and latest.exists():
+            manifest = json.loads(latest.read_bytes())
+            if manifest.get("fingerprint") == fingerprint:
+                return {
+                    **_summary(manifest),
+                    "manifest": str(_manifest_dir(store) / manifest["name"]),
+                    "new_chunks": 0,
+                    "new_bytes": 0,
+                    "stored_bytes": 0,
+                    "unchanged": True,
+                    "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+                    "gc": None,
+                }
+
+        chunks = []
+        files = []
+        new_chunks = new_bytes = stored_bytes = 0
+        backup_hash = hashlib.sha256()
+
+        export = store / "export"
+        _export(snapshot_path, export)
+
+        try:
+            for export_file in _export_files(export):
+                file_hash = hashlib.sha256()
+                first = len(chunks)
+
+                with open(export_file, "rb") as f:
+                    for data in _read_chunks(f, BACKUP_CHUNK_SIZE):
+                        file_hash.update(data)
+                        digest = hashlib.sha256(data).hexdigest()
+
+                        path = _chunk_path(store, digest)
+                        if not path.exists():
+                            blob = zlib.compress(data, 1)
+                            _write_atomic(path, blob)
+                            new_chunks += 1
+                            new_bytes += len(data)
+                            stored_bytes += len(blob)
+
+                        chunks.append([digest, len(data)])
+
+                files.append({
+                    "name": export_file.name,
+                    "size": sum(length for _, length in chunks[first:]),
+                    "sha256": file_hash.hexdigest(),
+                    "chunks": len(chunks) - first,
+                })
+                backup_hash.update(f"{export_file.name}:{file_hash.hexdigest()}\n".encode())
+        finally:
+            shutil.rmtree(export, ignore_errors=True)
+
+        created_at = datetime.utcnow()
+        sha256 = backup_hash.hexdigest()
+        name = f"{created_at:%Y%m%d-%H%M%S}-{sha256[:8]}.json"
+
+        manifest = {
+            "version": FORMAT_VERSION,
+            "name": name,
+            "created_at": created_at.isoformat(),
+            "fingerprint": fingerprint,
+            "size": sum(length for _, length in chunks),
+            "sha256": sha256,
+            "chunk_size": BACKUP_CHUNK_SIZE,
+            "new_chunks": new_chunks,
+            "new_bytes": new_bytes,
+            "stored_bytes": stored_bytes,
+            "files": files,
+            "chunks": chunks,
+        }
+
+        data = json.dumps(manifest).encode()
+        _write_atomic(_manifest_dir(store) / name, data)
+        # Last: latest.json never names chunks that aren't written yet
+        _write_atomic(latest, data)
+
+        gc = _gc(store, BACKUP_KEEP)
+
+        return {
+            **_summary(manifest),
+            "manifest": str(_manifest_dir(store) / name),
+            "unchanged": False,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "gc": gc,
+        }
+
+
+def _summary(manifest: dict) -> dict:
+    return {key: value for key, value in manifest.items() if key not in ("chunks", "files")} | {
+        "chunks": len(manifest["chunks"]),
+        "files": len(manifest.get("files", [])),
+    }
+
+
+def read_manifest(name: str = LATEST, store: Path = BACKUP_DIR) -> dict:
+    if not name.endswith(".json"):
+        name = LATEST if name == "latest" else f"{name}.json"
+
+    path = _manifest_dir(store) / name
+    if not path.exists():
+        raise BackupError(f"No backup manifest '{name}' in {_manifest_dir(store)}")
+
+    return json.loads(path.read_bytes())
+
+
+def list_backups(store: Path = BACKUP_DIR) -> list[dict]:
+    """
+    Backups in the store, newest first.
+    """
+    return [
+        _summary(json.loads(path.read_bytes()))
+        for path in sorted(_manifest_dir(store).glob("*.json"), reverse=True)
+        if path.name != LATEST
+    ]
+
+
+def store_stats(store: Path = BACKUP_DIR) -> dict:
+    files = [p for p in _chunk_dir(store).glob("*/*") if not p.name.endswith(".tmp")]
+    return {
+        "chunks": len(files),
+        "stored_bytes": sum(p.stat().st_size for p in files),
+    }
+
+
+def stage_backup(name: str, staging: Path, store: Path = BACKUP_DIR) -> dict:
+    """
+    Hard-link the store as it is now into `staging` for upload: every
+    chunk and manifest, with backup `name` as latest.json.
+
+    Backups and GC only add, replace (rename) or unlink files, never
+    modify one, so the staged copy stays consistent for as long as it
+    is uploaded while new backups keep landing in the store. Returns
+    the staged manifest.
+    """
+    with _backup_lock:
+        manifest = read_manifest(name, store)
+
+        shutil.rmtree(staging, ignore_errors=True)
+
+        for path in _chunk_dir(store).glob("*/*"):
+            if not path.name.endswith(".tmp"):
+                target = _chunk_path(staging, path.name)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                os.link(path, target)
+
+        _manifest_dir(staging).mkdir(parents=True)
+        for path in _manifest_dir(store).glob("*.json"):
+            if path.name != LATEST:
+                os.link(path, _manifest_dir(staging) / path.name)
+
+        os.link(_manifest_dir(store) / manifest["name"], _manifest_dir(staging) / LATEST)
+
+        return manifest
+
+
+def restore_backup(
+    name: str = LATEST,
+    target: Path = Path("data/live.duckdb"),
+    store: Path = BACKUP_DIR,
+) -> dict:
+    """
+    Rebuild a backup as the database `target` (server stopped). Every
+    chunk and file is checked against its sha256; the export is then
+    imported (IMPORT DATABASE) into a fresh file renamed into place.
+    Version 1 backups (DuckDB file slices) are reassembled as is.
+    """
+    manifest = read_manifest(name, store)
+    tmp = target.with_name(target.name + ".tmp")
+
+    target.parent.mkdir(parents=True, exist_ok=True)
+    for leftover in (tmp, tmp.with_name(tmp.name + ".wal")):
+        leftover.unlink(missing_ok=True)
+
+    if manifest["version"] == 1:
+        _reassemble(manifest, manifest["chunks"], tmp, store)
+    else:
+        export = target.with_name(target.name + ".import")
+        shutil.rmtree(export, ignore_errors=True)
+        export.mkdir()
+
+        try:
+            chunks = iter(manifest["chunks"])
+            for file in manifest["files"]:
+                file_chunks = [next(chunks) for _ in range(file["chunks"])]
+                if _reassemble(manifest, file_chunks, export / file["name"], store) != file["sha256"]:
+                    raise BackupError(f"Backup {manifest['name']}: {file['name']} checksum mismatch")
+
+            # (a half-imported file is removed by the next restore)
+            con = duckdb.connect(str(tmp))
+            try:
+                escaped = str(export).replace("'", "''")
+                con.execute(f"IMPORT DATABASE '{escaped}'")
+            finally:
+                con.close()
+
+        finally:
+            shutil.rmtree(export, ignore_errors=True)
+
+    # A WAL left from the old database would be replayed onto this one
+    target.with_name(target.name + ".wal").unlink(missing_ok=True)
+    os.replace(tmp, target)
+
+    return {"restored": manifest["name"], "target": str(target), "size": manifest["size"]}
+
+
+def _reassemble(manifest: dict, chunks: list, target: Path, store: Path) -> str:
+    """
+    Write `chunks` (verified) to `target`; returns its sha256. Version 1
+    manifests are checked against the whole-file sha256 here.
+    """
+    file_hash = hashlib.sha256()
+
+    with open(target, "wb") as out:
+        for digest, length in chunks:
+            path = _chunk_path(store, digest)
+            if not path.exists():
+                out.close()
+                target.unlink()
+                raise BackupError(f"Backup {manifest['name']} is missing chunk {digest}")
+
+            data = zlib.decompress(path.read_bytes())
+            if len(data) != length or hashlib.sha256(data).hexdigest() != digest:
+                out.close()
+                target.unlink()
+                raise BackupError(f"Backup {manifest['name']}: chunk {digest} is corrupt")
+
+            file_hash.update(data)
+            out.write(data)
+
+    if manifest["version"] == 1 and file_hash.hexdigest() != manifest["sha256"]:
+        target.unlink()
+        raise BackupError(f"Backup {manifest['name']}: restored file checksum mismatch")
+
+    return file_hash.hexdigest()
+
+
+def gc_backups(keep: int = BACKUP_KEEP, store: Path = BACKUP_DIR) -> dict:
+    """
+    Keep the `keep` newest backups; delete older manifests and every
+    chunk no kept manifest references.
+    """
+    with _backup_lock:
+        return _gc(store, keep)
+
+
+def _gc(store: Path, keep: int) -> dict:
+    manifests = sorted(
+        (p for p in _manifest_dir(store).glob("*.json") if p.name != LATEST),
+        reverse=True,
+    )
+
+    removed_manifests = 0
+    for path in manifests[max(keep, 1):]:
+        path.unlink()
+        removed_manifests += 1
+
+    referenced = set()
+    for path in [*manifests[:max(keep, 1)], _manifest_dir(store) / LATEST]:
+        if path.exists():
+            referenced.update(digest for digest, _ in json.loads(path.read_bytes())["chunks"])
+
+    removed_chunks = freed = 0
+    for path in _chunk_dir(store).glob("*/*"):
+        # Unreferenced chunks + leftovers of interrupted writes
+        if path.name not in referenced:
+            freed += path.stat().st_size
+            path.unlink()
+            removed_chunks += 1
+
+    return {
+        "manifests_removed": removed_manifests,
+        "chunks_removed": removed_chunks,
+        "bytes_freed": freed,
+    }
+
+
+def main():
+    # python -m app.db.backup restore [manifest] [target]  (server stopped)
+    # python -m app.db.backup backup [snapshot] | list | gc
+    args = sys.argv[1:]
+    command = args[0] if args else None
+
+    try:
+        if command == "restore" and len(args) <= 3:
+            result = restore_backup(
+                args[1] if len(args) > 1 else LATEST,
+                Path(args[2]) if len(args) > 2 else Path("data/live.duckdb"),
+            )
+            print(f"✅ Restored {result['restored']} → {result['target']} ({result['size']} bytes)")
+
+        elif command == "backup" and len(args) <= 2:
+            result = write_backup(Path(args[1]) if len(args) > 1 else SNAPSHOT_PATH)
+            print(
+                f"✅ Backup {result['name']}: {result['new_chunks']}/{result['chunks']} new chunks, "
+                f"{result['stored_bytes']} bytes written in {result['duration_ms']:.0f} ms"
+            )
+
+        elif command == "list" and len(args) == 1:
+            for backup in list_backups():
+                print(f"{backup['name']}  {backup['size']:>12} bytes  {backup['new_chunks']:>6} new chunks")
+
+        elif command == "gc" and len(args) == 1:
+            result = gc_backups()
+            print(
+                f"✅ Removed {result['manifests_removed']} backups, "
+                f"{result['chunks_removed']} chunks ({result['bytes_freed']} bytes)"
+            )
+
+        else:
+            print("Usage: python -m app.db.backup restore [manifest] [target] | backup [snapshot] | list | gc")
+            sys.exit(1)
+
+    except BackupError as e:
+        print(f"❌ {e}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
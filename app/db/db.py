@@ -1,30 +1,174 @@
 import duckdb
 import os
+from contextlib import contextmanager
+from queue import Queue, Empty
 from threading import Lock
 
 from app.db.schema import init_schema
 
 DB_PATH = "data/live.duckdb"
 
-_schema_initialized = False
-_schema_lock = Lock()
+# Max cursors handed out concurrently to requests
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "8"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "30"))
+
+
+class Database:
+    """
+    Process-wide DuckDB database.
+
+    Holds ONE file connection (opened lazily, schema initialized once)
+    and hands out lightweight cursors from it. A cursor is an
+    independent connection to the same in-memory database instance, so
+    each one may be used from its own thread without re-opening the
+    file, reloading the catalog or warming a fresh buffer pool.
+
+    Request cursors come from a bounded pool (see `acquire`).
+    """
+
+    def __init__(self, path: str = DB_PATH, pool_size: int = DB_POOL_SIZE):
+        self.path = path
+        self.pool_size = pool_size
+
+        self._con = None
+        self._lock = Lock()
+        self._idle: Queue = Queue()
+        self._created = 0
+
+        self.stats = {
+            "connections_opened": 0,
+            "cursors_created": 0,
+            "acquired": 0,
+            "in_use": 0,
+            "waits": 0,
+        }
+
+    # -------------------------
+    # Connection lifecycle
+    # -------------------------
+
+    @property
+    def connection(self) -> duckdb.DuckDBPyConnection:
+        if self._con is None:
+            with self._lock:
+                if self._con is None:
+                    con = duckdb.connect(self.path)
+                    init_schema(con)
+                    self.stats["connections_opened"] += 1
+                    self._con = con
+        return self._con
+
+    def close(self):
+        with self._lock:
+            while True:
+                try:
+                    self._idle.get_nowait().close()
+                except Empty:
+                    break
+
+            if self._con is not None:
+                self._con.close()
+                self._con = None
+
+            self._created = 0
+
+    # -------------------------
+    # Cursors
+    # -------------------------
+
+    def cursor(self) -> duckdb.DuckDBPyConnection:
+        """
+        Return a new, unpooled cursor on the shared connection.
+        """
+        cur = self.connection.cursor()
+        with self._lock:
+            self.stats["cursors_created"] += 1
+        return cur
+
+    @contextmanager
+    def acquire(self, timeout: float = DB_POOL_TIMEOUT):
+        """
+        Borrow a cursor from the bounded pool.
+
+        Blocks (up to `timeout` seconds) when `pool_size` cursors are
+        already in use. Any transaction left open by the borrower is
+        rolled back before the cursor goes back to the pool.
+        """
+        cur = self._checkout(timeout)
+        with self._lock:
+            self.stats["acquired"] += 1
+            self.stats["in_use"] += 1
+
+        try:
+            yield cur
+        finally:
+            with self._lock:
+                self.stats["in_use"] -= 1
+            self._checkin(cur)
+
+    def _checkout(self, timeout: float):
+        try:
+            return self._idle.get_nowait()
+        except Empty:
+            pass
+
+        with self._lock:
+            if self._created < self.pool_size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            return self.cursor()
+
+        with self._lock:
+            self.stats["waits"] += 1
+        try:
+            return self._idle.get(timeout=timeout)
+        except Empty:
+            raise TimeoutError(
+                f"No database cursor available after {timeout}s "
+                f"(pool_size={self.pool_size})"
+            )
+
+    def _checkin(self, cur):
+        try:
+            cur.rollback()
+        except duckdb.Error:
+            # No transaction active → nothing to clean up
+            pass
+
+        if self._con is None:
+            # Database was closed while the cursor was out
+            cur.close()
+            return
+
+        self._idle.put(cur)
+
+
+database = Database()
 
 
 def get_db():
     """
-    Return a NEW DuckDB connection per request.
+    Return a cursor on the shared DuckDB connection.
 
-    DuckDB does NOT support concurrent queries on the same connection.
+    For code running outside a request (startup, background workers,
+    scripts). Routes should depend on `get_request_db` instead so the
+    whole request shares one pooled cursor.
+
+    A cursor must NOT be used by two threads at the same time.
     """
-    global _schema_initialized
+    return database.cursor()
 
-    con = duckdb.connect(DB_PATH)
 
-    # Ensure schema is initialized exactly once
-    if not _schema_initialized:
-        with _schema_lock:
-            if not _schema_initialized:
-                init_schema(con)
-                _schema_initialized = True
+def get_request_db():
+    """
+    FastAPI dependency: one pooled cursor per request.
 
-    return con
+    Pass it down to services (`con=...`) so a request never opens
+    more than one cursor.
+    """
+    with database.acquire() as con:
+        yield con
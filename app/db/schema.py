@@ -8,7 +8,12 @@ def init_schema(con):
 
         # Child tables FIRST
         con.execute("DROP TABLE IF EXISTS content_preview")
+        con.execute("DROP TABLE IF EXISTS preview_cache")
+        con.execute("DROP TABLE IF EXISTS content_group_count")
+        con.execute("DROP TABLE IF EXISTS content_queue")
         con.execute("DROP TABLE IF EXISTS content_tag")
+        con.execute("DROP TABLE IF EXISTS drive_sync_attempt")
+        con.execute("DROP TABLE IF EXISTS drive_sync_job")
 
         # Then parents
         con.execute("DROP TABLE IF EXISTS tag")
@@ -32,6 +37,44 @@ def init_schema(con):
         ON content(url);
     """)
 
+    # Keyset pagination (ORDER BY created_at, id) needs no index: DuckDB
+    # never uses an ART index for ORDER BY or range predicates. Pages are
+    # a top-N whose dynamic filter skips row groups by their created_at
+    # min/max (tests/50_bench_content_pages.py), so an index would only
+    # slow down writes.
+    # NOTE: never index content.status — DuckDB rewrites updates of
+    # indexed columns as delete+insert, which trips the content_preview
+    # foreign key on every status change.
+    con.execute("DROP INDEX IF EXISTS idx_content_created")
+
+    # -------------------------
+    # Work queue: open (not complete / deleted) content + tagger leases
+    # (app.services.content_queue). Stands in for an index on
+    # (status, created_at), which content.status can't have (see above):
+    # claims only ever scan open items.
+    # -------------------------
+    queue_exists = con.execute("""
+        SELECT COUNT(*) FROM duckdb_tables() WHERE table_name = 'content_queue'
+    """).fetchone()[0]
+
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS content_queue (
+            content_id TEXT PRIMARY KEY,
+            created_at TIMESTAMP,
+            leased_by TEXT,
+            leased_until TIMESTAMP
+        )
+    """)
+
+    # Backfill databases created before the queue existed
+    if not queue_exists:
+        con.execute("""
+            INSERT INTO content_queue (content_id, created_at)
+            SELECT id, created_at
+            FROM content
+            WHERE COALESCE(status, 'new') NOT IN ('complete', 'deleted')
+        """)
+
     # -------------------------
     # Tag groups
     # -------------------------
@@ -76,6 +119,42 @@ def init_schema(con):
         ON content_tag (content_id, tag_id)
     """)
 
+    # Tag filters (content_tag → content)
+    con.execute("""
+        CREATE INDEX IF NOT EXISTS idx_content_tag_tag
+        ON content_tag (tag_id)
+    """)
+
+    # -------------------------
+    # Tags per (content, group) — maintained with content_tag
+    # (app.services.content_group_count), read by the validators
+    # -------------------------
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS content_group_count (
+            content_id TEXT,
+            group_id TEXT,
+            n INTEGER,
+            PRIMARY KEY (content_id, group_id)
+        )
+    """)
+
+    # group_counts(content_id): the composite primary key isn't used
+    # for content_id-only lookups
+    con.execute("""
+        CREATE INDEX IF NOT EXISTS idx_content_group_count_content
+        ON content_group_count (content_id)
+    """)
+
+    # Backfill databases created before the table existed
+    con.execute("""
+        INSERT INTO content_group_count (content_id, group_id, n)
+        SELECT ct.content_id, t.group_id, COUNT(*)
+        FROM content_tag ct
+        JOIN tag t ON t.id = ct.tag_id
+        WHERE NOT EXISTS (SELECT 1 FROM content_group_count)
+        GROUP BY ct.content_id, t.group_id
+    """)
+
     # -------------------------
     # Content Preview (derived)
     # -------------------------
@@ -93,7 +172,77 @@ def init_schema(con):
         )
     """)
 
+    # Preview worker retry state
+    con.execute("""
+        ALTER TABLE content_preview
+        ADD COLUMN IF NOT EXISTS attempts INTEGER DEFAULT 0
+    """)
+
+    con.execute("""
+        ALTER TABLE content_preview
+        ADD COLUMN IF NOT EXISTS next_attempt_at TIMESTAMP
+    """)
+
+    con.execute("""
+        ALTER TABLE content_preview
+        ADD COLUMN IF NOT EXISTS last_error TEXT
+    """)
+
     con.execute("""
         CREATE INDEX IF NOT EXISTS idx_preview_status
         ON content_preview(preview_status)
-    """)
\ No newline at end of file
+    """)
+
+    # -------------------------
+    # Preview cache (URL → preview, shared across content)
+    # -------------------------
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS preview_cache (
+            url_key TEXT PRIMARY KEY,   -- content_preview.preview_cache_key
+            host TEXT,
+            preview_type TEXT,
+            preview_url TEXT,
+            preview_url_normalized TEXT,
+            title TEXT,
+            description TEXT,
+            error TEXT,                 -- set → negative (failed fetch) entry
+            fetched_at TIMESTAMP,
+            expires_at TIMESTAMP
+        )
+    """)
+
+    # -------------------------
+    # Drive sync queue (app.services.drive_sync): one job per snapshot
+    # upload + one row per rclone attempt
+    # -------------------------
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS drive_sync_job (
+            id TEXT PRIMARY KEY,
+            snapshot_path TEXT,
+            remote TEXT,
+            status TEXT,                -- pending | running | success | skipped | failed | superseded
+            attempts INTEGER DEFAULT 0,
+            next_attempt_at TIMESTAMP,
+            queued_at TIMESTAMP,
+            finished_at TIMESTAMP
+        )
+    """)
+
+    # Content fingerprint of the snapshot (app.db.snapshot.fingerprint)
+    con.execute("""
+        ALTER TABLE drive_sync_job
+        ADD COLUMN IF NOT EXISTS fingerprint TEXT
+    """)
+
+    con.execute("""
+        CREATE TABLE IF NOT EXISTS drive_sync_attempt (
+            job_id TEXT,
+            attempt INTEGER,
+            started_at TIMESTAMP,
+            duration_ms DOUBLE,
+            bytes BIGINT,
+            status TEXT,                -- success | skipped | failed
+            error TEXT,
+            PRIMARY KEY (job_id, attempt)
+        )
+    """)
@@ -1,20 +1,110 @@
+import hashlib
+import os
+import time
+from datetime import datetime
 from pathlib import Path
+from threading import Lock
+
 import duckdb
-import shutil
+
+from app.db.db import get_db
 
 DATA_DIR = Path("data")
 BACKUP_DIR = DATA_DIR / "backups"
-BACKUP_DIR.mkdir(exist_ok=True)
+BACKUP_DIR.mkdir(parents=True, exist_ok=True)
+
+SNAPSHOT_PATH = BACKUP_DIR / "latest.duckdb"
+
+# Catalog name the snapshot file is attached under while it is written
+SNAPSHOT_ALIAS = "snapshot"
+
+# Bookkeeping that changes with every upload, not with the data
+FINGERPRINT_EXCLUDE = ("drive_sync_job", "drive_sync_attempt")
+
+_snapshot_lock = Lock()
+
+
+def snapshot_db(con: duckdb.DuckDBPyConnection | None = None, path: Path = SNAPSHOT_PATH) -> dict:
+    """
+    Write a consistent copy of the live database to `path`.
+
+    The copy is made by DuckDB itself (ATTACH a fresh file, then
+    COPY FROM DATABASE), inside one read transaction: it sees a single
+    point in time, never a half-written file, and other connections
+    keep writing meanwhile. It is written next to `path` and renamed
+    over it once complete, so `path` is always a whole snapshot.
+
+    Slow on large databases: call it from a background worker (see
+    services/snapshot_worker), not from a request.
 
-def snapshot_db(con: duckdb.DuckDBPyConnection) -> Path:
+    Returns {"path", "bytes", "duration_ms", "created_at",
+    "fingerprint"} (fingerprint of the copy as written).
     """
-    Create a single rolling DuckDB snapshot (latest.duckdb).
+    if con is None:
+        con = get_db()
+
+    tmp = path.with_name(path.name + ".tmp")
+
+    with _snapshot_lock:
+        start = time.perf_counter()
+
+        for leftover in (tmp, tmp.with_name(tmp.name + ".wal")):
+            leftover.unlink(missing_ok=True)
+
+        source = con.execute("SELECT current_database()").fetchone()[0]
+        target = str(tmp).replace("'", "''")
+
+        con.execute(f"ATTACH '{target}' AS {SNAPSHOT_ALIAS}")
+        try:
+            con.execute(f"COPY FROM DATABASE {source} TO {SNAPSHOT_ALIAS}")
+            digest = fingerprint(con, SNAPSHOT_ALIAS)
+        finally:
+            # Checkpoints and closes the file
+            con.execute(f"DETACH {SNAPSHOT_ALIAS}")
+
+        os.replace(tmp, path)
+
+        return {
+            "path": str(path),
+            "bytes": path.stat().st_size,
+            "duration_ms": round((time.perf_counter() - start) * 1000, 1),
+            "created_at": datetime.utcnow().isoformat(),
+            "fingerprint": digest,
+        }
+
+
+def fingerprint(con: duckdb.DuckDBPyConnection, catalog: str | None = None) -> str:
+    """
+    Content fingerprint of a database: per table, the row count and an
+    order-independent sum of row hashes (FINGERPRINT_EXCLUDE left out).
+
+    Two databases with the same rows get the same fingerprint whatever
+    their file layout (DuckDB files are not byte-for-byte reproducible),
+    and any inserted, deleted or updated row changes it. One columnar
+    scan per table: much cheaper than hashing the file.
     """
-    snapshot_path = BACKUP_DIR / "latest.duckdb"
+    if catalog is None:
+        catalog = con.execute("SELECT current_database()").fetchone()[0]
 
-    # Flush WAL → DB
-    con.execute("CHECKPOINT")
+    tables = [
+        r[0]
+        for r in con.execute(
+            """
+            SELECT table_name
+            FROM duckdb_tables()
+            WHERE database_name = ? AND schema_name = 'main'
+            ORDER BY table_name
+            """,
+            (catalog,),
+        ).fetchall()
+        if r[0] not in FINGERPRINT_EXCLUDE
+    ]
 
-    shutil.copy2(DATA_DIR / "live.duckdb", snapshot_path)
+    digest = hashlib.sha256()
+    for table in tables:
+        rows, hashes = con.execute(
+            f"SELECT COUNT(*), COALESCE(SUM(hash(t)), 0)::VARCHAR FROM {catalog}.main.{table} t"
+        ).fetchone()
+        digest.update(f"{table}:{rows}:{hashes}\n".encode())
 
-    return snapshot_path
+    return digest.hexdigest()
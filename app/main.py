@@ -1,15 +1,41 @@
 from fastapi import FastAPI
 # from app.db import init_db
-from app.db import get_db
+from app.db import database
 from app.routes import content, tags, export, debug, tag_groups
 from fastapi.middleware.cors import CORSMiddleware
 from app.services.taggroup_loader import seed_taggroups
+from app.services.preview_worker import preview_worker
+from app.services.http_client import http_client
+from app.services.tag_index import tag_index
+from app.services.tag_bitmap import tag_bitmaps
+from app.services.tag_usage import tag_usage
+from app.services.snapshot_worker import snapshot_worker
+from app.services.drive_sync import drive_sync
+from app.services.tag_group_model import tag_group_model
 
 app = FastAPI(title="Pic-Vid Tags API")
 
 @app.on_event("startup")
 def startup():
     seed_taggroups()
+    tag_group_model.get()
+    tag_index.load()
+    tag_bitmaps.load()
+    tag_usage.start()
+    preview_worker.start()
+    drive_sync.start()
+    snapshot_worker.start()
+
+@app.on_event("shutdown")
+def shutdown():
+    preview_worker.stop()
+    tag_usage.stop()
+    snapshot_worker.stop()
+    drained = drive_sync.stop()
+    http_client.close()
+    # An upload still running keeps using the database
+    if drained:
+        database.close()
 
 # init_db()
 app.add_middleware(
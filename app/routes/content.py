@@ -1,19 +1,48 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from uuid import uuid4
 from datetime import datetime
 
-from app.db import get_db
+from app.db import get_request_db
 from app.schemas import (
+    ClaimContent,
     ContentCreate,
+    ContentIdsBatch,
+    ReleaseContent,
     ExpandRequest
 )
-from app.services.content_snapshot import get_content_snapshot
-from app.db.snapshot import snapshot_db
-from app.services.drive_sync import enqueue_drive_sync, LAST_SYNC_STATUS
-from app.services.content_preview import build_and_store_preview
+from app.services.content_snapshot import (
+    get_content_snapshot,
+    list_content_page,
+    MAX_PAGE_SIZE,
+)
+from app.services.drive_sync import drive_sync
+from app.services.snapshot_worker import snapshot_worker
+from app.services.content_preview import build_and_store_preview, enqueue_preview
+from app.services.preview_worker import preview_worker
+from app.services.content_bulk import bulk_create_content, BulkContentError
+from app.services.content_complete import complete_content_batch
+from app.services.content_filter import FilterError
+from app.services.tag_bitmap import tag_bitmaps
+from app.services.content_export import (
+    export_format,
+    export_query,
+    stream_export,
+    ExportError,
+)
+from app.services.content_queue import (
+    claim_content,
+    dequeue_content,
+    enqueue_content,
+    peek_next,
+    release_content,
+    QueueError,
+    CONTENT_LEASE_SECONDS,
+)
 from app.services.tag_validation import (
     validate_content_completeness,
     validate_content_completeness_detailed,
+    validate_content_completeness_batch,
     TagValidationError,
 )
 
@@ -25,13 +54,47 @@ from app.services.content_expand import expand_urls
 router = APIRouter(prefix="/content", tags=["content"])
 
 
+# ------------------------------------------------------------------
+# LIST CONTENT (gallery)
+# ------------------------------------------------------------------
+
+@router.get("/")
+def list_content(
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="next_cursor of the previous page"),
+    status: list[str] | None = Query(None),
+    tag_ids: list[str] | None = Query(None, description="Must have ALL of these tags"),
+    groups_complete: bool | None = Query(None),
+    missing_group: str | None = Query(None),
+    source_domain: str | None = Query(None),
+    q: str | None = Query(None, description="Filter expression, e.g. group:mood has any [calm] AND status:new"),
+    con=Depends(get_request_db),
+):
+    """
+    Keyset-paginated content listing (newest first) for the gallery.
+    """
+    try:
+        return list_content_page(
+            limit=limit,
+            cursor=cursor,
+            status=status,
+            tag_ids=tag_ids,
+            groups_complete=groups_complete,
+            missing_group=missing_group,
+            source_domain=source_domain,
+            filter_text=q,
+            con=con,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ------------------------------------------------------------------
 # CREATE SINGLE CONTENT (draft)
 # ------------------------------------------------------------------
 
 @router.post("/")
-def create_content(payload: ContentCreate):
-    con = get_db()
+def create_content(payload: ContentCreate, con=Depends(get_request_db)):
     content_id = str(uuid4())
 
     con.execute(
@@ -48,17 +111,15 @@ def create_content(payload: ContentCreate):
         (content_id, payload.url, payload.url),
     )
 
+    enqueue_content(con, "SELECT ? AS id", (content_id,))
+    tag_bitmaps.add_content([content_id])
+    snapshot_worker.mark_dirty()
+
     # --------------------------------------------------
-    # 🖼️ Build preview (best-effort, non-blocking)
+    # 🖼️ Queue preview (fetched by the background worker)
     # --------------------------------------------------
-    try:
-        build_and_store_preview(
-            content_id=content_id,
-            source_url=payload.url,
-        )
-    except Exception as e:
-        # Never fail content creation
-        print(f"⚠️ Preview build failed for {payload.url}: {e}")
+    if enqueue_preview(content_id, payload.url, con=con) == "pending":
+        preview_worker.wake()
 
     return {"id": content_id}
 
@@ -68,58 +129,114 @@ def create_content(payload: ContentCreate):
 # ------------------------------------------------------------------
 
 @router.get("/next")
-def get_next_content():
-    con = get_db()
+def get_next_content(tagger: str | None = None, con=Depends(get_request_db)):
+    """
+    Oldest open item from the work queue. With `tagger` it is leased
+    (see POST /content/claim); without, it is only peeked at.
+    """
+    if tagger:
+        try:
+            claimed = claim_content(tagger, 1, con=con)["content_ids"]
+        except QueueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
 
-    row = con.execute(
-        """
-        SELECT id
-        FROM content
-        WHERE status != 'complete'
-        ORDER BY created_at
-        LIMIT 1
-        """
-    ).fetchone()
+        content_id = claimed[0] if claimed else None
+    else:
+        content_id = peek_next(con=con)
 
-    if not row:
+    if content_id is None:
         return None
 
-    content_id = row[0]
-
-    snapshot = get_content_snapshot(content_id)
+    snapshot = get_content_snapshot(content_id, con=con)
 
     if snapshot is None:
         return None
 
     return snapshot
 
+# ------------------------------------------------------------------
+# WORK QUEUE (leases for concurrent taggers)
+# ------------------------------------------------------------------
+
+@router.post("/claim")
+def claim_content_endpoint(payload: ClaimContent, con=Depends(get_request_db)):
+    """
+    Lease the next `count` open items to a tagger and return their
+    snapshots. Leases expire after `lease_seconds`; completing an item
+    removes it from the queue.
+    """
+    try:
+        claimed = claim_content(
+            payload.tagger,
+            payload.count,
+            payload.lease_seconds or CONTENT_LEASE_SECONDS,
+            con=con,
+        )
+    except QueueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    items = []
+    for content_id in claimed["content_ids"]:
+        snapshot = get_content_snapshot(content_id, con=con)
+        if snapshot:
+            items.append(snapshot)
+
+    return {
+        "tagger": claimed["tagger"],
+        "lease_expires_at": claimed["lease_expires_at"],
+        "items": items,
+    }
+
+@router.post("/release")
+def release_content_endpoint(payload: ReleaseContent, con=Depends(get_request_db)):
+    """
+    Hand leased items back to the queue.
+    """
+    released = release_content(payload.tagger, payload.content_ids, con=con)
+
+    return {
+        "status": "ok",
+        "released": released,
+    }
+
 # ------------------------------------------------------------------
 # COMPLETE / FINALISE CONTENT (STRICT)
 # ------------------------------------------------------------------
 
 @router.post("/{content_id}/complete")
-def complete_content(content_id: str):
-    con = get_db()
-
+def complete_content(content_id: str, con=Depends(get_request_db)):
     try:
-        validate_content_completeness(content_id)
+        validate_content_completeness(content_id, con=con)
     except TagValidationError as e:
         raise HTTPException(
             status_code=400,
             detail=f"Content incomplete: {e}",
         )
 
-    res = con.execute(
-        """
-        UPDATE content
-        SET status = 'complete'
-        WHERE id = ?
-        """,
-        (content_id,),
-    )
+    con.execute("BEGIN")
 
-    if res.rowcount == 0:
-        raise HTTPException(status_code=404, detail="Content not found")
+    try:
+        (updated,) = con.execute(
+            """
+            UPDATE content
+            SET status = 'complete'
+            WHERE id = ?
+            """,
+            (content_id,),
+        ).fetchone()
+
+        if updated == 0:
+            raise HTTPException(status_code=404, detail="Content not found")
+
+        dequeue_content(con, [content_id])
+
+        con.execute("COMMIT")
+
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    snapshot_worker.mark_dirty()
 
     return {
         "status": "ok",
@@ -134,11 +251,49 @@ def complete_content(content_id: str):
 
 
 @router.get("/{content_id}/validation")
-def get_content_validation(content_id: str):
+def get_content_validation(content_id: str, con=Depends(get_request_db)):
     """
     Return structured per-group completeness validation for a content item.
     """
-    return validate_content_completeness_detailed(content_id)
+    return validate_content_completeness_detailed(content_id, con=con)
+
+
+# ------------------------------------------------------------------
+# BATCH VALIDATION / COMPLETION
+# ------------------------------------------------------------------
+
+@router.post("/validate/batch")
+def validate_content_batch(payload: ContentIdsBatch, con=Depends(get_request_db)):
+    """
+    Completeness (tag group min_count) for many content items at once.
+    """
+    result = validate_content_completeness_batch(payload.content_ids, con=con)
+
+    items = [
+        {"content_id": cid, "valid": not violations, "violations": violations}
+        for cid, violations in result["items"].items()
+    ]
+
+    return {
+        "valid": sum(1 for i in items if i["valid"]),
+        "invalid": sum(1 for i in items if not i["valid"]),
+        "items": items,
+        "not_found": result["not_found"],
+    }
+
+@router.post("/complete/batch")
+def complete_content_batch_route(payload: ContentIdsBatch, con=Depends(get_request_db)):
+    """
+    Mark every passing item complete (one UPDATE); failing items are
+    returned with their violations and left unchanged.
+    """
+    result = complete_content_batch(payload.content_ids, con=con)
+    snapshot_worker.mark_dirty(len(result["completed"]))
+
+    return {
+        "status": "ok",
+        **result,
+    }
 
 
 # ------------------------------------------------------------------
@@ -146,8 +301,8 @@ def get_content_validation(content_id: str):
 # ------------------------------------------------------------------
 
 @router.get("/{content_id}")
-def get_content(content_id: str):
-    snapshot = get_content_snapshot(content_id)
+def get_content(content_id: str, con=Depends(get_request_db)):
+    snapshot = get_content_snapshot(content_id, con=con)
 
     if snapshot is None:
         raise HTTPException(status_code=404, detail="Content not found")
@@ -156,86 +311,34 @@ def get_content(content_id: str):
 
 
 # ------------------------------------------------------------------
-# BULK CREATE (DRAFT + TAGS + SNAPSHOT + ASYNC DRIVE SYNC)
+# BULK CREATE (DRAFT + TAGS + ASYNC SNAPSHOT / DRIVE SYNC)
 # ------------------------------------------------------------------
 
 @router.post("/bulk")
-def create_content_bulk(payload: dict):
+def create_content_bulk(payload: dict, con=Depends(get_request_db)):
     items = payload.get("items", [])
     if not items:
         raise HTTPException(status_code=400, detail="No items provided")
 
-    con = get_db()
-    created = []
-    skipped = []
-
-    for item in items:
-        content_id = str(uuid4())
-        tag_ids = item.get("tag_ids", [])
+    try:
+        result = bulk_create_content(items, con=con)
+    except BulkContentError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-        url = item["url"]
-        source_url = item.get("source_url") or url
+    created = result["created"]
+    skipped = result["skipped_urls"]
 
-        try:
-            # 1️⃣ Insert content (draft)
-            con.execute(
-                """
-                INSERT INTO content (
-                    id,
-                    url,
-                    source_url,
-                    created_at,
-                    status
-                )
-                VALUES (?, ?, ?, CURRENT_TIMESTAMP, 'draft')
-                """,
-                (content_id, url, source_url),
-            )
-
-            # 2️⃣ Insert content ↔ tag relations
-            for tag_id in tag_ids:
-                con.execute(
-                    """
-                    INSERT OR IGNORE INTO content_tag (
-                        content_id,
-                        tag_id
-                    )
-                    VALUES (?, ?)
-                    """,
-                    (content_id, tag_id),
-                )
-
-            # --------------------------------------------------
-            # 🖼️ Build preview (best-effort)
-            # --------------------------------------------------
-            try:
-                build_and_store_preview(
-                    content_id=content_id,
-                    source_url=url,
-                )
-
-            except Exception:
-                pass
-
-            created.append(content_id)
-
-        except Exception:
-            # Likely UNIQUE violation on content.url
-            skipped.append(item.get("url"))
-
-    # --------------------------------------------------------------
-    # 📸 Snapshot + async Google Drive sync
-    # --------------------------------------------------------------
+    if created:
+        preview_worker.wake()
 
     backup_scheduled = False
     snapshot_name = None
 
     if created:
-        snapshot_path = snapshot_db(con)
-        enqueue_drive_sync(snapshot_path)
-
+        # Written (and synced to Drive) by the snapshot worker once
+        # its window opens
+        snapshot_name = snapshot_worker.mark_dirty(len(created)).name
         backup_scheduled = True
-        snapshot_name = snapshot_path.name
 
     return {
         "created": len(created),
@@ -244,7 +347,7 @@ def create_content_bulk(payload: dict):
         "backup": {
             "scheduled": backup_scheduled,
             "snapshot": snapshot_name,
-            "last_sync": LAST_SYNC_STATUS,
+            "last_sync": drive_sync.last_sync(con=con),
         },
     }
 
@@ -254,9 +357,7 @@ def create_content_bulk(payload: dict):
 # ------------------------------------------------------------------
 
 @router.post("/check-duplicates")
-def check_duplicates(payload: dict):
-    con = get_db()
-
+def check_duplicates(payload: dict, con=Depends(get_request_db)):
     # --------------------------------------------------
     # Case 1: Expanded items (url + source_url)
     # --------------------------------------------------
@@ -324,9 +425,7 @@ def check_duplicates(payload: dict):
 # ------------------------------------------------------------------
 
 @router.post("/{content_id}/preview/rebuild")
-def rebuild_preview(content_id: str):
-    con = get_db()
-
+def rebuild_preview(content_id: str, con=Depends(get_request_db)):
     row = con.execute(
         "SELECT url FROM content WHERE id = ?",
         (content_id,),
@@ -335,10 +434,13 @@ def rebuild_preview(content_id: str):
     if not row:
         raise HTTPException(status_code=404, detail="Content not found")
 
+    # A manual rebuild always refetches (and refreshes the cache)
     try:
         preview = build_and_store_preview(
             content_id=content_id,
             source_url=row[0],
+            con=con,
+            refresh=True,
         )
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -349,73 +451,55 @@ def rebuild_preview(content_id: str):
     }
 
 @router.post("/export")
-def export_content(payload: dict):
-    tag_ids = payload.get("tag_ids", [])
+def export_content(payload: dict, con=Depends(get_request_db)):
+    """
+    Stream content URLs as a file download: txt, csv or ndjson
+    ("json"), optionally only items matching `filter` (a filter
+    expression) and having ALL `tag_ids`.
+    """
     fmt = payload.get("format", "txt")
 
-    con = get_db()
-
-    if not tag_ids:
-        # Export everything (explicit decision)
-        rows = con.execute(
-            "SELECT url FROM content ORDER BY created_at"
-        ).fetchall()
-    else:
-        placeholders = ",".join("?" * len(tag_ids))
-
-        rows = con.execute(
-            f"""
-            SELECT DISTINCT c.url
-            FROM content c
-            JOIN content_tag ct ON ct.content_id = c.id
-            WHERE ct.tag_id IN ({placeholders})
-            GROUP BY c.id
-            HAVING COUNT(DISTINCT ct.tag_id) = ?
-            ORDER BY c.created_at
-            """,
-            (*tag_ids, len(tag_ids)),
-        ).fetchall()
-
-    urls = [r[0] for r in rows]
-
-    if fmt == "json":
-        return {"urls": urls}
-
-    if fmt == "csv":
-        return {
-            "content": "url\n" + "\n".join(urls),
-            "content_type": "text/csv",
-        }
+    try:
+        media_type, filename = export_format(fmt)
+        sql, params = export_query(
+            payload.get("tag_ids", []),
+            payload.get("filter"),
+            con=con,
+        )
+    except (ExportError, FilterError) as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
-    # default: txt
-    return {
-        "content": "\n".join(urls),
-        "content_type": "text/plain",
-    }
+    return StreamingResponse(
+        stream_export(sql, params, fmt),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 @router.post("/delete")
-def delete_content_bulk(payload: dict):
+def delete_content_bulk(payload: dict, con=Depends(get_request_db)):
     content_ids = payload.get("content_ids", [])
 
     if not content_ids:
         raise HTTPException(status_code=400, detail="No content IDs provided")
 
-    con = get_db()
-
     placeholders = ",".join("?" * len(content_ids))
 
-    res = con.execute(
+    # DuckDB reports the updated row count as the result (rowcount is -1)
+    (deleted,) = con.execute(
         f"""
         UPDATE content
         SET status = 'deleted'
         WHERE id IN ({placeholders})
         """,
         content_ids,
-    )
+    ).fetchone()
+
+    dequeue_content(con, content_ids)
+    snapshot_worker.mark_dirty(deleted)
 
     return {
         "status": "ok",
-        "deleted": res.rowcount,
+        "deleted": deleted,
     }
 
 @router.post("/expand")
@@ -1,21 +1,32 @@
-from fastapi import APIRouter
-from app.db import get_db
+from fastapi import APIRouter, Depends, HTTPException
+from app.db import get_request_db, database
 from app.services.content_snapshot import get_content_snapshot
 from app.services.content_snapshot import list_content_snapshots
+from app.services.preview_worker import preview_worker
+from app.services.http_client import http_client
+from app.services.preview_cache import preview_cache
+from app.services.content_preview import preview_fetch_stats
+from app.services.tag_usage import tag_usage
+from app.services.content_group_count import rebuild_group_counts
+from app.services.tag_group_model import tag_group_model
+from app.services.content_queue import queue_status, rebuild_queue
+from app.services.content_filter import explain_filter, FilterError
+from app.services.tag_bitmap import tag_bitmaps
+from app.services.snapshot_worker import snapshot_worker
+from app.services.drive_sync import drive_sync
+from app.db.backup import list_backups, store_stats
 
 router = APIRouter(prefix="/debug", tags=["debug"])
 
 @router.get("/content")
-def list_content():
-    return list_content_snapshots()
+def list_content(con=Depends(get_request_db)):
+    return list_content_snapshots(con=con)
     # con = get_db()
     # rows = con.execute("SELECT * FROM content").fetchall()
     # return rows
 
 @router.get("/content/count")
-def get_content_count():
-    con = get_db()
-
+def get_content_count(con=Depends(get_request_db)):
     # Total count
     total = con.execute(
         "SELECT COUNT(*) FROM content"
@@ -41,9 +52,7 @@ def get_content_count():
     }
 
 @router.get("/content/recent")
-def get_recent_content(limit: int = 5):
-    con = get_db()
-
+def get_recent_content(limit: int = 5, con=Depends(get_request_db)):
     rows = con.execute(
         """
         SELECT id
@@ -57,7 +66,7 @@ def get_recent_content(limit: int = 5):
     snapshots = []
 
     for (content_id,) in rows:
-        snapshot = get_content_snapshot(content_id)
+        snapshot = get_content_snapshot(content_id, con=con)
         if snapshot:
             snapshots.append(snapshot)
 
@@ -65,3 +74,178 @@ def get_recent_content(limit: int = 5):
         "count": len(snapshots),
         "items": snapshots,
     }
+
+@router.get("/db")
+def get_db_stats():
+    """
+    Shared connection / cursor pool counters.
+    """
+    return {
+        "path": database.path,
+        "pool_size": database.pool_size,
+        **database.stats,
+    }
+
+@router.get("/previews")
+def get_preview_queue(con=Depends(get_request_db)):
+    """
+    Preview worker queue depth + counters, page fetch sizes / parse times.
+    """
+    return {
+        **preview_worker.queue_status(con=con),
+        "fetch": preview_fetch_stats(),
+    }
+
+@router.get("/http")
+def get_http_stats():
+    """
+    Outbound HTTP client pool settings + connection reuse counters.
+    """
+    return {
+        "pool_hosts": http_client.pool_hosts,
+        "pool_per_host": http_client.pool_per_host,
+        "timeout": http_client.timeout,
+        "retries": http_client.retries,
+        **http_client.stats,
+    }
+
+@router.get("/preview-cache")
+def get_preview_cache(con=Depends(get_request_db)):
+    """
+    Preview cache size + hit / miss counters.
+    """
+    return preview_cache.status(con=con)
+
+@router.delete("/preview-cache")
+def purge_preview_cache(host: str, con=Depends(get_request_db)):
+    """
+    Drop cached previews (incl. failures) for a host and its subdomains.
+    """
+    try:
+        purged = preview_cache.purge_host(host, con=con)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    return {"host": host, "purged": purged}
+
+@router.get("/tag-usage")
+def get_tag_usage():
+    """
+    Write-behind usage counter: pending deltas + flush / reconcile counters.
+    """
+    return tag_usage.status()
+
+@router.post("/tag-usage/reconcile")
+def reconcile_tag_usage(con=Depends(get_request_db)):
+    """
+    Flush pending deltas, then recompute usage_count from content_tag.
+    """
+    corrected = tag_usage.reconcile(con=con)
+    return {"corrected": corrected, **tag_usage.status()}
+
+@router.post("/content-group-count/rebuild")
+def rebuild_content_group_count(con=Depends(get_request_db)):
+    """
+    Recompute the per-(content, group) tag counts from content_tag.
+    """
+    return {"rows": rebuild_group_counts(con=con)}
+
+@router.get("/tag-group-model")
+def get_tag_group_model(con=Depends(get_request_db)):
+    """
+    Cached tag group model: version, groups, mapped tags.
+    """
+    model = tag_group_model.get(con)
+    return {
+        "version": model.version,
+        "groups": [g["id"] for g in model.groups],
+        "tags": len(model.tag_groups),
+    }
+
+@router.get("/queue")
+def get_content_queue(con=Depends(get_request_db)):
+    """
+    Work queue: open items, live leases, taggers holding them.
+    """
+    return queue_status(con=con)
+
+@router.post("/queue/rebuild")
+def rebuild_content_queue(con=Depends(get_request_db)):
+    """
+    Recompute the work queue from content.status (drops all leases).
+    """
+    return {"open": rebuild_queue(con=con)}
+
+@router.get("/content-filter")
+def get_content_filter_plan(q: str, con=Depends(get_request_db)):
+    """
+    Compiled SQL + estimated matches for a filter expression.
+    """
+    try:
+        return explain_filter(q, con=con)
+    except FilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.get("/tag-bitmaps")
+def get_tag_bitmaps(limit: int = 50):
+    """
+    Tag bitmap index size: totals + the `limit` largest postings.
+    """
+    stats = tag_bitmaps.stats()
+    stats["by_tag"] = stats["by_tag"][:limit]
+    return stats
+
+@router.get("/tag-bitmaps/verify")
+def verify_tag_bitmaps(con=Depends(get_request_db)):
+    """
+    Compare the tag bitmap index with content_tag.
+    """
+    return tag_bitmaps.verify(con=con)
+
+@router.post("/tag-bitmaps/rebuild")
+def rebuild_tag_bitmaps(con=Depends(get_request_db)):
+    """
+    Reload the tag bitmap index from content_tag.
+    """
+    tag_bitmaps.load(con=con)
+    stats = tag_bitmaps.stats()
+    return {key: stats[key] for key in ("content", "tags", "bitmaps", "bytes")}
+
+@router.get("/snapshot")
+def get_snapshot_status():
+    """
+    Snapshot worker: pending changes, next due, last snapshot size and duration.
+    """
+    return snapshot_worker.status()
+
+@router.post("/snapshot")
+def request_snapshot():
+    """
+    Snapshot now, regardless of the debounce window (written in the
+    background).
+    """
+    snapshot_worker.flush()
+    return snapshot_worker.status()
+
+@router.get("/drive-sync")
+def get_drive_sync(limit: int = 20, con=Depends(get_request_db)):
+    """
+    Drive sync queue: queued job, totals + the `limit` latest upload
+    attempts (duration, bytes, error).
+    """
+    return {
+        **drive_sync.status(con=con),
+        "history": drive_sync.history(limit, con=con),
+    }
+
+@router.get("/backups")
+def get_backups():
+    """
+    Chunked backups kept locally (newest first) + chunk store size.
+    """
+    backups = list_backups()
+    return {
+        "count": len(backups),
+        "store": store_stats(),
+        "backups": backups,
+    }
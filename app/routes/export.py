@@ -1,15 +1,27 @@
-from fastapi import APIRouter
-from app.db import get_db
+from fastapi import APIRouter, Depends, HTTPException
+from app.db import get_request_db
+from app.services.content_filter import compile_filter, parse_filter, FilterError
 from pathlib import Path
 
 router = APIRouter(prefix="/export", tags=["export"])
 
 @router.post("/parquet")
-def export_parquet():
+def export_parquet(payload: dict | None = None, con=Depends(get_request_db)):
+    """
+    Export content (+ tag labels) to Parquet; optionally only items
+    matching `filter` (a filter expression).
+    """
+    try:
+        where, params = compile_filter(
+            parse_filter((payload or {}).get("filter"), con),
+            con,
+        )
+    except FilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
     out = Path("data/exports/content.parquet")
     out.parent.mkdir(parents=True, exist_ok=True)
 
-    con = get_db()
     con.execute(f"""
     COPY (
         SELECT
@@ -18,10 +30,11 @@ def export_parquet():
         FROM content c
         LEFT JOIN content_tag ct ON c.id = ct.content_id
         LEFT JOIN tag t ON ct.tag_id = t.id
+        WHERE {where}
         GROUP BY ALL
     )
     TO '{out}'
     (FORMAT PARQUET);
-    """)
+    """, params)
 
     return {"exported_to": str(out)}
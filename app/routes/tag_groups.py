@@ -1,9 +1,11 @@
-from fastapi import APIRouter, UploadFile
+from fastapi import APIRouter, Depends, UploadFile
 from pathlib import Path
 import tempfile
 
-from app.db import get_db
+from app.db import get_request_db
 from app.services.taggroups import parse_taggroups
+from app.services.tag_group_model import tag_group_model
+from app.services.snapshot_worker import snapshot_worker
 
 router = APIRouter(
     prefix="/tag-groups",
@@ -12,7 +14,7 @@ router = APIRouter(
 
 
 @router.post("/import")
-def import_tag_groups(file: UploadFile):
+def import_tag_groups(file: UploadFile, con=Depends(get_request_db)):
     """
     Import tag group definitions from a .taggroups file.
     """
@@ -23,8 +25,6 @@ def import_tag_groups(file: UploadFile):
 
     groups = parse_taggroups(tmp_path)
 
-    con = get_db()
-
     for g in groups:
         con.execute(
             """
@@ -42,48 +42,23 @@ def import_tag_groups(file: UploadFile):
             ),
         )
 
+    tag_group_model.invalidate()
+    snapshot_worker.mark_dirty(len(groups))
+
     return {
         "imported": len(groups),
         "groups": [g["id"] for g in groups],
     }
 
 @router.get("/")
-def list_tag_groups():
+def list_tag_groups(con=Depends(get_request_db)):
     """
     List all tag groups in display order.
     """
-    con = get_db()
-
-    rows = con.execute(
-        """
-        SELECT
-            id,
-            description,
-            required,
-            min_count,
-            max_count,
-            position
-        FROM tag_group
-        ORDER BY position
-        """
-    ).fetchall()
-
-    return [
-        {
-            "id": r[0],
-            "description": r[1],
-            "required": r[2],
-            "min": r[3],
-            "max": r[4],
-            "position": r[5],
-        }
-        for r in rows
-    ]
+    return [dict(g) for g in tag_group_model.get(con).groups]
 
 @router.get("/with-tags")
-def list_tag_groups_with_tags():
-    con = get_db()
-
+def list_tag_groups_with_tags(con=Depends(get_request_db)):
     rows = con.execute(
         """
         SELECT
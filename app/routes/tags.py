@@ -1,10 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from datetime import datetime
 
-from app.db import get_db
-from app.schemas import TagCreate, AssignTags, EnsureTagRequest
+from app.db import get_request_db
+from app.schemas import TagCreate, AssignTags, AssignTagsBatch, EnsureTagRequest
 from app.services.tag_search import search_tags
 from app.services.tag_ensure import ensure_tag
+from app.services.tag_index import tag_index
+from app.services.tag_group_model import tag_group_model
+from app.services.tag_usage import tag_usage
+from app.services.tag_bitmap import tag_bitmaps
+from app.services.snapshot_worker import snapshot_worker
+from app.services.content_filter import tag_facets, FilterError
+from app.services.content_group_count import apply_group_counts_for
+from app.services.tag_batch import assign_tags_batch, unassign_tags_batch
 from app.services.tag_validation import (
     validate_tag_assignment_delta,
     TagValidationError,
@@ -14,9 +22,7 @@ router = APIRouter(prefix="/tags", tags=["tags"])
 
 
 @router.post("/")
-def create_tag(payload: TagCreate):
-    con = get_db()
-
+def create_tag(payload: TagCreate, con=Depends(get_request_db)):
     con.execute(
         """
         INSERT OR IGNORE INTO tag (
@@ -37,16 +43,18 @@ def create_tag(payload: TagCreate):
         ),
     )
 
+    tag_index.add(payload.id, payload.label, payload.group_id, con=con)
+    tag_group_model.add_tag(payload.id, payload.group_id)
+    snapshot_worker.mark_dirty()
+
     return {"status": "ok", "tag_id": payload.id}
 
 @router.post("/assign")
-def assign_tags(payload: AssignTags):
+def assign_tags(payload: AssignTags, con=Depends(get_request_db)):
     """
     Assign one or more tags to a content item.
     Enforces tag group constraints incrementally (e.g. max limits).
     """
-    con = get_db()
-
     # -------------------------------
     # 1. Validate group constraints (incremental)
     # -------------------------------
@@ -54,6 +62,7 @@ def assign_tags(payload: AssignTags):
         validate_tag_assignment_delta(
             content_id=payload.content_id,
             tag_ids=payload.tag_ids,
+            con=con,
         )
     except TagValidationError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -62,6 +71,7 @@ def assign_tags(payload: AssignTags):
     # 2. Assign tags (transactional)
     # -------------------------------
     now = datetime.utcnow()
+    assigned = []
 
     try:
         con.execute("BEGIN")
@@ -77,15 +87,9 @@ def assign_tags(payload: AssignTags):
             ).fetchall()
 
             if rows:
-                con.execute(
-                    """
-                    UPDATE tag
-                    SET usage_count = usage_count + 1,
-                        last_used = ?
-                    WHERE id = ?
-                    """,
-                    (now, tag_id),
-                )
+                assigned.append(tag_id)
+
+        apply_group_counts_for(con, payload.content_id, assigned, +1)
 
         con.execute("COMMIT")
 
@@ -96,6 +100,11 @@ def assign_tags(payload: AssignTags):
             detail=f"Failed to assign tags: {e}",
         )
 
+    # usage_count / last_used are written behind (tag_usage)
+    tag_usage.record({tag_id: 1 for tag_id in assigned}, now)
+    tag_bitmaps.assign((payload.content_id, tag_id) for tag_id in assigned)
+    snapshot_worker.mark_dirty(len(assigned))
+
     return {
         "status": "ok",
         "content_id": payload.content_id,
@@ -103,29 +112,26 @@ def assign_tags(payload: AssignTags):
     }
 
 @router.post("/unassign")
-def unassign_tags(payload: AssignTags):
-    con = get_db()
+def unassign_tags(payload: AssignTags, con=Depends(get_request_db)):
+    removed = []
 
     try:
         con.execute("BEGIN")
 
         for tag_id in payload.tag_ids:
-            con.execute(
+            rows = con.execute(
                 """
                 DELETE FROM content_tag
                 WHERE content_id = ? AND tag_id = ?
+                RETURNING tag_id
                 """,
                 (payload.content_id, tag_id),
-            )
+            ).fetchall()
 
-            con.execute(
-                """
-                UPDATE tag
-                SET usage_count = GREATEST(usage_count - 1, 0)
-                WHERE id = ?
-                """,
-                (tag_id,),
-            )
+            if rows:
+                removed.append(tag_id)
+
+        apply_group_counts_for(con, payload.content_id, removed, -1)
 
         con.execute("COMMIT")
 
@@ -136,6 +142,10 @@ def unassign_tags(payload: AssignTags):
             detail=f"Failed to unassign tags: {e}",
         )
 
+    tag_usage.record({tag_id: -1 for tag_id in removed})
+    tag_bitmaps.unassign((payload.content_id, tag_id) for tag_id in removed)
+    snapshot_worker.mark_dirty(len(removed))
+
     return {
         "status": "ok",
         "content_id": payload.content_id,
@@ -143,34 +153,92 @@ def unassign_tags(payload: AssignTags):
     }
 
 
+@router.post("/assign/batch")
+def assign_tags_batch_endpoint(payload: AssignTagsBatch, con=Depends(get_request_db)):
+    """
+    Assign a tag set to many content items in one transaction.
+    All items are validated against group max limits first; any
+    violation rejects the whole batch.
+    """
+    try:
+        result = assign_tags_batch(
+            content_ids=payload.content_ids,
+            tag_ids=payload.tag_ids,
+            con=con,
+        )
+    except TagValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    snapshot_worker.mark_dirty(result["assigned"])
+
+    return {"status": "ok", **result}
+
+
+@router.post("/unassign/batch")
+def unassign_tags_batch_endpoint(payload: AssignTagsBatch, con=Depends(get_request_db)):
+    """
+    Remove a tag set from many content items in one transaction.
+    """
+    result = unassign_tags_batch(
+        content_ids=payload.content_ids,
+        tag_ids=payload.tag_ids,
+        con=con,
+    )
+
+    snapshot_worker.mark_dirty(result["removed"])
+
+    return {"status": "ok", **result}
+
+
 @router.get("/search")
 def search_tags_endpoint(
     group: str = Query(..., description="Tag group id"),
     q: str | None = Query(None, description="Search query"),
+    con=Depends(get_request_db),
 ):
     """
     Group-aware tag autocomplete.
     """
-    return search_tags(group_id=group, query=q)
+    return search_tags(group_id=group, query=q, con=con)
+
+
+@router.get("/facets")
+def get_tag_facets(
+    tag_ids: list[str] | None = Query(None, description="Selected tags (ALL)"),
+    q: str | None = Query(None, description="Tag filter expression"),
+    group: str | None = Query(None, description="Only count this group's tags"),
+    con=Depends(get_request_db),
+):
+    """
+    Items in the current tag selection + per-tag counts within it
+    (TagFilterBar), answered from the tag bitmap index.
+    """
+    try:
+        return tag_facets(tag_ids, q, group, con=con)
+    except FilterError as e:
+        raise HTTPException(status_code=400, detail=str(e))
 
 
 @router.post("/ensure")
-def ensure_tag_endpoint(payload: EnsureTagRequest):
+def ensure_tag_endpoint(payload: EnsureTagRequest, con=Depends(get_request_db)):
     """
     Create a tag if it doesn't exist, otherwise return existing.
     """
-    return ensure_tag(
+    result = ensure_tag(
         group_id=payload.group_id,
         label=payload.label,
+        con=con,
     )
 
+    snapshot_worker.mark_dirty()
+
+    return result
+
 @router.get("/{group_id}")
-def get_tags_by_group(group_id: str):
+def get_tags_by_group(group_id: str, con=Depends(get_request_db)):
     """
     Debug endpoint: list all tags in a given group.
     """
-    con = get_db()
-
     rows = con.execute(
         """
         SELECT
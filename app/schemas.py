@@ -6,6 +6,22 @@ class AssignTags(BaseModel):
     content_id: str
     tag_ids: List[str]
 
+class AssignTagsBatch(BaseModel):
+    content_ids: List[str]
+    tag_ids: List[str]
+
+class ContentIdsBatch(BaseModel):
+    content_ids: List[str]
+
+class ClaimContent(BaseModel):
+    tagger: str
+    count: int = 1
+    lease_seconds: Optional[int] = None
+
+class ReleaseContent(BaseModel):
+    tagger: str
+    content_ids: List[str]
+
 class ContentCreate(BaseModel):
     url: str
     source_url: Optional[str] = None
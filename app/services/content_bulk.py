@@ -0,0 +1,251 @@
+import json
+from datetime import datetime
+from uuid import uuid4
+
+import duckdb
+
+from app.db import get_db
+from app.services.content_group_count import apply_group_counts
+from app.services.content_queue import enqueue_content
+from app.services.content_preview import direct_preview, preview_from_payload
+from app.services.tag_bitmap import tag_bitmaps
+from app.services.tag_usage import tag_usage
+
+# Attempts when a concurrent request inserts one of our URLs between
+# the duplicate check and the insert (unique violation → redo).
+MAX_BULK_ATTEMPTS = 3
+
+BATCH_SCHEMA = json.dumps([{
+    "id": "VARCHAR",
+    "url": "VARCHAR",
+    "source_url": "VARCHAR",
+    "tag_ids": ["VARCHAR"],
+    "preview_type": "VARCHAR",
+    "preview_url": "VARCHAR",
+    "preview_url_normalized": "VARCHAR",
+    "title": "VARCHAR",
+    "description": "VARCHAR",
+    "preview_status": "VARCHAR",
+    "ord": "INTEGER",
+}])
+
+
+class BulkContentError(Exception):
+    pass
+
+
+def bulk_create_content(items: list[dict], con=None) -> dict:
+    """
+    Insert many content items (+ tag relations + previews) set-based.
+
+    Items may carry the preview fields returned by /content/expand
+    (preview_type, preview_url, ...); when they validate, the preview
+    is stored as-is instead of being fetched again.
+
+    The payload is loaded as ONE columnar batch (a JSON array parsed by
+    DuckDB) into a temp table, duplicates are found with an anti-join
+    on content.url (idx_content_url), and content / content_tag /
+    content_preview / content_group_count / content_queue are each
+    filled by a single INSERT ... SELECT, all inside one transaction.
+
+    Returns {"created": [content_id, ...], "skipped_urls": [url, ...]}
+    with skipped URLs in payload order (duplicates inside the payload
+    count as skipped too).
+    """
+    if con is None:
+        con = get_db()
+
+    rows = []
+    seen = set()
+
+    for item in items:
+        url = item.get("url")
+        if not url:
+            raise BulkContentError("Every item needs a url")
+
+        if url in seen:
+            continue
+        seen.add(url)
+
+        # Preview already resolved by /content/expand, or a direct
+        # image/video URL → known now; anything else is left
+        # 'pending' for the preview worker.
+        preview = (
+            preview_from_payload(item)
+            or direct_preview(url)
+            or {}
+        )
+
+        rows.append({
+            "id": str(uuid4()),
+            "url": url,
+            "source_url": item.get("source_url") or url,
+            "tag_ids": list(dict.fromkeys(item.get("tag_ids") or [])),
+            "preview_type": preview.get("preview_type"),
+            "preview_url": preview.get("preview_url"),
+            "preview_url_normalized": preview.get("preview_url_normalized"),
+            "title": preview.get("title"),
+            "description": preview.get("description"),
+            "preview_status": "ready" if preview else "pending",
+            "ord": len(rows),
+        })
+
+    if not rows:
+        return {"created": [], "skipped_urls": []}
+
+    # One string parameter binds in O(1) calls; DuckDB parses it into
+    # the columnar batch (binding Python lists value-by-value is slow).
+    batch = json.dumps(rows)
+
+    for attempt in range(MAX_BULK_ATTEMPTS):
+        try:
+            created, existing, usage = _insert_batch(con, batch)
+            break
+        except duckdb.ConstraintException:
+            if attempt == MAX_BULK_ATTEMPTS - 1:
+                raise
+
+    tag_usage.record(usage, datetime.utcnow())
+
+    tag_ids = {row["id"]: row["tag_ids"] for row in rows}
+    tag_bitmaps.add_content(created)
+    tag_bitmaps.assign(
+        (content_id, tag_id)
+        for content_id in created
+        for tag_id in tag_ids[content_id]
+    )
+
+    # Skipped in payload order (in-payload repeats count as skipped)
+    skipped = []
+    seen = set()
+
+    for item in items:
+        url = item["url"]
+        if url in existing or url in seen:
+            skipped.append(url)
+        seen.add(url)
+
+    return {"created": created, "skipped_urls": skipped}
+
+
+def _insert_batch(con, batch: str) -> tuple[list[str], set[str], dict[str, int]]:
+    con.execute("BEGIN")
+
+    try:
+        con.execute(
+            f"""
+            CREATE OR REPLACE TEMP TABLE _bulk_items AS
+            SELECT unnest(from_json(?, '{BATCH_SCHEMA}'), recursive := true)
+            """,
+            (batch,),
+        )
+
+        # Anti-join against existing content (idx_content_url)
+        con.execute(
+            """
+            CREATE OR REPLACE TEMP TABLE _bulk_new AS
+            SELECT b.*
+            FROM _bulk_items b
+            ANTI JOIN content c ON c.url = b.url
+            """
+        )
+
+        existing = {
+            r[0]
+            for r in con.execute(
+                """
+                SELECT b.url
+                FROM _bulk_items b
+                SEMI JOIN content c ON c.url = b.url
+                """
+            ).fetchall()
+        }
+
+        # Distinct, increasing timestamps keep payload order in listings
+        con.execute(
+            """
+            INSERT INTO content (id, url, source_url, created_at, status)
+            SELECT
+                id,
+                url,
+                source_url,
+                CURRENT_TIMESTAMP + to_microseconds(ord),
+                'draft'
+            FROM _bulk_new
+            ORDER BY ord
+            """
+        )
+
+        enqueue_content(con, "SELECT id FROM _bulk_new")
+
+        con.execute(
+            """
+            INSERT OR IGNORE INTO content_tag (content_id, tag_id)
+            SELECT id, unnest(tag_ids)
+            FROM _bulk_new
+            """
+        )
+
+        # New items → every listed (known) tag was inserted
+        apply_group_counts(
+            con,
+            "(SELECT id AS content_id, unnest(tag_ids) AS tag_id FROM _bulk_new)",
+        )
+
+        usage = dict(
+            con.execute(
+                """
+                SELECT t.id, COUNT(*)
+                FROM (SELECT id, unnest(tag_ids) AS tag_id FROM _bulk_new) n
+                JOIN tag t ON t.id = n.tag_id
+                GROUP BY t.id
+                """
+            ).fetchall()
+        )
+
+        con.execute(
+            """
+            INSERT INTO content_preview (
+                content_id,
+                preview_type,
+                preview_url,
+                preview_url_normalized,
+                title,
+                description,
+                preview_status,
+                fetched_at,
+                attempts
+            )
+            SELECT
+                id,
+                preview_type,
+                preview_url,
+                preview_url_normalized,
+                title,
+                description,
+                preview_status,
+                CASE WHEN preview_status = 'ready' THEN ?::TIMESTAMP END,
+                0
+            FROM _bulk_new
+            """,
+            (datetime.utcnow(),),
+        )
+
+        created = [
+            r[0]
+            for r in con.execute(
+                "SELECT id FROM _bulk_new ORDER BY ord"
+            ).fetchall()
+        ]
+
+        con.execute("COMMIT")
+
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    finally:
+        con.execute("DROP TABLE IF EXISTS _bulk_items")
+        con.execute("DROP TABLE IF EXISTS _bulk_new")
+
+    return created, existing, usage
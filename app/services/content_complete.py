@@ -0,0 +1,53 @@
+import json
+
+from app.db import get_db
+from app.services.content_queue import dequeue_content
+from app.services.tag_validation import validate_content_completeness_batch
+
+
+def complete_content_batch(content_ids: list[str], con=None) -> dict:
+    """
+    Mark every item that satisfies all tag group min_count constraints
+    as 'complete'.
+
+    One grouped validation query for all items, then ONE UPDATE for the
+    passing ones (which also leave the work queue); failing items are
+    returned with their violations and left unchanged.
+    """
+    if con is None:
+        con = get_db()
+
+    result = validate_content_completeness_batch(content_ids, con=con)
+
+    passed = [cid for cid, violations in result["items"].items() if not violations]
+
+    if passed:
+        con.execute("BEGIN")
+
+        try:
+            con.execute(
+                """
+                UPDATE content
+                SET status = 'complete'
+                WHERE id IN (SELECT unnest(from_json(?, '["VARCHAR"]')))
+                """,
+                (json.dumps(passed),),
+            )
+
+            dequeue_content(con, passed)
+
+            con.execute("COMMIT")
+
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+    return {
+        "completed": passed,
+        "failed": [
+            {"content_id": cid, "violations": violations}
+            for cid, violations in result["items"].items()
+            if violations
+        ],
+        "not_found": result["not_found"],
+    }
@@ -1,12 +1,16 @@
 # app/services/content_expand.py
 
-import requests
 from urllib.parse import urljoin, urlparse
 from bs4 import BeautifulSoup
 import json
+import os
 import re
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
-from app.services.content_preview import extract_preview_from_url
+from app.services.content_preview import direct_preview, extract_preview_from_url
+from app.services.http_client import http_client
 import logging
 
 logger = logging.getLogger("content_expand")
@@ -20,6 +24,15 @@ HEADERS = {
 
 IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif")
 
+# Provider API roots (overridable for local fixtures / benchmarks)
+IMGUR_BASE = "https://imgur.com"
+ARTSTATION_BASE = "https://www.artstation.com"
+
+# expand_urls() concurrency
+EXPAND_WORKERS = int(os.getenv("EXPAND_WORKERS", "8"))
+EXPAND_PER_HOST = int(os.getenv("EXPAND_PER_HOST", "4"))
+EXPAND_DEADLINE = float(os.getenv("EXPAND_DEADLINE", "60"))
+
 # --------------------------------------------------
 # Provider stubs (safe placeholders)
 # --------------------------------------------------
@@ -81,12 +94,11 @@ def expand_imgur(url: str) -> list[str]:
     # --------------------------------------------------
     # 1️⃣ Gallery JSON (most reliable)
     # --------------------------------------------------
-    gallery_url = f"https://imgur.com/gallery/{imgur_id}.json"
+    gallery_url = f"{IMGUR_BASE}/gallery/{imgur_id}.json"
     try:
-        res = requests.get(
+        res = http_client.get(
             gallery_url,
             headers={**HEADERS, "Accept": "application/json"},
-            timeout=10,
         )
 
         if res.ok:
@@ -107,12 +119,11 @@ def expand_imgur(url: str) -> list[str]:
     # --------------------------------------------------
     # 2️⃣ Single image JSON fallback
     # --------------------------------------------------
-    image_url = f"https://imgur.com/image/{imgur_id}.json"
+    image_url = f"{IMGUR_BASE}/image/{imgur_id}.json"
     try:
-        res = requests.get(
+        res = http_client.get(
             image_url,
             headers={**HEADERS, "Accept": "application/json"},
-            timeout=10,
         )
 
         if res.ok:
@@ -159,12 +170,11 @@ def expand_artstation(url: str) -> list[str]:
     # 1) JSON endpoint (preferred)
     # --------------------------------------------------
     if proj_id:
-        api_url = f"https://www.artstation.com/projects/{proj_id}.json"
+        api_url = f"{ARTSTATION_BASE}/projects/{proj_id}.json"
         try:
-            res = requests.get(
+            res = http_client.get(
                 api_url,
                 headers={**HEADERS, "Accept": "application/json"},
-                timeout=10,
             )
 
             logger.info("[ArtStation] JSON status:", res.status_code)
@@ -273,7 +283,7 @@ def is_image_url(url: str) -> bool:
 
 def fetch_html(url: str) -> str | None:
     try:
-        res = requests.get(url, headers=HEADERS, timeout=8)
+        res = http_client.get(url, headers=HEADERS)
         if not res.ok or "text/html" not in res.headers.get("Content-Type", ""):
             return None
         return res.text
@@ -333,37 +343,110 @@ def expand_generic(url: str) -> list[str]:
     return extract_images_from_html(html, url)
 
 
+# --------------------------------------------------
+# Bounded concurrency
+# --------------------------------------------------
+
+def _host(url: str) -> str:
+    return urlparse(url).netloc.lower()
+
+
+def map_bounded(fn, args: list, *, workers: int, per_host: int, deadline_at: float) -> list:
+    """
+    Run fn(arg) for every arg (a URL) on a thread pool.
+
+    - at most `workers` calls in flight
+    - at most `per_host` calls in flight per URL host
+    - stops waiting at `deadline_at` (time.monotonic())
+
+    Returns one entry per arg, in input order:
+      (True, result) | (False, exception) | None (deadline hit)
+    """
+    results = [None] * len(args)
+    queues: dict[str, deque] = {}
+
+    for i, arg in enumerate(args):
+        queues.setdefault(_host(arg), deque()).append(i)
+
+    in_flight = Counter()
+    running = {}
+
+    pool = ThreadPoolExecutor(max_workers=max(1, workers))
+    try:
+        while True:
+            for host, queue in queues.items():
+                while (
+                    queue
+                    and in_flight[host] < per_host
+                    and len(running) < workers
+                ):
+                    i = queue.popleft()
+                    running[pool.submit(fn, args[i])] = (i, host)
+                    in_flight[host] += 1
+
+            if not running:
+                break
+
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                break
+
+            done, _ = wait(running, timeout=remaining, return_when=FIRST_COMPLETED)
+            if not done:
+                break
+
+            for future in done:
+                i, host = running.pop(future)
+                in_flight[host] -= 1
+
+                try:
+                    results[i] = (True, future.result())
+                except Exception as e:
+                    results[i] = (False, e)
+    finally:
+        # Don't block the response on stragglers; their own HTTP
+        # timeouts bound how long they keep running.
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return results
+
+
 # --------------------------------------------------
 # Core expansion logic
 # --------------------------------------------------
 
-def expand_url(url: str) -> dict:
+def expand_media_urls(url: str) -> list[str]:
     handler = get_provider_handler(url)
 
     # 1️⃣ Provider-specific expansion
     if handler:
-        media_urls = handler(url)
-    else:
-        media_urls = expand_generic(url)
+        return handler(url)
+
+    return expand_generic(url)
 
-    if not media_urls:
-        return {
+
+def _item(media_url: str, source_url: str, preview: dict | None) -> dict:
+    preview = preview or {}
+
+    return {
+        "url": media_url,
+        "preview_type": preview.get("preview_type", "unknown"),
+        "preview_url": preview.get("preview_url"),
+        "preview_url_normalized": preview.get("preview_url_normalized"),
+        "source_url": source_url,
+    }
+
+
+def _result(url: str, items: list[dict], error: str | None = None) -> dict:
+    if not items:
+        result = {
             "input_url": url,
             "type": "unknown",
             "items": [],
         }
-
-    items = []
-    for media_url in media_urls:
-        preview = extract_preview_from_url(media_url)
-
-        items.append({
-            "url": media_url,
-            "preview_type": preview["preview_type"],
-            "preview_url": preview["preview_url"],
-            "preview_url_normalized": preview["preview_url_normalized"],
-            "source_url": url,
-        })
+        if error:
+            result["error"] = error
+        return result
 
     return {
         "input_url": url,
@@ -372,5 +455,90 @@ def expand_url(url: str) -> dict:
     }
 
 
-def expand_urls(urls: list[str]) -> list[dict]:
-    return [expand_url(url) for url in urls]
+def expand_url(url: str) -> dict:
+    """
+    Expand ONE URL sequentially (provider → previews one by one).
+    """
+    media_urls = expand_media_urls(url)
+
+    items = [
+        _item(media_url, url, extract_preview_from_url(media_url))
+        for media_url in media_urls
+    ]
+
+    return _result(url, items)
+
+
+def expand_urls(
+    urls: list[str],
+    workers: int = EXPAND_WORKERS,
+    per_host: int = EXPAND_PER_HOST,
+    deadline: float = EXPAND_DEADLINE,
+) -> list[dict]:
+    """
+    Expand many URLs concurrently; results keep the input order.
+
+    Two bounded phases share one overall deadline:
+      1. provider / generic expansion of every input URL
+      2. preview resolution of every media item that needs a fetch
+         (direct image/video URLs are resolved inline)
+
+    Work that misses the deadline (or fails) degrades to an empty
+    expansion / 'unknown' preview instead of failing the request.
+    """
+    deadline_at = time.monotonic() + deadline
+
+    # 1️⃣ Expand inputs
+    expanded = map_bounded(
+        expand_media_urls,
+        urls,
+        workers=workers,
+        per_host=per_host,
+        deadline_at=deadline_at,
+    )
+
+    media: list[list[str]] = []
+    errors: list[str | None] = []
+
+    for outcome in expanded:
+        if outcome is None:
+            media.append([])
+            errors.append("timeout")
+        elif not outcome[0]:
+            media.append([])
+            errors.append(str(outcome[1]) or type(outcome[1]).__name__)
+        else:
+            media.append(outcome[1] or [])
+            errors.append(None)
+
+    # 2️⃣ Previews (only for media that need the network)
+    previews: dict[str, dict | None] = {}
+    to_fetch = []
+
+    for media_urls in media:
+        for media_url in media_urls:
+            if media_url in previews:
+                continue
+            previews[media_url] = direct_preview(media_url)
+            if previews[media_url] is None:
+                to_fetch.append(media_url)
+
+    fetched = map_bounded(
+        extract_preview_from_url,
+        to_fetch,
+        workers=workers,
+        per_host=per_host,
+        deadline_at=deadline_at,
+    )
+
+    for media_url, outcome in zip(to_fetch, fetched):
+        previews[media_url] = outcome[1] if outcome and outcome[0] else None
+
+    return [
+        _result(
+            url,
+            [_item(m, url, previews[m]) for m in media_urls],
+            error,
+        )
+        for url, media_urls, error in zip(urls, media, errors)
+    ]
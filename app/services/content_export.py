@@ -0,0 +1,92 @@
+import os
+
+from app.db import database
+from app.services.content_filter import all_of, compile_filter, has_tags, parse_filter
+
+# Rows fetched from DuckDB (and written to the response) per batch
+EXPORT_BATCH_SIZE = int(os.getenv("EXPORT_BATCH_SIZE", "10000"))
+
+EXPORT_FORMATS = {
+    # format → (media type, file extension)
+    "txt": ("text/plain; charset=utf-8", "txt"),
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "json": ("application/x-ndjson", "ndjson"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+# One output line per exported `url`
+LINE_SQL = {
+    "txt": "url",
+    "csv": """
+        CASE
+            WHEN regexp_matches(url, '[",\\r\\n]')
+            THEN '"' || replace(url, '"', '""') || '"'
+            ELSE url
+        END
+    """,
+    "json": "to_json({'url': url})::VARCHAR",
+    "ndjson": "to_json({'url': url})::VARCHAR",
+}
+
+
+class ExportError(Exception):
+    pass
+
+
+def export_format(fmt: str) -> tuple[str, str]:
+    """
+    (media type, filename) for an export format.
+    """
+    try:
+        media_type, ext = EXPORT_FORMATS[fmt]
+    except KeyError:
+        raise ExportError(
+            f"Unsupported format '{fmt}' (use {', '.join(EXPORT_FORMATS)})"
+        )
+    return media_type, f"content-export.{ext}"
+
+
+def export_query(tag_ids: list[str] | None = None, filter_text: str | None = None, con=None) -> tuple[str, list]:
+    """
+    URLs to export (oldest first): everything, or items matching the
+    filter expression (see content_filter) and having ALL tag_ids.
+    """
+    node = all_of(has_tags(tag_ids), parse_filter(filter_text, con))
+    where, params = compile_filter(node, con)
+
+    return (
+        f"""
+        SELECT c.url
+        FROM content c
+        WHERE {where}
+        ORDER BY c.created_at, c.id
+        """,
+        params,
+    )
+
+
+def stream_export(sql: str, params: list, fmt: str, batch_size: int = EXPORT_BATCH_SIZE):
+    """
+    Yield the export as encoded chunks, one per `batch_size` rows.
+
+    DuckDB renders each output line (CSV quoting, JSON escaping), so
+    Python only joins strings. Borrows its own pooled cursor for as
+    long as the response streams (the request's cursor is released
+    before the body is sent); memory stays bounded by one batch
+    whatever the result size.
+    """
+    export_format(fmt)
+
+    with database.acquire() as con:
+        con.execute(f"SELECT {LINE_SQL[fmt]} FROM ({sql})", params)
+
+        if fmt == "csv":
+            yield b"url\n"
+
+        while True:
+            rows = con.fetchmany(batch_size)
+            if not rows:
+                break
+
+            yield ("\n".join(line for (line,) in rows) + "\n").encode()
@@ -0,0 +1,707 @@
+import json
+import os
+import re
+from datetime import datetime, timezone
+
+from app.db import get_db
+from app.services.tag_bitmap import tag_bitmaps, TAG_BITMAP_INLINE_MAX
+from app.services.tag_group_model import tag_group_model
+from app.services.tag_index import tag_index
+
+# Max predicates + listed tags in one filter expression
+CONTENT_FILTER_MAX_TERMS = int(os.getenv("CONTENT_FILTER_MAX_TERMS", "64"))
+
+# Max nesting of NOT / parentheses
+MAX_FILTER_DEPTH = 32
+
+# Rough share of content matched by predicates we keep no statistics
+# for (tag predicates are estimated from tag usage counts)
+DEFAULT_SELECTIVITY = {
+    "status": 0.5,
+    "created": 0.5,
+    "domain": 0.1,
+    "short": 0.5,
+}
+
+COMPARISONS = (">=", "<=", ">", "<")
+
+TOKEN_RE = re.compile(
+    r"""\s*(?:("(?:[^"\\]|\\.)*")|(>=|<=|[()\[\],<>])|([^\s()\[\],<>"]+))"""
+)
+
+# Groups below min_count for content item `c`
+SHORT_GROUPS_SQL = """
+    SELECT 1
+    FROM tag_group tg
+    WHERE COALESCE(tg.min_count, 0) > COALESCE((
+        SELECT cgc.n
+        FROM content_group_count cgc
+        WHERE cgc.content_id = c.id
+          AND cgc.group_id = tg.id
+    ), 0)
+"""
+
+DOMAIN_SQL = """
+    ends_with(
+        '.' || regexp_extract(
+            lower(COALESCE(c.source_url, c.url)),
+            '^[a-z][a-z0-9+.-]*://([^/:?#]+)',
+            1
+        ),
+        ?
+    )
+"""
+
+
+class FilterError(ValueError):
+    pass
+
+
+# ------------------------------------------------------------------
+# Filter nodes (plain tuples)
+#
+#   ("tags", "all" | "any", [tag_id, ...])
+#   ("status", [status, ...])
+#   ("created", op, datetime)
+#   ("domain", host)
+#   ("short", group_id | None)      below min_count (None: any group)
+#   ("and", [node, ...]) / ("or", [node, ...]) / ("not", node)
+# ------------------------------------------------------------------
+
+def has_tags(tag_ids: list[str] | None, mode: str = "all"):
+    tag_ids = list(dict.fromkeys(tag_ids or []))
+    return ("tags", mode, tag_ids) if tag_ids else None
+
+
+def all_of(*nodes):
+    """
+    AND of the given nodes (None entries are skipped).
+    """
+    nodes = [n for n in nodes if n is not None]
+    if not nodes:
+        return None
+    return nodes[0] if len(nodes) == 1 else ("and", nodes)
+
+
+def uses(node, kind: str) -> bool:
+    """
+    True if `kind` predicates appear anywhere in `node`.
+    """
+    if node is None:
+        return False
+    if node[0] in ("and", "or"):
+        return any(uses(child, kind) for child in node[1])
+    if node[0] == "not":
+        return uses(node[1], kind)
+    return node[0] == kind
+
+
+# ------------------------------------------------------------------
+# Parsing
+# ------------------------------------------------------------------
+
+def _tokenize(text: str) -> list[tuple[str, str]]:
+    tokens = []
+    pos = 0
+
+    while pos < len(text):
+        m = TOKEN_RE.match(text, pos)
+        if m is None or m.end() == pos:
+            if text[pos:].strip():
+                raise FilterError(f"Unexpected character at {pos}: {text[pos:pos + 10]!r}")
+            break
+
+        quoted, op, word = m.groups()
+        pos = m.end()
+
+        if quoted is not None:
+            value = re.sub(r"\\(.)", r"\1", quoted[1:-1])
+            # field:"quoted value"
+            if tokens and tokens[-1][0] == "word" and tokens[-1][1].endswith(":"):
+                tokens[-1] = ("word", tokens[-1][1] + value)
+            else:
+                tokens.append(("value", value))
+        elif op is not None:
+            tokens.append(("op", op))
+        elif word is not None:
+            tokens.append(("word", word))
+
+    return tokens
+
+
+class _Parser:
+    def __init__(self, tokens: list[tuple[str, str]], model):
+        self.tokens = tokens
+        self.pos = 0
+        self.model = model
+        self.terms = 0
+
+    def peek(self):
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def take(self, what: str) -> tuple[str, str]:
+        tok = self.peek()
+        if tok is None:
+            raise FilterError(f"Unexpected end of filter, expected {what}")
+        self.pos += 1
+        return tok
+
+    def keyword(self, *words: str) -> str | None:
+        tok = self.peek()
+        if tok and tok[0] == "word" and tok[1].lower() in words:
+            self.pos += 1
+            return tok[1].lower()
+        return None
+
+    def op(self, op: str) -> bool:
+        if self.peek() == ("op", op):
+            self.pos += 1
+            return True
+        return False
+
+    def expect(self, op: str):
+        kind, value = self.take(f"'{op}'")
+        if (kind, value) != ("op", op):
+            raise FilterError(f"Expected '{op}', got '{value}'")
+
+    def count(self, n: int = 1):
+        self.terms += n
+        if self.terms > CONTENT_FILTER_MAX_TERMS:
+            raise FilterError(f"Filter too long (max {CONTENT_FILTER_MAX_TERMS} terms)")
+
+    # -------------------------
+    # expr   := term (OR term)*
+    # term   := factor (AND factor)*
+    # factor := NOT factor | "(" expr ")" | predicate
+    # -------------------------
+
+    def expr(self, depth: int = 0):
+        children = [self.term(depth)]
+        while self.keyword("or"):
+            children.append(self.term(depth))
+        return children[0] if len(children) == 1 else ("or", children)
+
+    def term(self, depth: int):
+        children = [self.factor(depth)]
+        while self.keyword("and"):
+            children.append(self.factor(depth))
+        return children[0] if len(children) == 1 else ("and", children)
+
+    def factor(self, depth: int):
+        if depth > MAX_FILTER_DEPTH:
+            raise FilterError(f"Filter nested too deeply (max {MAX_FILTER_DEPTH})")
+
+        if self.keyword("not"):
+            return ("not", self.factor(depth + 1))
+
+        if self.op("("):
+            node = self.expr(depth + 1)
+            self.expect(")")
+            return node
+
+        return self.predicate()
+
+    def predicate(self):
+        kind, word = self.take("a filter term")
+        if kind != "word":
+            raise FilterError(f"Expected a filter term, got '{word}'")
+
+        self.count()
+        field, sep, value = word.partition(":")
+        field = field.lower()
+
+        if sep and not value:
+            raise FilterError(f"Missing value for '{word}'")
+
+        if field == "tag" and sep:
+            if self.model.group_of(value) is None:
+                raise FilterError(f"Unknown tag '{value}'")
+            return ("tags", "all", [value])
+
+        if field == "group" and sep:
+            return self.group(value)
+
+        if field == "status":
+            if sep:
+                return ("status", [value])
+            if self.keyword("in"):
+                return ("status", self.values())
+
+        if field == "domain" and sep:
+            return ("domain", value.lower().strip("."))
+
+        if field == "created" and not sep:
+            kind, op = self.take("a comparison")
+            if kind != "op" or op not in COMPARISONS:
+                raise FilterError(f"Expected one of {' '.join(COMPARISONS)} after 'created'")
+            return ("created", op, _parse_datetime(self.value()))
+
+        raise FilterError(f"Unknown filter term '{word}'")
+
+    def group(self, group_id: str):
+        if group_id != "*" and group_id not in self.model.by_id:
+            raise FilterError(f"Unknown tag group '{group_id}'")
+
+        short = ("short", None if group_id == "*" else group_id)
+
+        action = self.keyword("has", "missing", "complete")
+
+        if action == "missing":
+            return short
+
+        if action == "complete":
+            return ("not", short)
+
+        if action == "has":
+            if group_id == "*":
+                raise FilterError("group:* supports only missing / complete")
+
+            mode = self.keyword("any", "all", "none")
+            if mode is None:
+                raise FilterError(f"Expected any / all / none after 'group:{group_id} has'")
+
+            tag_ids = [self.group_tag(group_id, v) for v in self.values()]
+            node = has_tags(tag_ids, "any" if mode == "none" else mode)
+
+            return ("not", node) if mode == "none" else node
+
+        raise FilterError(f"Expected has / missing / complete after 'group:{group_id}'")
+
+    def group_tag(self, group_id: str, value: str) -> str:
+        # Full tag id or the part after "<group>:"
+        for tag_id in (value, f"{group_id}:{value}"):
+            if self.model.group_of(tag_id) == group_id:
+                return tag_id
+
+        raise FilterError(f"Tag '{value}' is not in group '{group_id}'")
+
+    def value(self) -> str:
+        kind, value = self.take("a value")
+        if kind == "op":
+            raise FilterError(f"Expected a value, got '{value}'")
+        return value
+
+    def values(self) -> list[str]:
+        self.expect("[")
+
+        values = [self.value()]
+        while self.op(","):
+            values.append(self.value())
+
+        self.expect("]")
+        self.count(len(values))
+
+        return values
+
+
+def _parse_datetime(value: str) -> datetime:
+    try:
+        when = datetime.fromisoformat(value)
+    except ValueError:
+        raise FilterError(f"Invalid date '{value}' (use YYYY-MM-DD[THH:MM[:SS]])")
+
+    # created_at is stored as naive UTC
+    if when.tzinfo is not None:
+        when = when.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return when
+
+
+def parse_filter(text: str | None, con=None):
+    """
+    Parse a filter expression into a node (None for an empty filter).
+
+        tag:species:cat AND group:mood has any [happy, calm]
+        (status:new OR status in [draft]) AND NOT group:* missing
+        created >= 2024-01-01 AND created < 2024-02-01 AND domain:imgur.com
+
+    Predicates:
+    - tag:<tag_id>
+    - group:<id> has any | all | none [<tag>, ...]   (tag ids, or the
+      part after "<id>:")
+    - group:<id> missing | complete                  (vs. min_count;
+      group:* = any / every group)
+    - status:<status>, status in [<status>, ...]
+    - created >= | > | <= | < <ISO date or datetime> (UTC)
+    - domain:<host>                                  (subdomains included)
+
+    Combined with AND, OR, NOT and parentheses (AND binds tighter than
+    OR). Values may be double-quoted. Tags and groups are checked
+    against the cached tag group model.
+    """
+    if text is None or not text.strip():
+        return None
+
+    parser = _Parser(_tokenize(text), tag_group_model.get(con))
+    node = parser.expr()
+
+    tok = parser.peek()
+    if tok is not None:
+        raise FilterError(f"Unexpected '{tok[1]}' (combine terms with AND / OR)")
+
+    return node
+
+
+# ------------------------------------------------------------------
+# Planning + SQL
+# ------------------------------------------------------------------
+
+def _normalize(node):
+    """
+    Flatten nested AND / OR and drop double negation.
+    """
+    kind = node[0]
+
+    if kind in ("and", "or"):
+        children = []
+        for child in map(_normalize, node[1]):
+            if child[0] == kind:
+                children.extend(child[1])
+            else:
+                children.append(child)
+        return (kind, children) if len(children) > 1 else children[0]
+
+    if kind == "not":
+        child = _normalize(node[1])
+        return child[1] if child[0] == "not" else ("not", child)
+
+    return node
+
+
+def _is_tag_set(node) -> bool:
+    """
+    Only tag predicates: answerable from content_tag alone.
+    """
+    if node[0] in ("and", "or"):
+        return all(map(_is_tag_set, node[1]))
+    if node[0] == "not":
+        return _is_tag_set(node[1])
+    return node[0] == "tags"
+
+
+def _merge_tags(kind: str, children: list) -> list:
+    """
+    Fold the plain tag predicates of an AND (OR) into one "all" ("any")
+    predicate, so they cost one content_tag pass instead of one each.
+    """
+    mode = "all" if kind == "and" else "any"
+    merged, rest = [], []
+
+    for child in children:
+        if child[0] == "tags" and (child[1] == mode or len(child[2]) == 1):
+            merged += child[2]
+        else:
+            rest.append(child)
+
+    if not merged:
+        return rest
+
+    return [has_tags(merged, mode), *rest]
+
+
+class _Planner:
+    """
+    Compiles a normalized node into a WHERE condition over `content c`.
+
+    Tag-only subtrees are answered by the tag bitmap index and passed
+    as an id list (`c.id [NOT] IN (...)`) when the set (or a NOT's
+    operand) is small; otherwise they become ONE set query over
+    content_tag (INTERSECT / UNION / EXCEPT, plain tag lists folded into
+    a single GROUP BY pass). Other predicates are row filters.
+
+    AND operands are ordered most selective first: exact counts from the
+    bitmap index for tag predicates (tag usage counts before it is
+    loaded), fixed guesses for the rest.
+    """
+
+    def __init__(self, con):
+        self.con = con
+        self._total = None
+        self._matches = {}
+
+    @property
+    def total(self) -> int:
+        if self._total is None:
+            self._total = max(1, self.con.execute("SELECT COUNT(*) FROM content").fetchone()[0])
+        return self._total
+
+    def estimate(self, node) -> float:
+        """
+        Estimated share of content matching `node` (0..1), assuming
+        independent predicates.
+        """
+        kind = node[0]
+
+        if tag_bitmaps.loaded and _is_tag_set(node):
+            return min(1.0, self.match(node).bit_count() / self.total)
+
+        if kind == "tags":
+            shares = [
+                min(1.0, tag_index.usage(tag_id, con=self.con) / self.total)
+                for tag_id in node[2]
+            ]
+            if node[1] == "any":
+                return min(1.0, sum(shares))
+            return _product(shares)
+
+        if kind == "and":
+            return _product(map(self.estimate, node[1]))
+
+        if kind == "or":
+            return 1.0 - _product(1.0 - self.estimate(child) for child in node[1])
+
+        if kind == "not":
+            return 1.0 - self.estimate(node[1])
+
+        return DEFAULT_SELECTIVITY[kind]
+
+    def match(self, node) -> int:
+        # Bitmaps per tag-only node, reused by estimate() and condition()
+        key = repr(node)
+        if key not in self._matches:
+            self._matches[key] = tag_bitmaps.match(node)
+        return self._matches[key]
+
+    # -------------------------
+    # Row conditions
+    # -------------------------
+
+    def condition(self, node) -> tuple[str, list]:
+        kind = node[0]
+
+        if _is_tag_set(node):
+            if tag_bitmaps.loaded:
+                inline = self.inline_ids(node)
+                if inline is not None:
+                    return inline
+
+            sql, params, negated = self.tag_set(node)
+            return f"c.id {'NOT IN' if negated else 'IN'} ({sql})", params
+
+        if kind in ("and", "or"):
+            tag_sets = [child for child in node[1] if _is_tag_set(child)]
+            rows = [child for child in node[1] if not _is_tag_set(child)]
+
+            # All tag predicates answered by one content_tag query
+            if len(tag_sets) > 1:
+                tag_sets = [(kind, tag_sets)]
+
+            # AND: most selective first; OR: most likely match first
+            operands = sorted(
+                tag_sets + rows,
+                key=self.estimate,
+                reverse=kind == "or",
+            )
+
+            parts, params = [], []
+            for child in operands:
+                sql, child_params = self.condition(child)
+                parts.append(f"({sql})")
+                params += child_params
+
+            return f" {kind.upper()} ".join(parts), params
+
+        if kind == "not":
+            sql, params = self.condition(node[1])
+            return f"NOT ({sql})", params
+
+        if kind == "status":
+            return (
+                f"COALESCE(c.status, 'new') IN ({', '.join('?' * len(node[1]))})",
+                list(node[1]),
+            )
+
+        if kind == "created":
+            return f"c.created_at {node[1]} ?", [node[2]]
+
+        if kind == "domain":
+            return DOMAIN_SQL, [f".{node[1]}"]
+
+        if kind == "short":
+            if node[1] is None:
+                return f"EXISTS ({SHORT_GROUPS_SQL})", []
+            return f"EXISTS ({SHORT_GROUPS_SQL} AND tg.id = ?)", [node[1]]
+
+        raise FilterError(f"Unknown filter node '{kind}'")
+
+    def inline_ids(self, node) -> tuple[str, list] | None:
+        """
+        `c.id IN (<ids>)` from the bitmap index when the matching set has
+        at most TAG_BITMAP_INLINE_MAX items; `c.id NOT IN (<ids>)` when
+        the node is a NOT whose operand's set is that small.
+
+        Never NOT IN the index's own complement: that is only right
+        while the index holds exactly the rows of `content`. Large sets
+        go to the content_tag query, so SQL takes the complement.
+        """
+        negated = node[0] == "not"
+        bits = self.match(node[1] if negated else node)
+
+        if bits.bit_count() > TAG_BITMAP_INLINE_MAX:
+            return None
+
+        op = "NOT IN" if negated else "IN"
+
+        return (
+            f"c.id {op} (SELECT unnest(from_json(?, '[\"VARCHAR\"]')))",
+            [json.dumps(tag_bitmaps.content_ids(bits))],
+        )
+
+    # -------------------------
+    # content_tag sets
+    # -------------------------
+
+    def tag_set(self, node) -> tuple[str, list, bool]:
+        """
+        (SELECT content_id ... query, params, negated) for a tag-only
+        node; `negated` means the node matches content NOT in the set.
+        """
+        kind = node[0]
+
+        if kind == "tags":
+            _, mode, tag_ids = node
+
+            if len(tag_ids) == 1:
+                return "SELECT content_id FROM content_tag WHERE tag_id = ?", list(tag_ids), False
+
+            sql = f"""
+                SELECT content_id
+                FROM content_tag
+                WHERE tag_id IN ({', '.join('?' * len(tag_ids))})
+            """
+            if mode == "any":
+                return sql, list(tag_ids), False
+
+            return (
+                f"{sql} GROUP BY content_id HAVING COUNT(*) = ?",
+                [*tag_ids, len(tag_ids)],
+                False,
+            )
+
+        if kind == "not":
+            sql, params, negated = self.tag_set(node[1])
+            return sql, params, not negated
+
+        # Smallest sets first
+        children = sorted(_merge_tags(kind, node[1]), key=self.estimate)
+        if len(children) == 1:
+            return self.tag_set(children[0])
+
+        sets = [self.tag_set(child) for child in children]
+        positive = [s for s in sets if not s[2]]
+        negative = [s for s in sets if s[2]]
+
+        if kind == "and":
+            # A ∩ B ∩ ¬C ∩ ¬D = (A ∩ B) \ (C ∪ D)
+            if not positive:
+                return (*_set_op("UNION", negative), True)
+            return (*_except(_set_op("INTERSECT", positive), negative), False)
+
+        # A ∪ B ∪ ¬C ∪ ¬D = ¬((C ∩ D) \ (A ∪ B))
+        if not negative:
+            return (*_set_op("UNION", positive), False)
+        return (*_except(_set_op("INTERSECT", negative), positive), True)
+
+
+def _except(base: tuple[str, list], sets: list) -> tuple[str, list]:
+    if not sets:
+        return base
+
+    sql, params = base
+    minus, minus_params = _set_op("UNION", sets)
+
+    return f"({sql}) EXCEPT ({minus})", params + minus_params
+
+
+def _set_op(op: str, sets: list) -> tuple[str, list]:
+    if len(sets) == 1:
+        return sets[0][0], list(sets[0][1])
+
+    params = []
+    for _, set_params, _ in sets:
+        params += set_params
+
+    return f" {op} ".join(f"({sql})" for sql, _, _ in sets), params
+
+
+def _product(values) -> float:
+    result = 1.0
+    for value in values:
+        result *= value
+    return result
+
+
+def compile_filter(node, con=None) -> tuple[str, list]:
+    """
+    (WHERE condition over `content c`, params) for a filter node;
+    "TRUE" when there is no filter.
+    """
+    if node is None:
+        return "TRUE", []
+
+    if con is None:
+        con = get_db()
+
+    return _Planner(con).condition(_normalize(node))
+
+
+def tag_facets(
+    tag_ids: list[str] | None = None,
+    filter_text: str | None = None,
+    group_id: str | None = None,
+    con=None,
+) -> dict:
+    """
+    Facet counts for a tag selection (items having ALL tag_ids and
+    matching a tag-only filter expression), from the tag bitmap index:
+    {"count": n, "facets": {tag_id: n}} over content of any status.
+
+    Counts every tag of `group_id`, or every tag in use (zeros dropped).
+    """
+    if con is None:
+        con = get_db()
+
+    node = all_of(has_tags(tag_ids), parse_filter(filter_text, con))
+    if node is not None and not _is_tag_set(_normalize(node)):
+        raise FilterError("Facets support tag predicates only")
+
+    if not tag_bitmaps.loaded:
+        tag_bitmaps.load(con)
+
+    if group_id is None:
+        result = tag_bitmaps.facets(node)
+        result["facets"] = {t: n for t, n in result["facets"].items() if n}
+        return result
+
+    model = tag_group_model.get(con)
+    if group_id not in model.by_id:
+        raise FilterError(f"Unknown tag group '{group_id}'")
+
+    return tag_bitmaps.facets(
+        node,
+        [tag_id for tag_id, g in model.tag_groups.items() if g == group_id],
+    )
+
+
+def explain_filter(text: str, con=None) -> dict:
+    """
+    Parsed filter, compiled SQL and estimated matches (debugging).
+    """
+    if con is None:
+        con = get_db()
+
+    node = parse_filter(text, con)
+    if node is None:
+        return {"filter": text, "node": None, "sql": "TRUE", "params": []}
+
+    node = _normalize(node)
+    planner = _Planner(con)
+    sql, params = planner.condition(node)
+
+    return {
+        "filter": text,
+        "node": node,
+        "sql": " ".join(sql.split()),
+        "params": params,
+        "estimated_rows": round(planner.estimate(node) * planner.total),
+    }
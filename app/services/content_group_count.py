@@ -0,0 +1,108 @@
+import json
+import sys
+
+from app.db import get_db
+
+
+def group_counts(content_id: str, con=None) -> dict[str, int]:
+    """
+    {group_id: tags assigned} for one content item (primary key lookup).
+    """
+    if con is None:
+        con = get_db()
+
+    return dict(
+        con.execute(
+            """
+            SELECT group_id, n
+            FROM content_group_count
+            WHERE content_id = ?
+              AND n > 0
+            """,
+            (content_id,),
+        ).fetchall()
+    )
+
+
+def apply_group_counts(con, pairs: str, sign: int = 1, params=()):
+    """
+    Add (sign=1) or remove (sign=-1) content_tag pairs to / from
+    content_group_count. `pairs` is a table or subquery yielding
+    (content_id, tag_id) rows that were ACTUALLY inserted / deleted.
+
+    Call inside the transaction that changes content_tag.
+    """
+    con.execute(
+        f"""
+        INSERT INTO content_group_count (content_id, group_id, n)
+        SELECT p.content_id, t.group_id, ? * COUNT(*)
+        FROM {pairs} p
+        JOIN tag t ON t.id = p.tag_id
+        GROUP BY p.content_id, t.group_id
+        ON CONFLICT (content_id, group_id) DO UPDATE SET n = n + excluded.n
+        """,
+        (sign, *params),
+    )
+
+
+def apply_group_counts_for(con, content_id: str, tag_ids: list[str], sign: int = 1):
+    """
+    apply_group_counts for tags added to / removed from one item.
+    """
+    if not tag_ids:
+        return
+
+    apply_group_counts(
+        con,
+        """(
+            SELECT ? AS content_id, unnest(from_json(?, '["VARCHAR"]')) AS tag_id
+        )""",
+        sign,
+        (content_id, json.dumps(tag_ids)),
+    )
+
+
+def rebuild_group_counts(con=None) -> int:
+    """
+    Recompute content_group_count from content_tag from scratch.
+    Returns the number of (content, group) rows written.
+    """
+    if con is None:
+        con = get_db()
+
+    con.execute("BEGIN")
+
+    try:
+        con.execute("DELETE FROM content_group_count")
+
+        rows = con.execute(
+            """
+            INSERT INTO content_group_count (content_id, group_id, n)
+            SELECT ct.content_id, t.group_id, COUNT(*)
+            FROM content_tag ct
+            JOIN tag t ON t.id = ct.tag_id
+            GROUP BY ct.content_id, t.group_id
+            """
+        ).fetchone()[0]
+
+        con.execute("COMMIT")
+
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    return rows
+
+
+def main():
+    # python -m app.services.content_group_count  (server stopped)
+    if sys.argv[1:] not in ([], ["--rebuild"]):
+        print("Usage: python -m app.services.content_group_count [--rebuild]")
+        sys.exit(1)
+
+    rows = rebuild_group_counts()
+    print(f"✅ Rebuilt content_group_count: {rows} rows")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,18 @@
-import requests
+import logging
+import os
+import re
+import time
+from collections import deque
+from html import unescape
+from threading import Lock
+
 from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse, urlunparse
 from datetime import datetime
 
 from app.db import get_db
+from app.services.http_client import http_client
+from app.services.preview_cache import preview_cache
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (compatible; PicVidTags/1.0)"
@@ -12,6 +21,40 @@ HEADERS = {
 IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".webp", ".gif")
 VIDEO_EXTENSIONS = (".mp4", ".webm", ".mov")
 
+# Preview types a client may hand back from /content/expand
+CLIENT_PREVIEW_TYPES = {"image", "video", "page"}
+
+log = logging.getLogger(__name__)
+
+# Head-only page reads: stop at </head> or this many bytes
+PREVIEW_MAX_BYTES = int(os.getenv("PREVIEW_MAX_BYTES", str(512 * 1024)))
+PREVIEW_CHUNK_SIZE = 16 * 1024
+
+# After </head>, read at most this much more to keep the connection
+PREVIEW_DRAIN_BYTES = 64 * 1024
+
+PREVIEW_RECENT_FETCHES = 50
+
+# Meta keys that make a preview (anything else → soup fallback)
+PREVIEW_META_KEYS = (
+    "og:image",
+    "og:video",
+    "og:title",
+    "twitter:image",
+    "twitter:player",
+    "twitter:title",
+)
+
+HEAD_END_RE = re.compile(rb"</head\s*>|<body[\s>]", re.IGNORECASE)
+CHARSET_RE = re.compile(r"charset=[\"']?([\w-]+)", re.IGNORECASE)
+META_CHARSET_RE = re.compile(rb"<meta[^>]+charset=[\"']?([\w-]+)", re.IGNORECASE)
+
+META_TAG_RE = re.compile(r"<meta\b([^>]*)>", re.IGNORECASE)
+META_ATTR_RE = re.compile(
+    r"""([^\s=/>]+)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))"""
+)
+TITLE_RE = re.compile(r"<title\b[^>]*>(.*?)</title\s*>", re.IGNORECASE | re.DOTALL)
+
 
 # --------------------------------------------------
 # Utilities
@@ -39,27 +82,14 @@ def normalize_image_url(url: str | None) -> str | None:
     return urlunparse(parsed._replace(query=""))
 
 
-def _get_meta(soup, *, prop=None, name=None):
-    if prop:
-        tag = soup.find("meta", property=prop)
-    elif name:
-        tag = soup.find("meta", attrs={"name": name})
-    else:
-        return None
-
-    return tag["content"].strip() if tag and tag.get("content") else None
-
-
 # --------------------------------------------------
 # Preview extraction
 # --------------------------------------------------
 
-def extract_preview_from_url(url: str) -> dict:
+def direct_preview(url: str) -> dict | None:
     """
-    Resolve preview metadata for a URL.
-
-    - Direct image/video URLs short-circuit
-    - HTML pages use OG / Twitter metadata
+    Preview for URLs that need no network access (direct image/video).
+    Returns None when the page has to be fetched.
     """
 
     # --------------------------------------------------
@@ -86,44 +116,179 @@ def extract_preview_from_url(url: str) -> dict:
             "description": None,
         }
 
+    return None
+
+
+def preview_from_payload(item: dict) -> dict | None:
+    """
+    Validate preview fields echoed back from /content/expand.
+
+    Returns a preview dict (normalized URL recomputed server-side) or
+    None when the fields are missing / unusable and the URL has to be
+    resolved again.
+    """
+    preview_type = item.get("preview_type")
+    preview_url = item.get("preview_url")
+
+    if preview_type not in CLIENT_PREVIEW_TYPES:
+        return None
+
+    if preview_type in ("image", "video"):
+        if not isinstance(preview_url, str):
+            return None
+        if urlparse(preview_url).scheme not in ("http", "https"):
+            return None
+    else:
+        preview_url = None
+
+    title = item.get("title")
+    description = item.get("description")
+
+    return {
+        "preview_type": preview_type,
+        "preview_url": preview_url,
+        "preview_url_normalized": (
+            normalize_image_url(preview_url)
+            if preview_type == "image"
+            else None
+        ),
+        "title": title if isinstance(title, str) else None,
+        "description": description if isinstance(description, str) else None,
+    }
+
+
+def preview_cache_key(url: str) -> str:
+    """
+    Preview cache key for a URL.
+
+    Image URLs are normalized like preview_url_normalized (CDN resize /
+    tracking params dropped); page URLs keep their query string since
+    it often identifies the page (e.g. watch?v=...).
+    """
+    parsed = urlparse(url)
+    parsed = parsed._replace(netloc=parsed.netloc.lower(), fragment="")
+
+    if is_image_url(url):
+        return normalize_image_url(urlunparse(parsed))
+
+    return urlunparse(parsed)
+
+
+def extract_preview_from_url(
+    url: str,
+    con=None,
+    negative: bool = True,
+    refresh: bool = False,
+) -> dict:
+    """
+    Resolve preview metadata for a URL.
+
+    - Direct image/video URLs short-circuit
+    - With a `con`, everything else reads through the preview cache
+      (negative=False ignores cached failures, e.g. for retries;
+      refresh=True always fetches and overwrites the cache entry);
+      without one it is fetched, no database involved (e.g. expand)
+    - HTML pages use OG / Twitter metadata
+
+    Cache write errors are logged, never turned into a failed preview.
+    """
+
+    preview = direct_preview(url)
+    if preview:
+        return preview
+
+    if con is None:
+        return fetch_preview(url)
+
+    key = preview_cache_key(url)
+
+    if not refresh:
+        preview = preview_cache.get(key, con=con, negative=negative)
+        if preview:
+            return preview
+
+    try:
+        preview = fetch_preview(url)
+    except Exception as e:
+        try:
+            preview_cache.put_failure(key, e, con=con)
+        except Exception:
+            log.warning("Preview cache write failed for %s", key, exc_info=True)
+        raise
+
+    try:
+        preview_cache.put(key, preview, con=con)
+    except Exception:
+        log.warning("Preview cache write failed for %s", key, exc_info=True)
+
+    return preview
+
+
+def fetch_preview(url: str) -> dict:
+    """
+    Fetch + parse a page's preview metadata (no cache).
+
+    The body is streamed and reading stops at </head> (or <body>) or
+    PREVIEW_MAX_BYTES, whichever comes first; meta tags are read with
+    a regex scanner and BeautifulSoup only runs when the scanner finds
+    nothing usable.
+    """
+
     # --------------------------------------------------
     # 3️⃣ HTML page
     # --------------------------------------------------
-    r = requests.get(url, headers=HEADERS, timeout=10)
-    r.raise_for_status()
+    r = http_client.get(url, headers=HEADERS, stream=True)
 
-    content_type = r.headers.get("Content-Type", "")
-    if "text/html" not in content_type:
-        return {
-            "preview_type": "unknown",
-            "preview_url": None,
-            "preview_url_normalized": None,
-            "title": None,
-            "description": None,
-        }
-
-    soup = BeautifulSoup(r.text, "html.parser")
-
-    image = (
-        _get_meta(soup, prop="og:image")
-        or _get_meta(soup, name="twitter:image")
+    try:
+        r.raise_for_status()
+
+        content_type = r.headers.get("Content-Type", "")
+        if "text/html" not in content_type:
+            return {
+                "preview_type": "unknown",
+                "preview_url": None,
+                "preview_url_normalized": None,
+                "title": None,
+                "description": None,
+            }
+
+        body, stop = _read_head(r)
+        downloaded = r.raw.tell() or len(body)
+    finally:
+        r.close()
+
+    started = time.perf_counter()
+
+    html = _decode(body, content_type)
+    parser = "scan"
+    meta, title = scan_head(html)
+
+    if not title and not any(meta.get(key) for key in PREVIEW_META_KEYS):
+        parser = "soup"
+        meta, title = _soup_head(html)
+
+    preview = _preview_from_meta(url, meta, title)
+
+    _record_fetch(
+        url,
+        downloaded,
+        (time.perf_counter() - started) * 1000,
+        stop,
+        parser,
     )
+    return preview
 
-    video = (
-        _get_meta(soup, prop="og:video")
-        or _get_meta(soup, name="twitter:player")
-    )
 
-    title = (
-        _get_meta(soup, prop="og:title")
-        or _get_meta(soup, name="twitter:title")
-        or (soup.title.string.strip() if soup.title else None)
-    )
+def _preview_from_meta(url: str, meta: dict, title: str | None) -> dict:
+    image = meta.get("og:image") or meta.get("twitter:image")
+    video = meta.get("og:video") or meta.get("twitter:player")
+
+    title = meta.get("og:title") or meta.get("twitter:title") or title
 
     description = (
-        _get_meta(soup, prop="og:description")
-        or _get_meta(soup, name="twitter:description")
-        or _get_meta(soup, name="description")
+        meta.get("og:description")
+        or meta.get("twitter:description")
+        or meta.get("description")
     )
 
     if video:
@@ -155,30 +320,189 @@ def extract_preview_from_url(url: str) -> dict:
 
 
 # --------------------------------------------------
-# DB integration
+# Head-only reading / parsing
 # --------------------------------------------------
 
-def build_and_store_preview(content_id: str, source_url: str) -> dict:
-    con = get_db()
+def _read_head(r) -> tuple[bytes, str]:
+    """
+    Read the response until the end of <head>.
+
+    Returns (body bytes, stop reason): 'head' | 'cap' | 'eof'.
+    """
+    buf = bytearray()
+
+    for chunk in r.iter_content(PREVIEW_CHUNK_SIZE):
+        searched = max(0, len(buf) - 16)
+        buf += chunk
+
+        if HEAD_END_RE.search(buf, searched):
+            _drain_small_rest(r)
+            return bytes(buf), "head"
+
+        if len(buf) >= PREVIEW_MAX_BYTES:
+            return bytes(buf[:PREVIEW_MAX_BYTES]), "cap"
+
+    return bytes(buf), "eof"
 
+
+def _drain_small_rest(r):
+    """
+    Finish reading a short remainder so the keep-alive connection can be
+    reused; long bodies are cut off instead (closing the connection).
+    """
     try:
-        preview = extract_preview_from_url(source_url)
+        remaining = int(r.headers.get("Content-Length", "")) - r.raw.tell()
+    except ValueError:
+        return
 
-        status = (
-            "ready"
-            if preview["preview_type"] != "unknown"
-            else "failed"
-        )
+    if 0 < remaining <= PREVIEW_DRAIN_BYTES:
+        for _ in r.iter_content(PREVIEW_CHUNK_SIZE):
+            pass
 
-    except Exception:
-        preview = {
-            "preview_type": "unknown",
-            "preview_url": None,
-            "preview_url_normalized": None,
-            "title": None,
-            "description": None,
+
+def _decode(body: bytes, content_type: str) -> str:
+    match = CHARSET_RE.search(content_type)
+    charset = match.group(1) if match else None
+
+    if not charset:
+        match = META_CHARSET_RE.search(body[:4096])
+        charset = match.group(1).decode("ascii", "ignore") if match else "utf-8"
+
+    try:
+        return body.decode(charset, errors="replace")
+    except LookupError:
+        return body.decode("utf-8", errors="replace")
+
+
+def scan_head(html: str) -> tuple[dict, str | None]:
+    """
+    Regex scan for <meta property|name=... content=...> and <title>.
+
+    Returns ({"og:image": ..., "description": ..., ...}, title); the
+    first occurrence of each key wins.
+    """
+    meta = {}
+
+    for tag in META_TAG_RE.finditer(html):
+        attrs = {
+            m.group(1).lower(): unescape(m.group(2) or m.group(3) or m.group(4) or "")
+            for m in META_ATTR_RE.finditer(tag.group(1))
         }
-        status = "failed"
+
+        key = (attrs.get("property") or attrs.get("name") or "").strip().lower()
+        content = (attrs.get("content") or "").strip()
+
+        if key and content and key not in meta:
+            meta[key] = content
+
+    match = TITLE_RE.search(html)
+    title = unescape(match.group(1)).strip() if match else None
+
+    return meta, title or None
+
+
+def _soup_head(html: str) -> tuple[dict, str | None]:
+    """
+    Full BeautifulSoup parse (fallback for markup the scanner misses).
+    """
+    soup = BeautifulSoup(html, "html.parser")
+    meta = {}
+
+    for tag in soup.find_all("meta"):
+        key = (tag.get("property") or tag.get("name") or "").strip().lower()
+        content = (tag.get("content") or "").strip()
+
+        if key and content and key not in meta:
+            meta[key] = content
+
+    title = soup.title.get_text().strip() if soup.title else None
+
+    return meta, title or None
+
+
+# --------------------------------------------------
+# Fetch metrics
+# --------------------------------------------------
+
+_fetch_lock = Lock()
+_recent_fetches = deque(maxlen=PREVIEW_RECENT_FETCHES)
+
+_fetch_stats = {
+    "pages": 0,
+    "bytes_downloaded": 0,
+    "parse_ms": 0.0,
+    "stopped_at_head": 0,
+    "stopped_at_cap": 0,
+    "read_to_eof": 0,
+    "soup_fallbacks": 0,
+}
+
+STOP_COUNTERS = {
+    "head": "stopped_at_head",
+    "cap": "stopped_at_cap",
+    "eof": "read_to_eof",
+}
+
+
+def _record_fetch(url: str, downloaded: int, parse_ms: float, stop: str, parser: str):
+    log.debug(
+        "preview %s: %d bytes (%s), parsed in %.2f ms (%s)",
+        url, downloaded, stop, parse_ms, parser,
+    )
+
+    with _fetch_lock:
+        _fetch_stats["pages"] += 1
+        _fetch_stats["bytes_downloaded"] += downloaded
+        _fetch_stats["parse_ms"] += parse_ms
+        _fetch_stats[STOP_COUNTERS[stop]] += 1
+        if parser == "soup":
+            _fetch_stats["soup_fallbacks"] += 1
+
+        _recent_fetches.append({
+            "url": url,
+            "bytes": downloaded,
+            "parse_ms": round(parse_ms, 3),
+            "stop": stop,
+            "parser": parser,
+        })
+
+
+def preview_fetch_stats() -> dict:
+    """
+    Page fetch counters + the most recent fetches (bytes, parse time).
+    """
+    with _fetch_lock:
+        stats = dict(_fetch_stats)
+        recent = list(_recent_fetches)
+
+    pages = stats["pages"]
+    stats["parse_ms"] = round(stats["parse_ms"], 3)
+
+    return {
+        **stats,
+        "max_bytes": PREVIEW_MAX_BYTES,
+        "avg_bytes": round(stats["bytes_downloaded"] / pages) if pages else None,
+        "avg_parse_ms": round(stats["parse_ms"] / pages, 3) if pages else None,
+        "recent": recent,
+    }
+
+
+# --------------------------------------------------
+# DB integration
+# --------------------------------------------------
+
+EMPTY_PREVIEW = {
+    "preview_type": "unknown",
+    "preview_url": None,
+    "preview_url_normalized": None,
+    "title": None,
+    "description": None,
+}
+
+
+def store_preview(content_id: str, preview: dict, status: str, con=None):
+    if con is None:
+        con = get_db()
 
     con.execute(
         """
@@ -190,9 +514,12 @@ def build_and_store_preview(content_id: str, source_url: str) -> dict:
             title,
             description,
             preview_status,
-            fetched_at
+            fetched_at,
+            attempts,
+            next_attempt_at,
+            last_error
         )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0, NULL, NULL)
         ON CONFLICT(content_id) DO UPDATE SET
             preview_type = excluded.preview_type,
             preview_url = excluded.preview_url,
@@ -200,7 +527,10 @@ def build_and_store_preview(content_id: str, source_url: str) -> dict:
             title = excluded.title,
             description = excluded.description,
             preview_status = excluded.preview_status,
-            fetched_at = excluded.fetched_at
+            fetched_at = excluded.fetched_at,
+            attempts = excluded.attempts,
+            next_attempt_at = excluded.next_attempt_at,
+            last_error = excluded.last_error
         """,
         (
             content_id,
@@ -210,9 +540,54 @@ def build_and_store_preview(content_id: str, source_url: str) -> dict:
             preview["title"],
             preview["description"],
             status,
-            datetime.utcnow(),
+            datetime.utcnow() if status != "pending" else None,
         ),
     )
 
+
+def enqueue_preview(content_id: str, source_url: str, con=None) -> str:
+    """
+    Record a preview for new content WITHOUT touching the network.
+
+    Direct image/video URLs are resolved inline (status 'ready');
+    everything else is stored as 'pending' for the preview worker.
+    Returns the stored status.
+    """
+    preview = direct_preview(source_url)
+
+    if preview:
+        store_preview(content_id, preview, "ready", con=con)
+        return "ready"
+
+    store_preview(
+        content_id,
+        {**EMPTY_PREVIEW, "preview_type": None},
+        "pending",
+        con=con,
+    )
+    return "pending"
+
+
+def build_and_store_preview(
+    content_id: str,
+    source_url: str,
+    con=None,
+    refresh: bool = False,
+) -> dict:
+    try:
+        preview = extract_preview_from_url(source_url, con=con, refresh=refresh)
+
+        status = (
+            "ready"
+            if preview["preview_type"] != "unknown"
+            else "failed"
+        )
+
+    except Exception:
+        preview = dict(EMPTY_PREVIEW)
+        status = "failed"
+
+    store_preview(content_id, preview, status, con=con)
+
     preview["preview_status"] = status
     return preview
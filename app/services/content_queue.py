@@ -0,0 +1,226 @@
+import json
+import os
+from datetime import datetime, timedelta
+
+import duckdb
+
+from app.db import get_db
+
+# Default / max lease length (seconds) and items per claim
+CONTENT_LEASE_SECONDS = int(os.getenv("CONTENT_LEASE_SECONDS", "900"))
+CONTENT_LEASE_MAX_SECONDS = int(os.getenv("CONTENT_LEASE_MAX_SECONDS", "3600"))
+CONTENT_CLAIM_MAX = int(os.getenv("CONTENT_CLAIM_MAX", "50"))
+
+# Attempts when a concurrent claim updates the same queue rows
+MAX_CLAIM_ATTEMPTS = 5
+
+OPEN_STATUS = "COALESCE(c.status, 'new') NOT IN ('complete', 'deleted')"
+
+
+class QueueError(Exception):
+    pass
+
+
+# -------------------------
+# Queue maintenance (same transaction as the content change)
+# -------------------------
+
+def enqueue_content(con, content_ids_sql: str, params=()):
+    """
+    Add content to the work queue. `content_ids_sql` yields `id` rows
+    (e.g. "SELECT id FROM _bulk_new").
+    """
+    con.execute(
+        f"""
+        INSERT OR IGNORE INTO content_queue (content_id, created_at)
+        SELECT c.id, c.created_at
+        FROM content c
+        SEMI JOIN ({content_ids_sql}) n ON n.id = c.id
+        """,
+        params,
+    )
+
+
+def dequeue_content(con, content_ids: list[str]):
+    """
+    Drop completed / deleted content from the work queue.
+    """
+    if not content_ids:
+        return
+
+    con.execute(
+        """
+        DELETE FROM content_queue
+        USING (SELECT unnest(from_json(?, '["VARCHAR"]')) AS id) d
+        WHERE content_queue.content_id = d.id
+        """,
+        (json.dumps(content_ids),),
+    )
+
+
+def rebuild_queue(con=None) -> int:
+    """
+    Recompute content_queue (open items, leases dropped) from content.
+    """
+    if con is None:
+        con = get_db()
+
+    con.execute("BEGIN")
+
+    try:
+        con.execute("DELETE FROM content_queue")
+
+        rows = con.execute(
+            f"""
+            INSERT INTO content_queue (content_id, created_at)
+            SELECT c.id, c.created_at
+            FROM content c
+            WHERE {OPEN_STATUS}
+            """
+        ).fetchone()[0]
+
+        con.execute("COMMIT")
+
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    return rows
+
+
+# -------------------------
+# Leases
+# -------------------------
+
+def claim_content(
+    tagger: str,
+    count: int = 1,
+    lease_seconds: int = CONTENT_LEASE_SECONDS,
+    con=None,
+) -> dict:
+    """
+    Lease up to `count` open items (oldest first) to `tagger`.
+
+    Items the tagger already holds come first and have their lease
+    renewed, so repeated claims return the same work until it is
+    completed or released. Expired leases are claimable again.
+
+    One UPDATE ... RETURNING over content_queue (open items only), so
+    two taggers never get the same item; a losing concurrent claim is
+    retried.
+    """
+    if con is None:
+        con = get_db()
+
+    tagger = (tagger or "").strip()
+    if not tagger:
+        raise QueueError("tagger is required")
+
+    if not 1 <= count <= CONTENT_CLAIM_MAX:
+        raise QueueError(f"count must be between 1 and {CONTENT_CLAIM_MAX}")
+
+    if not 1 <= lease_seconds <= CONTENT_LEASE_MAX_SECONDS:
+        raise QueueError(f"lease_seconds must be between 1 and {CONTENT_LEASE_MAX_SECONDS}")
+
+    for attempt in range(MAX_CLAIM_ATTEMPTS):
+        now = datetime.utcnow()
+        expires = now + timedelta(seconds=lease_seconds)
+
+        try:
+            rows = con.execute(
+                """
+                UPDATE content_queue
+                SET leased_by = ?,
+                    leased_until = ?
+                WHERE content_id IN (
+                    SELECT content_id
+                    FROM content_queue
+                    WHERE leased_until IS NULL
+                       OR leased_until <= ?
+                       OR leased_by = ?
+                    ORDER BY COALESCE(leased_by = ?, false) DESC, created_at, content_id
+                    LIMIT ?
+                )
+                RETURNING content_id, created_at
+                """,
+                (tagger, expires, now, tagger, tagger, count),
+            ).fetchall()
+            break
+
+        except duckdb.TransactionException:
+            if attempt == MAX_CLAIM_ATTEMPTS - 1:
+                raise
+
+    return {
+        "tagger": tagger,
+        "lease_expires_at": expires,
+        "content_ids": [r[0] for r in sorted(rows, key=lambda r: (r[1], r[0]))],
+    }
+
+
+def release_content(tagger: str, content_ids: list[str], con=None) -> int:
+    """
+    Give leased items back to the queue (only the tagger's own leases).
+    """
+    if con is None:
+        con = get_db()
+
+    if not content_ids:
+        return 0
+
+    return con.execute(
+        """
+        UPDATE content_queue
+        SET leased_by = NULL,
+            leased_until = NULL
+        WHERE leased_by = ?
+          AND content_id IN (SELECT unnest(from_json(?, '["VARCHAR"]')))
+        """,
+        (tagger, json.dumps(content_ids)),
+    ).fetchone()[0]
+
+
+def peek_next(con=None) -> str | None:
+    """
+    Oldest open, unleased item (no lease taken).
+    """
+    if con is None:
+        con = get_db()
+
+    row = con.execute(
+        """
+        SELECT content_id
+        FROM content_queue
+        WHERE leased_until IS NULL
+           OR leased_until <= ?
+        ORDER BY created_at, content_id
+        LIMIT 1
+        """,
+        (datetime.utcnow(),),
+    ).fetchone()
+
+    return row[0] if row else None
+
+
+def queue_status(con=None) -> dict:
+    if con is None:
+        con = get_db()
+
+    open_items, leased, taggers = con.execute(
+        """
+        SELECT
+            COUNT(*),
+            COUNT(*) FILTER (WHERE leased_until > ?),
+            COUNT(DISTINCT leased_by) FILTER (WHERE leased_until > ?)
+        FROM content_queue
+        """,
+        (datetime.utcnow(),) * 2,
+    ).fetchone()
+
+    return {
+        "open": open_items,
+        "leased": leased,
+        "available": open_items - leased,
+        "taggers": taggers,
+        "lease_seconds": CONTENT_LEASE_SECONDS,
+    }
@@ -1,9 +1,18 @@
+import base64
+from datetime import datetime
+
 from app.db import get_db
+from app.services.content_filter import all_of, compile_filter, has_tags, parse_filter, uses
 from app.services.content_validation import validate_content
+from app.services.tag_group_model import tag_group_model
+
+# Hard cap for one page of GET /content
+MAX_PAGE_SIZE = 200
 
 
-def get_content_snapshot(content_id: str):
-    con = get_db()
+def get_content_snapshot(content_id: str, con=None):
+    if con is None:
+        con = get_db()
 
     # -------------------------
     # Content
@@ -69,28 +78,31 @@ def get_content_snapshot(content_id: str):
     rows = con.execute(
         """
         SELECT
-            tg.id AS group_id,
+            t.group_id,
             t.id AS tag_id,
             t.label
         FROM content_tag ct
         JOIN tag t ON t.id = ct.tag_id
-        JOIN tag_group tg ON tg.id = t.group_id
         WHERE ct.content_id = ?
-        ORDER BY tg.position, t.usage_count DESC
+        ORDER BY t.usage_count DESC
         """,
         (content_id,),
     ).fetchall()
 
-    tags = {}
+    # Group order from the cached group model (unknown groups dropped)
+    model = tag_group_model.get(con)
+
+    tags = {g["id"]: [] for g in model.groups}
     for group_id, tag_id, label in rows:
-        tags.setdefault(group_id, []).append(
-            {"id": tag_id, "label": label}
-        )
+        if group_id in tags:
+            tags[group_id].append({"id": tag_id, "label": label})
+
+    tags = {group_id: items for group_id, items in tags.items() if items}
 
     # -------------------------
     # Validation
     # -------------------------
-    validation = validate_content(content_id)
+    validation = validate_content(content_id, con=con)
 
     total_required = sum(
         1 for g in validation["groups"] if g["required"]
@@ -125,11 +137,30 @@ def get_content_snapshot(content_id: str):
         },
     }
 
-def list_content_snapshots():
-    con = get_db()
+def list_content_snapshots(con=None):
+    """
+    List all content with preview + flat tag list in ONE query.
+
+    Tags are aggregated per content item with list(struct) instead of
+    one tag query per row.
+    """
+    if con is None:
+        con = get_db()
 
     rows = con.execute(
         """
+        WITH tags AS (
+            SELECT
+                ct.content_id,
+                list(
+                    {'id': t.id, 'label': t.label, 'group_id': tg.id}
+                    ORDER BY tg.position, t.usage_count DESC
+                ) AS tags
+            FROM content_tag ct
+            JOIN tag t ON t.id = ct.tag_id
+            JOIN tag_group tg ON tg.id = t.group_id
+            GROUP BY ct.content_id
+        )
         SELECT
             c.id,
             c.url,
@@ -137,21 +168,19 @@ def list_content_snapshots():
             c.created_at,
             cp.preview_status,
             cp.preview_url,
-            cp.preview_url_normalized
+            cp.preview_url_normalized,
+            tags.tags
         FROM content c
         LEFT JOIN content_preview cp
             ON cp.content_id = c.id
+        LEFT JOIN tags
+            ON tags.content_id = c.id
         ORDER BY c.created_at DESC
         """
     ).fetchall()
 
-
-    items = []
-
-    for row in rows:
-        content_id = row[0]
-
-        content = {
+    return [
+        {
             "id": row[0],
             "url": row[1],
             "status": row[2],
@@ -159,38 +188,174 @@ def list_content_snapshots():
             "preview": {
                 "status": row[4] or "pending",
                 "url": row[5],
-                "url_normalized" : row[6]
+                "url_normalized": row[6],
             },
+            "tags": row[7] or [],
         }
+        for row in rows
+    ]
+
+
+# ------------------------------------------------------------------
+# Keyset pagination
+# ------------------------------------------------------------------
+
+def encode_cursor(created_at: datetime, content_id: str) -> str:
+    raw = f"{created_at.isoformat()}|{content_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, content_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), content_id
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def list_content_page(
+    limit: int = 50,
+    cursor: str | None = None,
+    status: list[str] | None = None,
+    tag_ids: list[str] | None = None,
+    groups_complete: bool | None = None,
+    missing_group: str | None = None,
+    source_domain: str | None = None,
+    filter_text: str | None = None,
+    con=None,
+):
+    """
+    One page of content (newest first) with preview + flat tags.
+
+    Keyset-paginated on (created_at, id): the next page starts strictly
+    after the last row of this one, so cost does not grow with depth.
+
+    Filters:
+    - status: any of these statuses (default: everything but 'deleted')
+    - tag_ids: has ALL of these tags
+    - groups_complete: every tag group meets its min_count (or not)
+    - missing_group: this group is below its min_count
+    - source_domain: host of source_url (or url), subdomains included
+    - filter_text: filter expression (see content_filter.parse_filter)
+
+    All filters compile through content_filter and are ANDed.
+    """
+    if con is None:
+        con = get_db()
+
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+    where = []
+    params = []
+
+    if cursor:
+        after_created, after_id = decode_cursor(cursor)
+        where.append(
+            "(c.created_at < ? OR (c.created_at = ? AND c.id < ?))"
+        )
+        params += [after_created, after_created, after_id]
+
+    query = parse_filter(filter_text, con)
+
+    # Default: everything but 'deleted' (unless the filter asks for a status)
+    if status:
+        status_filter = ("status", status)
+    elif not uses(query, "status"):
+        status_filter = ("not", ("status", ["deleted"]))
+    else:
+        status_filter = None
 
-        tag_rows = con.execute(
-            """
+    if groups_complete is None:
+        complete_filter = None
+    elif groups_complete:
+        complete_filter = ("not", ("short", None))
+    else:
+        complete_filter = ("short", None)
+
+    node = all_of(
+        query,
+        status_filter,
+        has_tags(tag_ids),
+        complete_filter,
+        ("short", missing_group) if missing_group else None,
+        ("domain", source_domain.lower().strip(".")) if source_domain else None,
+    )
+
+    filter_sql, filter_params = compile_filter(node, con)
+    where.append(filter_sql)
+    params += filter_params
+
+    where_sql = " AND ".join(f"({w})" for w in where) or "TRUE"
+
+    rows = con.execute(
+        f"""
+        WITH page AS (
+            SELECT c.id, c.url, c.status, c.created_at
+            FROM content c
+            WHERE {where_sql}
+            ORDER BY c.created_at DESC, c.id DESC
+            LIMIT ?
+        ),
+        tags AS (
             SELECT
-                t.id,
-                t.label,
-                tg.id AS group_id
-            FROM content_tag ct
+                ct.content_id,
+                list(
+                    {{'id': t.id, 'label': t.label, 'group_id': tg.id}}
+                    ORDER BY tg.position, t.usage_count DESC
+                ) AS tags
+            FROM page
+            JOIN content_tag ct ON ct.content_id = page.id
             JOIN tag t ON t.id = ct.tag_id
             JOIN tag_group tg ON tg.id = t.group_id
-            WHERE ct.content_id = ?
-            ORDER BY tg.position, t.usage_count DESC
-            """,
-            (content_id,),
-        ).fetchall()
-
-        tags = [
-            {
-                "id": tag_id,
-                "label": label,
-                "group_id": group_id,
-            }
-            for tag_id, label, group_id in tag_rows
-        ]
-
-        items.append({
-            **content,
-            "tags": tags,
-        })
-
-    return items
+            GROUP BY ct.content_id
+        )
+        SELECT
+            page.id,
+            page.url,
+            page.status,
+            page.created_at,
+            cp.preview_status,
+            cp.preview_url,
+            cp.preview_url_normalized,
+            tags.tags
+        FROM page
+        LEFT JOIN content_preview cp
+            ON cp.content_id = page.id
+        LEFT JOIN tags
+            ON tags.content_id = page.id
+        ORDER BY page.created_at DESC, page.id DESC
+        """,
+        (*params, limit + 1),
+    ).fetchall()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
 
+    items = [
+        {
+            "id": row[0],
+            "url": row[1],
+            "status": row[2],
+            "created_at": row[3],
+            "preview": {
+                "status": row[4] or "pending",
+                "url": row[5],
+                "url_normalized": row[6],
+            },
+            "tags": row[7] or [],
+        }
+        for row in rows
+    ]
+
+    next_cursor = (
+        encode_cursor(rows[-1][3], rows[-1][0])
+        if has_more
+        else None
+    )
+
+    return {
+        "items": items,
+        "count": len(items),
+        "next_cursor": next_cursor,
+    }
@@ -1,55 +1,563 @@
+import json
+import logging
+import os
+import shutil
 import subprocess
 import threading
-import logging
+import time
+from datetime import datetime, timedelta
 from pathlib import Path
-from datetime import datetime
+from uuid import uuid4
+
+from app.db import get_db
+from app.db.backup import BackupError, read_manifest, stage_backup
 
 log = logging.getLogger(__name__)
 
-# Simple in-memory status (Phase 1)
-LAST_SYNC_STATUS = {
-    "status": "never",
-    "timestamp": None,
-    "error": None,
-}
-
-def _sync(snapshot_path: Path):
-    global LAST_SYNC_STATUS
-
-    try:
-        subprocess.run(
-            [
-                "rclone",
-                "copyto",
-                str(snapshot_path),
-                "gdrive:duckdb-backups/latest.duckdb",
-                "--checksum",
-            ],
-            check=True,
-            capture_output=True,
-            text=True,
+RCLONE_BIN = os.getenv("RCLONE_BIN", "rclone")
+# Mirror of the backup store (db/backup): <remote>/chunks, <remote>/manifests
+DRIVE_SYNC_REMOTE = os.getenv("DRIVE_SYNC_REMOTE", "gdrive:duckdb-backups")
+DRIVE_SYNC_MAX_ATTEMPTS = int(os.getenv("DRIVE_SYNC_MAX_ATTEMPTS", "5"))
+DRIVE_SYNC_RETRY_BASE = float(os.getenv("DRIVE_SYNC_RETRY_BASE", "30"))
+# One rclone run / waiting for the queue to drain on shutdown (seconds)
+DRIVE_SYNC_TIMEOUT = float(os.getenv("DRIVE_SYNC_TIMEOUT", "1800"))
+DRIVE_SYNC_DRAIN_TIMEOUT = float(os.getenv("DRIVE_SYNC_DRAIN_TIMEOUT", "120"))
+# Finished jobs kept (with their attempts) in the history
+DRIVE_SYNC_HISTORY = int(os.getenv("DRIVE_SYNC_HISTORY", "500"))
+
+
+class DriveSyncQueue:
+    """
+    Uploads database backups to Drive with rclone, one at a time.
+
+    A job names a backup manifest (see db.backup); uploading it mirrors
+    the local backup store, frozen for the upload (stage_backup hard
+    links, with the job's backup as latest.json): the chunks the remote
+    doesn't have yet are copied (only what changed since the last
+    upload), then the manifests, then chunks GC'd locally are deleted
+    from the remote. Backups / GC running meanwhile don't touch the
+    staged copy, so the remote's latest.json never references a
+    missing chunk, even if an upload is cut off.
+
+    The queue IS the drive_sync_job table, so queued uploads survive
+    restarts; one worker thread runs them.
+
+    - every upload brings the remote up to the local store, so a job
+      queued while an older one waits supersedes it (only the newest
+      backup is uploaded)
+    - failed uploads are retried with exponential backoff
+      (retry_base * 2^n seconds) up to `max_attempts`, then 'failed'
+    - each upload is recorded in drive_sync_attempt (duration, bytes
+      of the backup's new chunks, error)
+    - a backup whose content fingerprint (see db.snapshot) matches
+      the last uploaded one isn't uploaded again: the attempt is
+      recorded as 'skipped' (unchanged)
+    - `stop` lets the running upload finish and uploads a job that is
+      due (e.g. the final snapshot) before returning; jobs waiting on
+      backoff stay queued for the next start
+    """
+
+    def __init__(
+        self,
+        remote: str = DRIVE_SYNC_REMOTE,
+        rclone: str = RCLONE_BIN,
+        max_attempts: int = DRIVE_SYNC_MAX_ATTEMPTS,
+        retry_base: float = DRIVE_SYNC_RETRY_BASE,
+        timeout: float = DRIVE_SYNC_TIMEOUT,
+        drain_timeout: float = DRIVE_SYNC_DRAIN_TIMEOUT,
+    ):
+        self.remote = remote
+        self.rclone = rclone
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.timeout = timeout
+        self.drain_timeout = drain_timeout
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            "queued": 0,
+            "superseded": 0,
+            "uploaded": 0,
+            "skipped": 0,
+            "bytes_skipped": 0,
+            "retried": 0,
+            "failed": 0,
+        }
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+
+    def start(self):
+        if self._thread is not None:
+            if not self._stop.is_set():
+                return
+
+            # Still finishing after a timed-out stop(): let it, never
+            # run two workers
+            self._thread.join()
+            self._thread = None
+
+        # Uploads cut off by a crash / kill run again
+        con = get_db()
+        try:
+            con.execute(
+                "UPDATE drive_sync_job SET status = 'pending' WHERE status = 'running'"
+            )
+        finally:
+            con.close()
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="drive-sync",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self) -> bool:
+        """
+        Finish the running / queued upload (up to drain_timeout).
+        Returns False if the worker is still uploading: it keeps its
+        database connection, so don't close the database under it.
+        """
+        if self._thread is None:
+            return True
+
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(self.drain_timeout)
+
+        if self._thread.is_alive():
+            # Left 'running' if the process exits → retried on next start
+            log.warning("Drive sync still uploading after %.0f s, giving up", self.drain_timeout)
+            return False
+
+        self._thread = None
+        return True
+
+    def enqueue(self, snapshot_path: Path, fingerprint: str | None = None) -> str:
+        """
+        Queue an upload of the backup manifest `snapshot_path` (content
+        `fingerprint`, if known); supersedes any job still waiting.
+        Returns the job id.
+        """
+        job_id = str(uuid4())
+        now = datetime.utcnow()
+
+        con = get_db()
+        try:
+            con.execute("BEGIN")
+
+            superseded = con.execute(
+                """
+                UPDATE drive_sync_job
+                SET status = 'superseded', finished_at = ?
+                WHERE status = 'pending'
+                """,
+                (now,),
+            ).fetchone()[0]
+
+            con.execute(
+                """
+                INSERT INTO drive_sync_job
+                    (id, snapshot_path, remote, fingerprint, status, queued_at)
+                VALUES (?, ?, ?, ?, 'pending', ?)
+                """,
+                (job_id, str(snapshot_path), self.remote, fingerprint, now),
+            )
+
+            con.execute("COMMIT")
+
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        finally:
+            con.close()
+
+        with self._lock:
+            self.stats["queued"] += 1
+            self.stats["superseded"] += superseded
+
+        self._wake.set()
+        return job_id
+
+    # -------------------------
+    # Worker
+    # -------------------------
+
+    def _run(self):
+        while True:
+            self._wake.clear()
+
+            try:
+                job = self._next_job()
+            except Exception:
+                log.exception("Drive sync queue read failed")
+                job = None
+
+            due_in = None
+            if job is not None:
+                next_attempt_at = job[4]
+                due_in = (
+                    (next_attempt_at - datetime.utcnow()).total_seconds()
+                    if next_attempt_at is not None
+                    else 0
+                )
+
+            if due_in is not None and due_in <= 0:
+                try:
+                    self._upload(*job[:4])
+                except Exception:
+                    log.exception("Drive sync upload failed")
+                    # Don't spin on a job that can't be recorded
+                    if self._stop.is_set():
+                        break
+                    self._wake.wait(self.retry_base)
+                continue
+
+            if self._stop.is_set():
+                break
+
+            # None → sleep until a job is queued
+            self._wake.wait(due_in)
+
+    def _next_job(self):
+        """
+        Newest pending job (id, snapshot_path, fingerprint, attempts,
+        next_attempt_at);
+        older pending ones (a failure racing a newer enqueue, jobs left
+        from before a restart) are superseded.
+        """
+        con = get_db()
+        try:
+            rows = con.execute(
+                """
+                SELECT id, snapshot_path, fingerprint, attempts, next_attempt_at
+                FROM drive_sync_job
+                WHERE status = 'pending'
+                ORDER BY queued_at DESC
+                """
+            ).fetchall()
+
+            if len(rows) > 1:
+                con.execute(
+                    """
+                    UPDATE drive_sync_job
+                    SET status = 'superseded', finished_at = ?
+                    WHERE id IN (SELECT unnest(from_json(?, '["VARCHAR"]')))
+                    """,
+                    (datetime.utcnow(), json.dumps([r[0] for r in rows[1:]])),
+                )
+
+                with self._lock:
+                    self.stats["superseded"] += len(rows) - 1
+
+        finally:
+            con.close()
+
+        return rows[0] if rows else None
+
+    def _upload(self, job_id: str, snapshot_path: str, fingerprint: str | None, attempts: int):
+        attempt = attempts + 1
+        started_at = datetime.utcnow()
+        start = time.perf_counter()
+        size = None
+        error = None
+        outcome = "success"
+
+        con = get_db()
+        try:
+            con.execute(
+                "UPDATE drive_sync_job SET status = 'running', attempts = ? WHERE id = ?",
+                (attempt, job_id),
+            )
+
+            try:
+                # <store>/manifests/<name>.json
+                manifest = Path(snapshot_path)
+                store = manifest.parent.parent
+
+                if fingerprint is not None and fingerprint == self._uploaded_fingerprint(con):
+                    outcome = "skipped"
+                    size = read_manifest(manifest.name, store)["stored_bytes"]
+                else:
+                    size = self._sync_store(manifest.name, store)
+
+            except subprocess.CalledProcessError as e:
+                outcome = "failed"
+                error = (e.stderr or "").strip() or f"rclone exited with {e.returncode}"
+            except subprocess.TimeoutExpired:
+                outcome = "failed"
+                error = f"rclone timed out after {self.timeout:.0f} s"
+            except (OSError, ValueError, KeyError, BackupError) as e:
+                # Missing / unreadable manifest, missing rclone binary
+                outcome = "failed"
+                error = str(e)
+
+            duration_ms = round((time.perf_counter() - start) * 1000, 1)
+            self._finish(con, job_id, attempt, started_at, duration_ms, size, outcome, error)
+
+        finally:
+            con.close()
+
+    def _sync_store(self, name: str, store: Path) -> int:
+        """
+        Upload the store as of backup `name`; returns the bytes of the
+        chunks that backup added.
+        """
+        staging = store / "upload"
+        manifest = stage_backup(name, staging, store)
+
+        try:
+            self._rclone_mirror(staging)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return manifest["stored_bytes"]
+
+    def _rclone_mirror(self, store: Path):
+        for command, folder, flag in (
+            # New chunks first (chunks are immutable: size is enough) …
+            ("copy", "chunks", "--size-only"),
+            # … then the manifests that reference them …
+            ("sync", "manifests", "--checksum"),
+            # … then drop chunks no remote manifest references anymore
+            ("sync", "chunks", "--size-only"),
+        ):
+            subprocess.run(
+                [
+                    self.rclone,
+                    command,
+                    str(store / folder),
+                    f"{self.remote}/{folder}",
+                    flag,
+                ],
+                check=True,
+                capture_output=True,
+                text=True,
+                timeout=self.timeout,
+            )
+
+    def _uploaded_fingerprint(self, con) -> str | None:
+        """
+        Fingerprint of what the remote holds: the last backup
+        uploaded (or skipped as identical to it).
+        """
+        row = con.execute(
+            """
+            SELECT fingerprint
+            FROM drive_sync_job
+            WHERE remote = ? AND status IN ('success', 'skipped')
+            ORDER BY finished_at DESC
+            LIMIT 1
+            """,
+            (self.remote,),
+        ).fetchone()
+        return row[0] if row else None
+
+    def _finish(self, con, job_id, attempt, started_at, duration_ms, size, outcome, error):
+        now = datetime.utcnow()
+
+        if outcome != "failed":
+            status, next_attempt_at = outcome, None
+        elif attempt >= self.max_attempts:
+            status, next_attempt_at = "failed", None
+        else:
+            status = "pending"
+            next_attempt_at = now + timedelta(seconds=self.retry_base * 2 ** (attempt - 1))
+
+        con.execute("BEGIN")
+        try:
+            con.execute(
+                """
+                INSERT INTO drive_sync_attempt
+                    (job_id, attempt, started_at, duration_ms, bytes, status, error)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                """,
+                (job_id, attempt, started_at, duration_ms,
+                 size if outcome != "skipped" else 0, outcome, error),
+            )
+
+            con.execute(
+                """
+                UPDATE drive_sync_job
+                SET status = ?, next_attempt_at = ?, finished_at = ?
+                WHERE id = ?
+                """,
+                (status, next_attempt_at, None if status == "pending" else now, job_id),
+            )
+
+            if status != "pending":
+                self._prune(con)
+
+            con.execute("COMMIT")
+
+        except Exception:
+            con.execute("ROLLBACK")
+            log.exception("Drive sync history write failed")
+
+        with self._lock:
+            if status == "success":
+                self.stats["uploaded"] += 1
+            elif status == "skipped":
+                self.stats["skipped"] += 1
+                self.stats["bytes_skipped"] += size
+            elif status == "failed":
+                self.stats["failed"] += 1
+            else:
+                self.stats["retried"] += 1
+
+        if outcome == "success":
+            log.info("✅ Drive sync successful (%s bytes, %.0f ms)", size, duration_ms)
+        elif outcome == "skipped":
+            log.info("⏭️  Drive sync skipped: unchanged")
+        else:
+            log.error("❌ Drive sync failed (attempt %d/%d): %s", attempt, self.max_attempts, error)
+
+    def _prune(self, con):
+        con.execute(
+            """
+            DELETE FROM drive_sync_attempt
+            WHERE job_id IN (
+                SELECT id FROM drive_sync_job
+                WHERE finished_at IS NOT NULL
+                ORDER BY finished_at DESC
+                OFFSET ?
+            )
+            """,
+            (DRIVE_SYNC_HISTORY,),
+        )
+
+        con.execute(
+            """
+            DELETE FROM drive_sync_job
+            WHERE id IN (
+                SELECT id FROM drive_sync_job
+                WHERE finished_at IS NOT NULL
+                ORDER BY finished_at DESC
+                OFFSET ?
+            )
+            """,
+            (DRIVE_SYNC_HISTORY,),
         )
 
-        LAST_SYNC_STATUS.update({
-            "status": "success",
-            "timestamp": datetime.utcnow().isoformat(),
-            "error": None,
-        })
-
-        log.info("✅ Drive sync successful")
-
-    except subprocess.CalledProcessError as e:
-        LAST_SYNC_STATUS.update({
-            "status": "failed",
-            "timestamp": datetime.utcnow().isoformat(),
-            "error": e.stderr,
-        })
-
-        log.error("❌ Drive sync failed")
-
-def enqueue_drive_sync(snapshot_path: Path):
-    threading.Thread(
-        target=_sync,
-        args=(snapshot_path,),
-        daemon=True,
-    ).start()
+    # -------------------------
+    # Reporting
+    # -------------------------
+
+    def last_sync(self, con=None) -> dict:
+        """
+        Outcome of the latest upload attempt.
+        """
+        if con is None:
+            con = get_db()
+
+        row = con.execute(
+            """
+            SELECT status, started_at, error
+            FROM drive_sync_attempt
+            ORDER BY started_at DESC
+            LIMIT 1
+            """
+        ).fetchone()
+
+        if row is None:
+            return {"status": "never", "timestamp": None, "error": None}
+
+        return {
+            "status": "skipped: unchanged" if row[0] == "skipped" else row[0],
+            "timestamp": row[1].isoformat(),
+            "error": row[2],
+        }
+
+    def history(self, limit: int = 20, con=None) -> list[dict]:
+        """
+        Latest upload attempts, newest first.
+        """
+        if con is None:
+            con = get_db()
+
+        rows = con.execute(
+            """
+            SELECT
+                a.job_id,
+                j.snapshot_path,
+                j.status,
+                a.attempt,
+                a.status,
+                a.started_at,
+                a.duration_ms,
+                a.bytes,
+                a.error
+            FROM drive_sync_attempt a
+            JOIN drive_sync_job j ON j.id = a.job_id
+            ORDER BY a.started_at DESC
+            LIMIT ?
+            """,
+            (limit,),
+        ).fetchall()
+
+        return [
+            {
+                "job_id": r[0],
+                "snapshot": r[1],
+                "job_status": r[2],
+                "attempt": r[3],
+                "status": r[4],
+                "started_at": r[5],
+                "duration_ms": r[6],
+                "bytes": r[7],
+                "error": r[8],
+            }
+            for r in rows
+        ]
+
+    def status(self, con=None) -> dict:
+        if con is None:
+            con = get_db()
+
+        # One read: a job is never seen between 'pending' and 'running'
+        rows = con.execute(
+            """
+            SELECT id, snapshot_path, attempts, next_attempt_at, queued_at, status
+            FROM drive_sync_job
+            WHERE status IN ('pending', 'running')
+            ORDER BY queued_at DESC
+            """
+        ).fetchall()
+
+        queued = next((r for r in rows if r[5] == "pending"), None)
+        uploading = next((r[0] for r in rows if r[5] == "running"), None)
+
+        last_sync = self.last_sync(con=con)
+
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "uploading": uploading,
+                "queued": (
+                    {
+                        "job_id": queued[0],
+                        "snapshot": queued[1],
+                        "attempts": queued[2],
+                        "next_attempt_at": queued[3],
+                        "queued_at": queued[4],
+                    }
+                    if queued
+                    else None
+                ),
+                "remote": self.remote,
+                "max_attempts": self.max_attempts,
+                "retry_base": self.retry_base,
+                "totals": dict(self.stats),
+                "last_sync": last_sync,
+            }
+
+
+drive_sync = DriveSyncQueue()
@@ -0,0 +1,182 @@
+import os
+from threading import Lock
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# Host pools kept alive at once / keep-alive connections per host
+HTTP_POOL_HOSTS = int(os.getenv("HTTP_POOL_HOSTS", "32"))
+HTTP_POOL_PER_HOST = int(os.getenv("HTTP_POOL_PER_HOST", "8"))
+
+HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "10"))
+
+# Retries on connect errors / 429 / 5xx, with exponential backoff
+HTTP_RETRIES = int(os.getenv("HTTP_RETRIES", "2"))
+HTTP_BACKOFF = float(os.getenv("HTTP_BACKOFF", "0.5"))
+
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+
+class HttpClient:
+    """
+    Process-wide outbound HTTP client.
+
+    Wraps ONE requests.Session whose adapters keep a urllib3 connection
+    pool per host, so repeated calls to the same provider (Imgur JSON
+    endpoints, preview pages, ...) reuse keep-alive connections instead
+    of doing a new TCP + TLS handshake each time. urllib3 pools are
+    thread-safe; the session is shared by the expand threads and the
+    preview worker.
+
+    Counters (see `stats`) come from the connection pools themselves:
+    `attempts` counts every request sent on the wire (retries included)
+    and `connections_opened` every new socket, so
+    attempts - connections_opened is the number of reused connections.
+    """
+
+    def __init__(
+        self,
+        pool_hosts: int = HTTP_POOL_HOSTS,
+        pool_per_host: int = HTTP_POOL_PER_HOST,
+        timeout: tuple[float, float] = (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT),
+        retries: int = HTTP_RETRIES,
+        backoff: float = HTTP_BACKOFF,
+    ):
+        self.pool_hosts = pool_hosts
+        self.pool_per_host = pool_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+
+        self._session = None
+        self._lock = Lock()
+        self._stats_lock = Lock()
+
+        self._stats = {
+            "requests": 0,
+            "attempts": 0,
+            "connections_opened": 0,
+            "errors": 0,
+        }
+
+    # -------------------------
+    # Session lifecycle
+    # -------------------------
+
+    @property
+    def session(self) -> requests.Session:
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = self._build_session()
+        return self._session
+
+    def _build_session(self) -> requests.Session:
+        retry = Retry(
+            total=self.retries,
+            connect=self.retries,
+            read=self.retries,
+            status=self.retries,
+            status_forcelist=RETRY_STATUSES,
+            allowed_methods=frozenset({"GET", "HEAD"}),
+            backoff_factor=self.backoff,
+            raise_on_status=False,
+        )
+
+        adapter = _CountingAdapter(
+            self._count,
+            pool_connections=self.pool_hosts,
+            pool_maxsize=self.pool_per_host,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def close(self):
+        with self._lock:
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+    # -------------------------
+    # Requests
+    # -------------------------
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        requests.get() on the shared session (default timeouts applied).
+        """
+        kwargs.setdefault("timeout", self.timeout)
+        self._count("requests")
+
+        try:
+            return self.session.get(url, **kwargs)
+        except requests.RequestException:
+            self._count("errors")
+            raise
+
+    # -------------------------
+    # Metrics
+    # -------------------------
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    @property
+    def stats(self) -> dict:
+        with self._stats_lock:
+            stats = dict(self._stats)
+
+        stats["connections_reused"] = max(
+            0, stats["attempts"] - stats["connections_opened"]
+        )
+        stats["retries"] = max(0, stats["attempts"] - stats["requests"])
+        return stats
+
+
+class _CountingAdapter(HTTPAdapter):
+    """
+    HTTPAdapter whose pools report wire requests and new connections.
+    """
+
+    def __init__(self, count, **kwargs):
+        self._count_fn = count
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+
+        count = self._count_fn
+
+        class CountingHTTPPool(HTTPConnectionPool):
+            def _new_conn(self):
+                count("connections_opened")
+                return super()._new_conn()
+
+            def _make_request(self, *a, **kw):
+                count("attempts")
+                return super()._make_request(*a, **kw)
+
+        class CountingHTTPSPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                count("connections_opened")
+                return super()._new_conn()
+
+            def _make_request(self, *a, **kw):
+                count("attempts")
+                return super()._make_request(*a, **kw)
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": CountingHTTPPool,
+            "https": CountingHTTPSPool,
+        }
+
+
+http_client = HttpClient()
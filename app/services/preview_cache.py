@@ -0,0 +1,324 @@
+import os
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from threading import Lock
+from urllib.parse import urlparse
+
+from app.db import get_db
+
+# Positive / negative (failed fetch) lifetimes, in seconds
+PREVIEW_CACHE_TTL = int(os.getenv("PREVIEW_CACHE_TTL", str(7 * 24 * 3600)))
+PREVIEW_CACHE_NEGATIVE_TTL = int(os.getenv("PREVIEW_CACHE_NEGATIVE_TTL", "600"))
+
+# Entries kept in the in-process LRU
+PREVIEW_CACHE_SIZE = int(os.getenv("PREVIEW_CACHE_SIZE", "4096"))
+
+# Expired rows are deleted at most this often (seconds), on a cache write
+PREVIEW_CACHE_SWEEP_INTERVAL = int(os.getenv("PREVIEW_CACHE_SWEEP_INTERVAL", "3600"))
+
+PREVIEW_FIELDS = (
+    "preview_type",
+    "preview_url",
+    "preview_url_normalized",
+    "title",
+    "description",
+)
+
+
+class CachedPreviewFailure(Exception):
+    """
+    The URL failed recently and is still in the negative cache.
+    """
+
+
+class PreviewCache:
+    """
+    URL → preview cache shared by expand, bulk create, the preview
+    worker and preview rebuilds.
+
+    Two tiers:
+      - an in-process LRU (PREVIEW_CACHE_SIZE entries)
+      - the `preview_cache` table, so entries survive restarts
+
+    Entries expire after PREVIEW_CACHE_TTL; failed fetches are cached
+    as negative entries for PREVIEW_CACHE_NEGATIVE_TTL so the same
+    broken URL is not fetched again by every caller. Expired rows are
+    swept from the table every PREVIEW_CACHE_SWEEP_INTERVAL.
+
+    Keys are computed by the caller (see content_preview.preview_cache_key).
+    """
+
+    def __init__(
+        self,
+        ttl: int = PREVIEW_CACHE_TTL,
+        negative_ttl: int = PREVIEW_CACHE_NEGATIVE_TTL,
+        size: int = PREVIEW_CACHE_SIZE,
+        sweep_interval: int = PREVIEW_CACHE_SWEEP_INTERVAL,
+    ):
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.size = size
+        self.sweep_interval = sweep_interval
+
+        self._lru: OrderedDict[str, dict] = OrderedDict()
+        self._lock = Lock()
+        self._swept_at = None  # monotonic; None → sweep on the first write
+
+        self.stats = {
+            "memory_hits": 0,
+            "db_hits": 0,
+            "negative_hits": 0,
+            "misses": 0,
+            "stored": 0,
+            "failures_stored": 0,
+            "purged": 0,
+            "expired_removed": 0,
+        }
+
+    # -------------------------
+    # Lookup
+    # -------------------------
+
+    def get(self, key: str, con=None, negative: bool = True) -> dict | None:
+        """
+        Cached preview for `key`, or None on a miss.
+
+        Raises CachedPreviewFailure for a live negative entry (unless
+        negative=False, which treats it as a miss).
+        """
+        now = datetime.utcnow()
+
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self._lru.move_to_end(key)
+                else:
+                    del self._lru[key]
+                    entry = None
+
+        source = "memory_hits"
+
+        if entry is None:
+            entry = self._load(key, now, con)
+            source = "db_hits"
+
+            if entry is not None:
+                self._remember(key, entry)
+
+        if entry is None or (entry["error"] is not None and not negative):
+            self._count("misses")
+            return None
+
+        if entry["error"] is not None:
+            self._count("negative_hits")
+            raise CachedPreviewFailure(entry["error"])
+
+        self._count(source)
+        return {field: entry[field] for field in PREVIEW_FIELDS}
+
+    def _load(self, key: str, now: datetime, con=None) -> dict | None:
+        if con is None:
+            con = get_db()
+
+        row = con.execute(
+            f"""
+            SELECT {", ".join(PREVIEW_FIELDS)}, error, expires_at
+            FROM preview_cache
+            WHERE url_key = ?
+              AND expires_at > ?
+            """,
+            (key, now),
+        ).fetchone()
+
+        if not row:
+            return None
+
+        return dict(zip((*PREVIEW_FIELDS, "error", "expires_at"), row))
+
+    # -------------------------
+    # Store
+    # -------------------------
+
+    def put(self, key: str, preview: dict, con=None):
+        self._write(key, preview, None, self.ttl, con)
+        self._count("stored")
+
+    def put_failure(self, key: str, error, con=None):
+        self._write(key, {}, str(error)[:500] or type(error).__name__, self.negative_ttl, con)
+        self._count("failures_stored")
+
+    def _write(self, key: str, preview: dict, error: str | None, ttl: int, con=None):
+        if con is None:
+            con = get_db()
+
+        now = datetime.utcnow()
+        entry = {
+            **{field: preview.get(field) for field in PREVIEW_FIELDS},
+            "error": error,
+            "expires_at": now + timedelta(seconds=ttl),
+        }
+
+        con.execute(
+            """
+            INSERT INTO preview_cache (
+                url_key,
+                host,
+                preview_type,
+                preview_url,
+                preview_url_normalized,
+                title,
+                description,
+                error,
+                fetched_at,
+                expires_at
+            )
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ON CONFLICT(url_key) DO UPDATE SET
+                host = excluded.host,
+                preview_type = excluded.preview_type,
+                preview_url = excluded.preview_url,
+                preview_url_normalized = excluded.preview_url_normalized,
+                title = excluded.title,
+                description = excluded.description,
+                error = excluded.error,
+                fetched_at = excluded.fetched_at,
+                expires_at = excluded.expires_at
+            """,
+            (
+                key,
+                _host(key),
+                *(entry[field] for field in PREVIEW_FIELDS),
+                error,
+                now,
+                entry["expires_at"],
+            ),
+        )
+
+        self._remember(key, entry)
+
+        if self._sweep_due():
+            self.sweep(con=con)
+
+    def _remember(self, key: str, entry: dict):
+        with self._lock:
+            self._lru[key] = entry
+            self._lru.move_to_end(key)
+
+            while len(self._lru) > self.size:
+                self._lru.popitem(last=False)
+
+    # -------------------------
+    # Admin
+    # -------------------------
+
+    def purge_host(self, host: str, con=None) -> int:
+        """
+        Drop every entry for `host` and its subdomains (both tiers).
+        Returns the number of table rows removed.
+        """
+        if con is None:
+            con = get_db()
+
+        host = host.strip().lower()
+        if not host:
+            raise ValueError("host is required")
+
+        purged = con.execute(
+            """
+            DELETE FROM preview_cache
+            WHERE host = ? OR ends_with(host, '.' || ?)
+            """,
+            (host, host),
+        ).fetchone()[0]
+
+        with self._lock:
+            for key in [k for k in self._lru if _matches(_host(k), host)]:
+                del self._lru[key]
+            self.stats["purged"] += purged
+
+        return purged
+
+    def sweep(self, con=None) -> int:
+        """
+        Delete expired entries (both tiers). Returns the number of table
+        rows removed.
+        """
+        if con is None:
+            con = get_db()
+
+        now = datetime.utcnow()
+
+        removed = con.execute(
+            "DELETE FROM preview_cache WHERE expires_at <= ?",
+            (now,),
+        ).fetchone()[0]
+
+        with self._lock:
+            for key in [k for k, e in self._lru.items() if e["expires_at"] <= now]:
+                del self._lru[key]
+            self.stats["expired_removed"] += removed
+
+        return removed
+
+    def _sweep_due(self) -> bool:
+        # Claims the sweep, so concurrent writers don't all run it
+        now = time.monotonic()
+
+        with self._lock:
+            if self._swept_at is not None and now - self._swept_at < self.sweep_interval:
+                return False
+            self._swept_at = now
+            return True
+
+    def status(self, con=None) -> dict:
+        if con is None:
+            con = get_db()
+
+        entries, negative, expired = con.execute(
+            """
+            SELECT
+                COUNT(*),
+                COUNT(*) FILTER (WHERE error IS NOT NULL),
+                COUNT(*) FILTER (WHERE expires_at <= ?)
+            FROM preview_cache
+            """,
+            (datetime.utcnow(),),
+        ).fetchone()
+
+        with self._lock:
+            memory = len(self._lru)
+            stats = dict(self.stats)
+
+        lookups = sum(stats[k] for k in ("memory_hits", "db_hits", "negative_hits", "misses"))
+        hits = lookups - stats["misses"]
+
+        return {
+            "ttl": self.ttl,
+            "negative_ttl": self.negative_ttl,
+            "memory_size": self.size,
+            "memory_entries": memory,
+            "entries": entries,
+            "negative_entries": negative,
+            "expired_entries": expired,
+            "hit_ratio": round(hits / lookups, 3) if lookups else None,
+            **stats,
+        }
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+
+def _host(url: str) -> str:
+    # Without port / userinfo, so purge_host("example.com") matches
+    # example.com:8080 too
+    return urlparse(url).hostname or ""
+
+
+def _matches(host: str, target: str) -> bool:
+    return host == target or host.endswith("." + target)
+
+
+preview_cache = PreviewCache()
@@ -0,0 +1,305 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+from app.db import get_db
+from app.services.content_preview import (
+    extract_preview_from_url,
+    store_preview,
+)
+
+log = logging.getLogger(__name__)
+
+PREVIEW_WORKERS = int(os.getenv("PREVIEW_WORKERS", "4"))
+PREVIEW_PER_HOST = int(os.getenv("PREVIEW_PER_HOST", "2"))
+PREVIEW_MAX_ATTEMPTS = int(os.getenv("PREVIEW_MAX_ATTEMPTS", "3"))
+PREVIEW_RETRY_BASE = float(os.getenv("PREVIEW_RETRY_BASE", "30"))
+PREVIEW_POLL_INTERVAL = float(os.getenv("PREVIEW_POLL_INTERVAL", "5"))
+
+
+class PreviewWorker:
+    """
+    Background pool that drains `content_preview` rows in 'pending'.
+
+    - at most `concurrency` fetches in flight
+    - at most `per_host` fetches in flight per host
+    - failed fetches are retried with exponential backoff
+      (PREVIEW_RETRY_BASE * 2^n seconds) up to `max_attempts`,
+      then marked 'failed'
+
+    The queue IS the table (idx_preview_status), so pending work
+    survives restarts.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = PREVIEW_WORKERS,
+        per_host: int = PREVIEW_PER_HOST,
+        max_attempts: int = PREVIEW_MAX_ATTEMPTS,
+        retry_base: float = PREVIEW_RETRY_BASE,
+        poll_interval: float = PREVIEW_POLL_INTERVAL,
+    ):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.max_attempts = max_attempts
+        self.retry_base = retry_base
+        self.poll_interval = poll_interval
+
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+        self._pool = None
+
+        self._in_flight: dict[str, str] = {}  # content_id → host
+        self._by_host: dict[str, int] = {}
+
+        self.stats = {
+            "processed": 0,
+            "ready": 0,
+            "failed": 0,
+            "retried": 0,
+        }
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.concurrency,
+            thread_name_prefix="preview",
+        )
+        self._thread = threading.Thread(
+            target=self._run,
+            name="preview-dispatcher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self, wait: bool = True):
+        if self._thread is None:
+            return
+
+        self._stop.set()
+        self._wake.set()
+        self._thread.join()
+        self._thread = None
+
+        # In-flight fetches finish; anything not started stays
+        # 'pending' in the table and is picked up on next start.
+        self._pool.shutdown(wait=wait, cancel_futures=True)
+        self._pool = None
+
+        with self._lock:
+            self._in_flight.clear()
+            self._by_host.clear()
+
+    def wake(self):
+        """
+        Signal that new pending previews were written.
+        """
+        self._wake.set()
+
+    # -------------------------
+    # Dispatch
+    # -------------------------
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+
+            try:
+                self._dispatch()
+            except Exception:
+                log.exception("Preview dispatch failed")
+
+            self._wake.wait(self.poll_interval)
+
+    def _dispatch(self):
+        with self._lock:
+            free = self.concurrency - len(self._in_flight)
+            busy = list(self._in_flight)
+
+        if free <= 0:
+            return
+
+        busy_sql = (
+            f"AND cp.content_id NOT IN ({','.join('?' * len(busy))})"
+            if busy
+            else ""
+        )
+
+        con = get_db()
+        try:
+            rows = con.execute(
+                f"""
+                SELECT cp.content_id, c.url
+                FROM content_preview cp
+                JOIN content c ON c.id = cp.content_id
+                WHERE cp.preview_status = 'pending'
+                  AND (cp.next_attempt_at IS NULL OR cp.next_attempt_at <= ?)
+                  AND c.status IS DISTINCT FROM 'deleted'
+                  {busy_sql}
+                ORDER BY cp.next_attempt_at NULLS FIRST, c.created_at
+                LIMIT ?
+                """,
+                (datetime.utcnow(), *busy, free * 4),
+            ).fetchall()
+        finally:
+            con.close()
+
+        for content_id, url in rows:
+            host = urlparse(url).netloc.lower()
+
+            with self._lock:
+                if len(self._in_flight) >= self.concurrency:
+                    break
+                if self._by_host.get(host, 0) >= self.per_host:
+                    continue
+
+                self._in_flight[content_id] = host
+                self._by_host[host] = self._by_host.get(host, 0) + 1
+
+            self._pool.submit(self._process, content_id, url)
+
+    # -------------------------
+    # Work
+    # -------------------------
+
+    def _process(self, content_id: str, url: str):
+        con = get_db()
+        attempts = 0
+        try:
+            attempts = con.execute(
+                "SELECT attempts FROM content_preview WHERE content_id = ?",
+                (content_id,),
+            ).fetchone()
+
+            attempts = (attempts[0] or 0) if attempts else 0
+
+            try:
+                # Cached failures are ignored: retries are this
+                # worker's own backoff schedule
+                preview = extract_preview_from_url(url, con=con, negative=False)
+            except Exception as e:
+                self._record_failure(con, content_id, attempts + 1, e)
+                return
+
+            status = (
+                "ready"
+                if preview["preview_type"] != "unknown"
+                else "failed"
+            )
+            store_preview(content_id, preview, status, con=con)
+
+            with self._lock:
+                self.stats["processed"] += 1
+                self.stats[status] += 1
+
+        except Exception as e:
+            log.exception("Preview worker failed for %s", content_id)
+            # e.g. store_preview failed: same backoff / attempt limit as
+            # a failed fetch, or the row is dispatched again every loop
+            self._record_failure_safely(content_id, attempts + 1, e)
+
+        finally:
+            con.close()
+
+            with self._lock:
+                host = self._in_flight.pop(content_id, None)
+                if host is not None:
+                    self._by_host[host] -= 1
+                    if not self._by_host[host]:
+                        del self._by_host[host]
+
+            # A slot freed up → look for more work right away
+            self._wake.set()
+
+    def _record_failure_safely(self, content_id: str, attempts: int, error):
+        # Fresh cursor: the failed one may be mid-transaction / unusable
+        try:
+            con = get_db()
+            try:
+                self._record_failure(con, content_id, attempts, error)
+            finally:
+                con.close()
+        except Exception:
+            log.exception("Could not record preview failure for %s", content_id)
+
+    def _record_failure(self, con, content_id: str, attempts: int, error):
+        if attempts >= self.max_attempts:
+            status = "failed"
+            next_attempt_at = None
+        else:
+            status = "pending"
+            next_attempt_at = datetime.utcnow() + timedelta(
+                seconds=self.retry_base * 2 ** (attempts - 1)
+            )
+
+        con.execute(
+            """
+            UPDATE content_preview
+            SET preview_status = ?,
+                attempts = ?,
+                next_attempt_at = ?,
+                last_error = ?,
+                fetched_at = ?
+            WHERE content_id = ?
+            """,
+            (
+                status,
+                attempts,
+                next_attempt_at,
+                str(error)[:500],
+                datetime.utcnow(),
+                content_id,
+            ),
+        )
+
+        with self._lock:
+            self.stats["processed"] += 1
+            self.stats["retried" if status == "pending" else "failed"] += 1
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+
+    def queue_status(self, con=None) -> dict:
+        if con is None:
+            con = get_db()
+
+        pending, due = con.execute(
+            """
+            SELECT
+                COUNT(*),
+                COUNT(*) FILTER (
+                    WHERE next_attempt_at IS NULL OR next_attempt_at <= ?
+                )
+            FROM content_preview
+            WHERE preview_status = 'pending'
+            """,
+            (datetime.utcnow(),),
+        ).fetchone()
+
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "pending": pending,
+                "due": due,
+                "in_flight": len(self._in_flight),
+                "in_flight_by_host": dict(self._by_host),
+                "concurrency": self.concurrency,
+                "per_host": self.per_host,
+                **self.stats,
+            }
+
+
+preview_worker = PreviewWorker()
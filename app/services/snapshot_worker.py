@@ -0,0 +1,231 @@
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from app.db import get_db
+from app.db.backup import write_backup
+from app.db.snapshot import SNAPSHOT_PATH, snapshot_db
+from app.services.drive_sync import drive_sync
+
+log = logging.getLogger(__name__)
+
+# At most one snapshot per SNAPSHOT_INTERVAL seconds, unless
+# SNAPSHOT_MAX_CHANGES rows changed since the last one
+SNAPSHOT_INTERVAL = float(os.getenv("SNAPSHOT_INTERVAL", "300"))
+SNAPSHOT_MAX_CHANGES = int(os.getenv("SNAPSHOT_MAX_CHANGES", "10000"))
+
+
+class SnapshotWorker:
+    """
+    Debounced database snapshots, taken off the request path; each is
+    stored as a chunked backup (db.backup) and handed to Drive sync.
+
+    Writes only call `mark_dirty(changed_rows)`. One background thread
+    writes a snapshot once the database is dirty AND either `interval`
+    seconds have passed since the previous snapshot or `max_changes`
+    rows changed since it: however many requests write, there is at
+    most one snapshot per window (sooner only under heavy change), so
+    snapshot / upload cost follows the change rate.
+
+    `flush` forces a snapshot now; `stop` writes pending changes before
+    shutdown.
+    """
+
+    def __init__(
+        self,
+        path: Path = SNAPSHOT_PATH,
+        interval: float = SNAPSHOT_INTERVAL,
+        max_changes: int = SNAPSHOT_MAX_CHANGES,
+    ):
+        self.path = path
+        self.interval = interval
+        self.max_changes = max_changes
+
+        self._lock = threading.Lock()
+        self._changes = 0       # rows changed since the last snapshot
+        self._forced = False
+        self._running = False
+        self._last_at = None    # monotonic start of the last snapshot
+        self._retry_at = None   # monotonic time a failed snapshot may be retried
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.last = None  # {"path", "bytes", "duration_ms", "created_at", "backup", ...}
+        self.stats = {
+            "marked": 0,
+            "changes": 0,
+            "snapshots": 0,
+            "forced": 0,
+            "failed": 0,
+            "last_error": None,
+        }
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        # The window runs from the snapshot already on disk (if any)
+        if self._last_at is None and self.path.exists():
+            age = time.time() - self.path.stat().st_mtime
+            self._last_at = time.monotonic() - max(age, 0)
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="snapshot-worker",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+
+        # Forced flush: don't lose changes made since the last snapshot
+        if self._changes or self._forced:
+            self._snapshot()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self._wake.clear()
+
+            delay = self._due_in()
+            if delay is not None and delay <= 0:
+                self._snapshot()
+                continue
+
+            # None → sleep until marked dirty
+            self._wake.wait(delay)
+
+    # -------------------------
+    # Scheduling
+    # -------------------------
+
+    def mark_dirty(self, changes: int = 1) -> Path:
+        """
+        Record `changes` written rows; returns the path the next
+        snapshot will be written to.
+        """
+        if changes > 0:
+            with self._lock:
+                self._changes += changes
+                self.stats["marked"] += 1
+                self.stats["changes"] += changes
+
+            # The worker recomputes its deadline (or starts right away)
+            self._wake.set()
+
+        return self.path
+
+    def flush(self):
+        """
+        Snapshot as soon as the worker is free, regardless of window.
+        """
+        with self._lock:
+            self._forced = True
+            self.stats["forced"] += 1
+
+        self._wake.set()
+
+    def _due_in(self) -> float | None:
+        """
+        Seconds until the next snapshot is due (<= 0: now), or None
+        when nothing changed. After a failure nothing is due before
+        the retry time, whatever the threshold / flush.
+        """
+        with self._lock:
+            if not (self._changes or self._forced):
+                return None
+            if self._retry_at is not None and self._retry_at > time.monotonic():
+                return self._retry_at - time.monotonic()
+            if self._forced or self._changes >= self.max_changes:
+                return 0.0
+            if self._last_at is None:
+                return 0.0
+            return self._last_at + self.interval - time.monotonic()
+
+    # -------------------------
+    # Snapshot
+    # -------------------------
+
+    def _snapshot(self):
+        with self._lock:
+            changes, self._changes = self._changes, 0
+            self._forced = False
+            self._running = True
+            self._last_at = time.monotonic()
+
+        con = get_db()
+        try:
+            result = snapshot_db(con, self.path)
+            backup = write_backup(self.path, result["fingerprint"])
+
+        except Exception as e:
+            log.exception("Database snapshot / backup failed")
+
+            # Retried when the next window opens
+            with self._lock:
+                self._retry_at = time.monotonic() + self.interval
+                self._changes += changes
+                self._running = False
+                self.stats["failed"] += 1
+                self.stats["last_error"] = str(e)
+            return
+
+        finally:
+            con.close()
+
+        with self._lock:
+            self._running = False
+            self._retry_at = None
+            self.last = {
+                **result,
+                "changes": changes,
+                "backup": {
+                    key: backup[key]
+                    for key in ("name", "unchanged", "chunks", "new_chunks", "new_bytes", "stored_bytes")
+                },
+            }
+            self.stats["snapshots"] += 1
+            self.stats["last_error"] = None
+
+        log.info(
+            "📸 Snapshot %s (%d changes, %d bytes, %.0f ms) → backup %s (%d/%d new chunks)",
+            result["path"], changes, result["bytes"], result["duration_ms"],
+            backup["name"], backup["new_chunks"], backup["chunks"],
+        )
+
+        drive_sync.enqueue(Path(backup["manifest"]), result["fingerprint"])
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+
+    def status(self) -> dict:
+        due_in = self._due_in()
+
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "pending": bool(self._changes or self._forced),
+                "in_progress": self._running,
+                "pending_changes": self._changes,
+                "due_in": round(max(due_in, 0.0), 1) if due_in is not None else None,
+                "interval": self.interval,
+                "max_changes": self.max_changes,
+                "last": self.last,
+                **self.stats,
+            }
+
+
+snapshot_worker = SnapshotWorker()
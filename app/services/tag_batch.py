@@ -0,0 +1,185 @@
+import json
+from datetime import datetime
+
+from app.db import get_db
+from app.services.content_group_count import apply_group_counts
+from app.services.tag_bitmap import tag_bitmaps
+from app.services.tag_usage import tag_usage
+from app.services.tag_validation import validate_tag_assignment_batch
+
+
+def _ids(values: list[str]) -> list[str]:
+    # Deduplicate, keep order
+    return list(dict.fromkeys(values))
+
+
+def _load_pairs(con, content_ids: list[str], tag_ids: list[str]):
+    """
+    content_ids × tag_ids → temp table _batch_pairs.
+    """
+    con.execute(
+        """
+        CREATE OR REPLACE TEMP TABLE _batch_pairs AS
+        SELECT c.content_id, t.tag_id
+        FROM (SELECT unnest(from_json(?, '["VARCHAR"]')) AS content_id) c
+        CROSS JOIN (SELECT unnest(from_json(?, '["VARCHAR"]')) AS tag_id) t
+        """,
+        (json.dumps(content_ids), json.dumps(tag_ids)),
+    )
+
+
+def _usage_deltas(con) -> dict[str, int]:
+    return dict(
+        con.execute(
+            """
+            SELECT tag_id, COUNT(*)
+            FROM _batch_changed
+            GROUP BY tag_id
+            """
+        ).fetchall()
+    )
+
+
+def _changed_pairs(con) -> list[tuple[str, str]]:
+    return con.execute("SELECT content_id, tag_id FROM _batch_changed").fetchall()
+
+
+def assign_tags_batch(content_ids: list[str], tag_ids: list[str], con=None) -> dict:
+    """
+    Assign every tag in tag_ids to every item in content_ids.
+
+    One transaction: max_count validation for all items (one grouped
+    query), one INSERT ... SELECT of the missing pairs and one
+    content_group_count upsert; usage deltas go to the write-behind
+    counter (tag_usage). Raises TagValidationError (nothing written)
+    when any item would break its group limits.
+    """
+    if con is None:
+        con = get_db()
+
+    content_ids = _ids(content_ids)
+    tag_ids = _ids(tag_ids)
+
+    if not content_ids or not tag_ids:
+        return {"assigned": 0, "skipped": 0, "usage": {}}
+
+    now = datetime.utcnow()
+
+    con.execute("BEGIN")
+
+    try:
+        validate_tag_assignment_batch(content_ids, tag_ids, con=con)
+
+        _load_pairs(con, content_ids, tag_ids)
+
+        # Only pairs not assigned yet count towards usage
+        con.execute(
+            """
+            CREATE OR REPLACE TEMP TABLE _batch_changed AS
+            SELECT p.content_id, p.tag_id
+            FROM _batch_pairs p
+            ANTI JOIN content_tag ct
+              ON ct.content_id = p.content_id
+             AND ct.tag_id = p.tag_id
+            """
+        )
+
+        con.execute(
+            """
+            INSERT INTO content_tag (content_id, tag_id)
+            SELECT content_id, tag_id
+            FROM _batch_changed
+            """
+        )
+
+        apply_group_counts(con, "_batch_changed", +1)
+
+        usage = _usage_deltas(con)
+        changed = _changed_pairs(con)
+
+        con.execute("COMMIT")
+
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    finally:
+        con.execute("DROP TABLE IF EXISTS _batch_pairs")
+        con.execute("DROP TABLE IF EXISTS _batch_changed")
+
+    tag_usage.record(usage, now)
+    tag_bitmaps.assign(changed)
+
+    assigned = sum(usage.values())
+
+    return {
+        "assigned": assigned,
+        "skipped": len(content_ids) * len(tag_ids) - assigned,
+        "usage": usage,
+    }
+
+
+def unassign_tags_batch(content_ids: list[str], tag_ids: list[str], con=None) -> dict:
+    """
+    Remove every tag in tag_ids from every item in content_ids.
+
+    One transaction: one DELETE of the existing pairs and one
+    content_group_count update; usage deltas (only for pairs actually
+    removed) go to tag_usage.
+    """
+    if con is None:
+        con = get_db()
+
+    content_ids = _ids(content_ids)
+    tag_ids = _ids(tag_ids)
+
+    if not content_ids or not tag_ids:
+        return {"removed": 0, "usage": {}}
+
+    con.execute("BEGIN")
+
+    try:
+        _load_pairs(con, content_ids, tag_ids)
+
+        con.execute(
+            """
+            CREATE OR REPLACE TEMP TABLE _batch_changed AS
+            SELECT p.content_id, p.tag_id
+            FROM _batch_pairs p
+            SEMI JOIN content_tag ct
+              ON ct.content_id = p.content_id
+             AND ct.tag_id = p.tag_id
+            """
+        )
+
+        con.execute(
+            """
+            DELETE FROM content_tag
+            USING _batch_changed b
+            WHERE content_tag.content_id = b.content_id
+              AND content_tag.tag_id = b.tag_id
+            """
+        )
+
+        apply_group_counts(con, "_batch_changed", -1)
+
+        usage = {tag_id: -n for tag_id, n in _usage_deltas(con).items()}
+        changed = _changed_pairs(con)
+
+        con.execute("COMMIT")
+
+    except Exception:
+        con.execute("ROLLBACK")
+        raise
+
+    finally:
+        con.execute("DROP TABLE IF EXISTS _batch_pairs")
+        con.execute("DROP TABLE IF EXISTS _batch_changed")
+
+    tag_usage.record(usage)
+    tag_bitmaps.unassign(changed)
+
+    return {
+        "removed": -sum(usage.values()),
+        "usage": usage,
+    }
@@ -0,0 +1,485 @@
+"""
+In-memory tag → content bitmaps (Python ints / sorted row arrays) for
+tag filters and facet counts.
+
+Pure Python, no compressed-bitmap library: a filter match is a few big
+int ANDs / ORs (milliseconds at 1M items), a facet query over all tags
+tens of milliseconds (tests/48_bench_tag_bitmap.py), not microseconds.
+It beats the equivalent content_tag SQL by about 10x.
+"""
+
+import bisect
+import os
+import re
+import sys
+from array import array
+from operator import itemgetter
+from threading import RLock
+
+from app.db import get_db
+
+# Tag predicates matching at most this many items go to SQL as an id
+# list (see content_filter) instead of a content_tag query
+TAG_BITMAP_INLINE_MAX = int(os.getenv("TAG_BITMAP_INLINE_MAX", "20000"))
+
+# A posting is a bitmap while it holds more than 1 / DENSE_RATIO of
+# all rows (a 4-byte row array would be larger than n bits), and a
+# sorted row array again below 1 / SPARSE_RATIO
+DENSE_RATIO = 32
+SPARSE_RATIO = 64
+
+# Facet counts: sparse postings above 1 / FACET_BITMAP_RATIO of all
+# rows also keep a bitmap copy (one AND + bit count instead of a
+# per-row lookup), within TAG_BITMAP_FACET_CACHE_MB
+FACET_BITMAP_RATIO = 1024
+TAG_BITMAP_FACET_CACHE_MB = int(os.getenv("TAG_BITMAP_FACET_CACHE_MB", "64"))
+
+
+def _scatter(rows, nbytes: int) -> int:
+    """
+    Bitmap (int, bit i = row i) of the given rows.
+    """
+    buf = bytearray(nbytes)
+    for row in rows:
+        buf[row >> 3] |= 1 << (row & 7)
+    return int.from_bytes(buf, "little")
+
+
+def _rows_of(bits: int) -> list[int]:
+    """
+    Set bit positions of a bitmap, ascending.
+    """
+    return [m.start() for m in re.finditer("1", bin(bits)[:1:-1])]
+
+
+def _flags(bits: int, size: int) -> bytes:
+    """
+    One byte per row, b"1" where the bit is set: the per-row lookup
+    table for sparse postings.
+    """
+    return bin(bits)[:1:-1].ljust(size, "0").encode()
+
+
+class _Posting:
+    """
+    Content rows having one tag: a sorted array("I") while sparse, an
+    int bitmap once dense (roaring's two container kinds, per tag).
+    """
+
+    def __init__(self, rows=None, bits: int | None = None):
+        self.rows = None if bits is not None else array("I", rows or [])
+        self.bits = bits
+        self.count = bits.bit_count() if bits is not None else len(self.rows)
+        self.facet_bits = None  # bitmap copy of a sparse posting (facets)
+
+    @property
+    def dense(self) -> bool:
+        return self.bits is not None
+
+    def add(self, row: int) -> bool:
+        if self.bits is not None:
+            mask = 1 << row
+            if self.bits & mask:
+                return False
+            self.bits |= mask
+        else:
+            i = bisect.bisect_left(self.rows, row)
+            if i < len(self.rows) and self.rows[i] == row:
+                return False
+            self.rows.insert(i, row)
+            if self.facet_bits is not None:
+                self.facet_bits |= 1 << row
+
+        self.count += 1
+        return True
+
+    def discard(self, row: int) -> bool:
+        if self.bits is not None:
+            mask = 1 << row
+            if not self.bits & mask:
+                return False
+            self.bits ^= mask
+        else:
+            i = bisect.bisect_left(self.rows, row)
+            if i == len(self.rows) or self.rows[i] != row:
+                return False
+            del self.rows[i]
+            if self.facet_bits is not None:
+                self.facet_bits ^= 1 << row
+
+        self.count -= 1
+        return True
+
+    def as_bits(self, size: int) -> int:
+        if self.bits is not None:
+            return self.bits
+        return _scatter(self.rows, (size >> 3) + 1)
+
+    def members(self) -> list[int]:
+        return _rows_of(self.bits) if self.bits is not None else list(self.rows)
+
+    def count_in(self, selection: int, flags: bytes) -> int:
+        """
+        Rows of this posting that are set in `selection` (`flags`: the
+        same selection as _flags()).
+        """
+        bits = self.bits if self.bits is not None else self.facet_bits
+        if bits is not None:
+            return (bits & selection).bit_count()
+
+        if len(self.rows) < 2:
+            return sum(flags[row] == 49 for row in self.rows)
+
+        # One C-level gather instead of a Python loop over the rows
+        return itemgetter(*self.rows)(flags).count(49)
+
+    def rebalance(self, size: int):
+        if self.bits is None and self.count * DENSE_RATIO > size:
+            self.bits = _scatter(self.rows, (size >> 3) + 1)
+            self.rows = None
+            self.facet_bits = None
+        elif self.bits is not None and self.count * SPARSE_RATIO < size:
+            self.rows = array("I", _rows_of(self.bits))
+            self.bits = None
+
+    def nbytes(self) -> int:
+        return sys.getsizeof(self.bits if self.bits is not None else self.rows)
+
+
+class TagBitmapIndex:
+    """
+    Process-wide tag → content bitmap index for tag filters and facets.
+
+    Content items are numbered in (created_at, id) order (new items are
+    appended); each tag holds a _Posting of those row numbers. Loaded
+    from content_tag on startup and kept in sync after commit by
+    tag assign / unassign (single + batch) and content creation, so
+    AND / OR / NOT tag queries and facet counts never hit the database.
+
+    Updates land after their transaction commits; `verify` compares the
+    index with content_tag and `load` rebuilds it.
+
+    Facets: without a filter they are the posting sizes; with one,
+    dense postings and the largest sparse ones (bitmap copies built on
+    first use, within TAG_BITMAP_FACET_CACHE_MB) are counted with an
+    AND + bit count, the small rest through a per-row lookup table.
+    """
+
+    def __init__(self):
+        self._ids: list[str] = []           # row → content_id
+        self._rows: dict[str, int] = {}     # content_id → row
+        self._tags: dict[str, _Posting] = {}
+        self._facet_cache_max = TAG_BITMAP_FACET_CACHE_MB << 20
+        self._loaded = False
+        self._lock = RLock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded
+
+    @property
+    def size(self) -> int:
+        return len(self._ids)
+
+    def load(self, con=None):
+        if con is None:
+            con = get_db()
+
+        # Held until the swap: updates committed meanwhile apply after it
+        with self._lock:
+            ids, tags = self._read(con)
+
+            self._ids = ids
+            self._rows = {content_id: row for row, content_id in enumerate(ids)}
+            self._tags = tags
+            self._loaded = True
+
+    def _read(self, con) -> tuple[list[str], dict[str, _Posting]]:
+        # One snapshot for row numbers and postings
+        con.execute("BEGIN")
+
+        try:
+            ids = [
+                r[0]
+                for r in con.execute(
+                    "SELECT id FROM content ORDER BY created_at, id"
+                ).fetchall()
+            ]
+
+            rows = []
+            if ids:
+                # Dense tags come back as a bit string, sparse ones as
+                # a row list
+                rows = con.execute(
+                    """
+                    WITH r AS (
+                        SELECT
+                            id,
+                            (row_number() OVER (ORDER BY created_at, id) - 1)::INTEGER AS row
+                        FROM content
+                    )
+                    SELECT
+                        ct.tag_id,
+                        CASE WHEN COUNT(*) * ? > ?
+                            THEN bitstring_agg(r.row, 0, ?)::VARCHAR
+                        END,
+                        CASE WHEN COUNT(*) * ? <= ?
+                            THEN string_agg(r.row::VARCHAR, ',')
+                        END
+                    FROM content_tag ct
+                    JOIN r ON r.id = ct.content_id
+                    GROUP BY ct.tag_id
+                    """,
+                    (DENSE_RATIO, len(ids), len(ids) - 1, DENSE_RATIO, len(ids)),
+                ).fetchall()
+
+            con.execute("COMMIT")
+
+        except Exception:
+            con.execute("ROLLBACK")
+            raise
+
+        tags = {}
+        for tag_id, bits, members in rows:
+            if bits is not None:
+                # Leftmost character is row 0
+                tags[tag_id] = _Posting(bits=int(bits[::-1], 2))
+            else:
+                tags[tag_id] = _Posting(sorted(map(int, members.split(","))))
+
+        return ids, tags
+
+    # -------------------------
+    # Updates (after commit)
+    # -------------------------
+
+    def add_content(self, content_ids: list[str]):
+        """
+        Number new content items (no tags yet).
+        """
+        if not self._loaded:
+            return
+
+        with self._lock:
+            for content_id in content_ids:
+                self._row(content_id)
+
+    def assign(self, pairs):
+        """
+        Mirror inserted content_tag (content_id, tag_id) pairs.
+        """
+        if not self._loaded:
+            return
+
+        with self._lock:
+            touched = set()
+
+            for content_id, tag_id in pairs:
+                posting = self._tags.get(tag_id)
+                if posting is None:
+                    posting = self._tags[tag_id] = _Posting()
+
+                posting.add(self._row(content_id))
+                touched.add(tag_id)
+
+            for tag_id in touched:
+                self._tags[tag_id].rebalance(self.size)
+
+    def unassign(self, pairs):
+        """
+        Mirror deleted content_tag (content_id, tag_id) pairs.
+        """
+        if not self._loaded:
+            return
+
+        with self._lock:
+            touched = set()
+
+            for content_id, tag_id in pairs:
+                posting = self._tags.get(tag_id)
+                row = self._rows.get(content_id)
+
+                if posting is not None and row is not None:
+                    posting.discard(row)
+                    touched.add(tag_id)
+
+            for tag_id in touched:
+                posting = self._tags[tag_id]
+                if posting.count == 0:
+                    del self._tags[tag_id]
+                else:
+                    posting.rebalance(self.size)
+
+    def _row(self, content_id: str) -> int:
+        row = self._rows.get(content_id)
+        if row is None:
+            row = self._rows[content_id] = len(self._ids)
+            self._ids.append(content_id)
+        return row
+
+    # -------------------------
+    # Queries
+    # -------------------------
+
+    def match(self, node) -> int:
+        """
+        Bitmap of content matching a tag-only filter node
+        (content_filter "tags" / "and" / "or" / "not").
+        """
+        with self._lock:
+            return self._match(node)
+
+    def _match(self, node) -> int:
+        kind = node[0]
+
+        if kind == "tags":
+            _, mode, tag_ids = node
+            bits = [self._bits(tag_id) for tag_id in tag_ids]
+        elif kind in ("and", "or"):
+            mode = "all" if kind == "and" else "any"
+            bits = [self._match(child) for child in node[1]]
+        elif kind == "not":
+            return self._universe() ^ self._match(node[1])
+        else:
+            raise ValueError(f"Not a tag predicate: {kind}")
+
+        result = bits[0]
+        for other in bits[1:]:
+            result = result & other if mode == "all" else result | other
+
+        return result
+
+    def _bits(self, tag_id: str) -> int:
+        posting = self._tags.get(tag_id)
+        return posting.as_bits(self.size) if posting is not None else 0
+
+    def _universe(self) -> int:
+        return (1 << self.size) - 1
+
+    def content_ids(self, bits: int) -> list[str]:
+        """
+        Content ids of a match() bitmap, oldest first.
+        """
+        with self._lock:
+            return [self._ids[row] for row in _rows_of(bits)]
+
+    def facets(self, node=None, tag_ids: list[str] | None = None) -> dict:
+        """
+        Items matching `node` (everything when None) and, per tag, how
+        many of them have it: {"count": n, "facets": {tag_id: n}}.
+        `tag_ids` limits the tags counted (default: every tag in use).
+        """
+        with self._lock:
+            if tag_ids is None:
+                tag_ids = list(self._tags)
+
+            postings = [(tag_id, self._tags.get(tag_id)) for tag_id in tag_ids]
+
+            if node is None:
+                return {
+                    "count": self.size,
+                    "facets": {
+                        tag_id: posting.count if posting is not None else 0
+                        for tag_id, posting in postings
+                    },
+                }
+
+            selection = self._match(node)
+            self._cache_facet_bits()
+
+            flags = None
+            if any(p is not None and p.bits is None and p.facet_bits is None for _, p in postings):
+                flags = _flags(selection, self.size)
+
+            return {
+                "count": selection.bit_count(),
+                "facets": {
+                    tag_id: posting.count_in(selection, flags) if posting is not None else 0
+                    for tag_id, posting in postings
+                },
+            }
+
+    def _cache_facet_bits(self):
+        """
+        Give the largest sparse postings (above size / FACET_BITMAP_RATIO
+        rows) a bitmap copy, while the copies fit the cache budget.
+        """
+        sparse = [p for p in self._tags.values() if p.bits is None]
+        cost = (self.size >> 3) + 1
+        used = sum(cost for p in sparse if p.facet_bits is not None)
+
+        for posting in sorted(sparse, key=lambda p: -p.count):
+            if posting.count * FACET_BITMAP_RATIO <= self.size:
+                break
+            if posting.facet_bits is None:
+                if used + cost > self._facet_cache_max:
+                    break
+                posting.facet_bits = _scatter(posting.rows, cost)
+                used += cost
+
+    # -------------------------
+    # Introspection
+    # -------------------------
+
+    def stats(self) -> dict:
+        with self._lock:
+            by_tag = sorted(
+                (
+                    {
+                        "tag_id": tag_id,
+                        "count": posting.count,
+                        "container": "bitmap" if posting.dense else "array",
+                        "bytes": posting.nbytes(),
+                        "facet_bytes": sys.getsizeof(posting.facet_bits) if posting.facet_bits is not None else 0,
+                    }
+                    for tag_id, posting in self._tags.items()
+                ),
+                key=lambda t: -t["bytes"],
+            )
+
+            return {
+                "loaded": self._loaded,
+                "content": self.size,
+                "tags": len(by_tag),
+                "bitmaps": sum(1 for t in by_tag if t["container"] == "bitmap"),
+                "bytes": sum(t["bytes"] for t in by_tag),
+                "facet_bytes": sum(t["facet_bytes"] for t in by_tag),
+                "by_tag": by_tag,
+            }
+
+    def verify(self, con=None) -> dict:
+        """
+        Compare every posting with content_tag (fresh read).
+        """
+        if con is None:
+            con = get_db()
+
+        ids, tags = self._read(con)
+
+        with self._lock:
+            mismatched = []
+
+            for tag_id in sorted(set(tags) | set(self._tags)):
+                expected = tags.get(tag_id)
+                actual = self._tags.get(tag_id)
+
+                expected_ids = {ids[row] for row in expected.members()} if expected else set()
+                actual_ids = {self._ids[row] for row in actual.members()} if actual else set()
+
+                if expected_ids != actual_ids:
+                    mismatched.append({
+                        "tag_id": tag_id,
+                        "missing": len(expected_ids - actual_ids),
+                        "extra": len(actual_ids - expected_ids),
+                    })
+
+            return {
+                "ok": not mismatched and len(ids) == self.size,
+                "content": len(ids),
+                "indexed_content": self.size,
+                "tags": len(tags),
+                "mismatched": mismatched,
+            }
+
+
+tag_bitmaps = TagBitmapIndex()
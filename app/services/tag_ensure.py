@@ -6,6 +6,8 @@ API = "http://localhost:8000"
 
 import re
 from app.db import get_db
+from app.services.tag_index import tag_index
+from app.services.tag_group_model import tag_group_model
 
 
 def slugify(label: str) -> str:
@@ -15,8 +17,9 @@ def slugify(label: str) -> str:
     return slug
 
 
-def ensure_tag(group_id: str, label: str):
-    con = get_db()
+def ensure_tag(group_id: str, label: str, con=None):
+    if con is None:
+        con = get_db()
 
     slug = slugify(label)
     tag_id = f"{group_id}:{slug}"
@@ -41,6 +44,9 @@ def ensure_tag(group_id: str, label: str):
         ),
     )
 
+    tag_index.add(tag_id, label, group_id, con=con)
+    tag_group_model.add_tag(tag_id, group_id)
+
     row = con.execute(
         "SELECT COUNT(*) FROM tag WHERE id = ?",
         (tag_id,),
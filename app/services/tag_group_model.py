@@ -0,0 +1,147 @@
+from threading import RLock
+
+from app.db import get_db
+
+
+class TagGroupModel:
+    """
+    Compiled tag group constraints: groups in display order, their
+    min / max limits and the tag → group mapping.
+
+    Validation against it is a pure in-memory check over group counts
+    (see content_group_count.group_counts) or a list of tag ids.
+    """
+
+    def __init__(self, version: int, groups: list[dict], tag_groups: dict[str, str]):
+        self.version = version
+        self.groups = groups                # ordered by position
+        self.by_id = {g["id"]: g for g in groups}
+        self.tag_groups = tag_groups        # tag_id → group_id
+
+    def group_of(self, tag_id: str) -> str | None:
+        return self.tag_groups.get(tag_id)
+
+    def unknown_tags(self, tag_ids: list[str]) -> list[str]:
+        return [t for t in tag_ids if t not in self.tag_groups]
+
+    def count(self, tag_ids: list[str]) -> dict[str, int]:
+        """
+        Tags per group ({group_id: n}) for a list of (known) tag ids.
+        """
+        counts = {}
+        for tag_id in tag_ids:
+            group_id = self.tag_groups.get(tag_id)
+            if group_id is not None:
+                counts[group_id] = counts.get(group_id, 0) + 1
+        return counts
+
+    def evaluate(self, counts: dict[str, int]) -> list[dict]:
+        """
+        Per-group status ("ok" | "missing" | "over_limit") for the
+        given group counts, in display order.
+        """
+        results = []
+
+        for g in self.groups:
+            n = counts.get(g["id"], 0)
+
+            if n < (g["min"] or 0):
+                status = "missing"
+            elif g["max"] is not None and n > g["max"]:
+                status = "over_limit"
+            else:
+                status = "ok"
+
+            results.append({**g, "count": n, "status": status})
+
+        return results
+
+    def over_limit(self, counts: dict[str, int], incoming: dict[str, int]) -> list[str]:
+        """
+        Groups whose max_count `counts` + `incoming` would exceed.
+        """
+        return [
+            g["id"]
+            for g in self.groups
+            if incoming.get(g["id"])
+            and g["max"] is not None
+            and counts.get(g["id"], 0) + incoming[g["id"]] > g["max"]
+        ]
+
+
+class TagGroupCache:
+    """
+    Process-wide TagGroupModel, loaded once from tag_group + tag.
+
+    Invalidated by /tag-groups/import and seed_taggroups; tag creation
+    (create_tag / ensure_tag) adds to the mapping in place. Every change
+    bumps `version`.
+    """
+
+    def __init__(self):
+        self._model: TagGroupModel | None = None
+        self._version = 0
+        self._lock = RLock()
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def get(self, con=None) -> TagGroupModel:
+        model = self._model
+        if model is not None:
+            return model
+
+        with self._lock:
+            if self._model is None:
+                self._model = self._load(con)
+            return self._model
+
+    def _load(self, con=None) -> TagGroupModel:
+        if con is None:
+            con = get_db()
+
+        groups = [
+            {
+                "id": r[0],
+                "description": r[1],
+                "required": r[2],
+                "min": r[3],
+                "max": r[4],
+                "position": r[5],
+            }
+            for r in con.execute(
+                """
+                SELECT id, description, required, min_count, max_count, position
+                FROM tag_group
+                ORDER BY position
+                """
+            ).fetchall()
+        ]
+
+        tag_groups = dict(
+            con.execute("SELECT id, group_id FROM tag").fetchall()
+        )
+
+        self._version += 1
+        return TagGroupModel(self._version, groups, tag_groups)
+
+    def invalidate(self):
+        with self._lock:
+            self._model = None
+            self._version += 1
+
+    def add_tag(self, tag_id: str, group_id: str):
+        """
+        Map a (possibly) new tag; known ids are left unchanged (no-op
+        until the model is loaded).
+        """
+        with self._lock:
+            model = self._model
+            if model is not None and tag_id not in model.tag_groups:
+                model.tag_groups[tag_id] = group_id
+                self._version += 1
+                model.version = self._version
+
+
+tag_group_model = TagGroupCache()
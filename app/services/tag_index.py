@@ -0,0 +1,294 @@
+import bisect
+import heapq
+import os
+from threading import RLock
+
+from rapidfuzz import process
+from rapidfuzz.distance import Levenshtein
+
+from app.db import get_db
+
+# Max posting entries scanned by one fuzzy search; queries with
+# nothing close by stop here instead of scanning the whole group
+TAG_SEARCH_FUZZY_BUDGET = int(os.getenv("TAG_SEARCH_FUZZY_BUDGET", "2000"))
+
+PREFIX_END = "\uffff"
+
+
+def search_key(label: str) -> str:
+    """
+    Normalized form used for prefix + edit distance matching.
+    """
+    return label.strip().lower().replace(" ", "_")
+
+
+def _grams(key: str) -> set[str]:
+    padded = f"^^{key}$$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _rank(tag: dict, distance: int) -> tuple:
+    # distance ASC, usage_count DESC, last_used DESC (NULLs last)
+    last_used = tag["last_used"]
+    return (
+        distance,
+        -(tag["usage_count"] or 0),
+        -last_used.timestamp() if last_used else float("inf"),
+    )
+
+
+def _within_budget(postings: list) -> list:
+    kept, total = [], 0
+
+    for posting in sorted(postings, key=len):
+        total += len(posting)
+        if total > TAG_SEARCH_FUZZY_BUDGET:
+            break
+        kept.append(posting)
+
+    return kept
+
+
+class _GroupIndex:
+    """
+    Search structures for one tag group.
+
+    - keys kept sorted (bisect) for prefix matches
+    - padded trigram postings + length buckets to find fuzzy candidates
+    """
+
+    def __init__(self):
+        self.tags: list[dict] = []   # entry id → tag
+        self.keys: list[str] = []    # entry id → search key
+        self.sorted_keys: list[str] = []
+        self.sorted_ids: list[int] = []
+        self.grams: dict[str, list[int]] = {}
+        self.by_len: dict[int, list[int]] = {}
+
+    def add(self, tag: dict, keep_sorted: bool = True):
+        eid = len(self.tags)
+        key = search_key(tag["label"])
+
+        self.tags.append(tag)
+        self.keys.append(key)
+
+        if keep_sorted:
+            pos = bisect.bisect_right(self.sorted_keys, key)
+            self.sorted_keys.insert(pos, key)
+            self.sorted_ids.insert(pos, eid)
+
+        for gram in _grams(key):
+            self.grams.setdefault(gram, []).append(eid)
+        self.by_len.setdefault(len(key), []).append(eid)
+
+    def sort(self):
+        """
+        Rebuild the prefix array after bulk `add(..., keep_sorted=False)`.
+        """
+        self.sorted_ids = sorted(range(len(self.keys)), key=self.keys.__getitem__)
+        self.sorted_keys = [self.keys[eid] for eid in self.sorted_ids]
+
+    def search(self, query: str, limit: int) -> list[tuple[dict, int]]:
+        q = search_key(query)
+
+        # ------------------------------------
+        # 1. Prefix matches (distance = extra characters)
+        # ------------------------------------
+        lo = bisect.bisect_left(self.sorted_keys, q)
+        hi = bisect.bisect_left(self.sorted_keys, q + PREFIX_END)
+
+        prefix = heapq.nsmallest(
+            limit,
+            (
+                (self.tags[eid], len(self.keys[eid]) - len(q))
+                for eid in self.sorted_ids[lo:hi]
+            ),
+            key=lambda m: _rank(*m),
+        )
+
+        need = limit - len(prefix)
+        if need <= 0:
+            return prefix
+
+        # ------------------------------------
+        # 2. Fuzzy matches, ranked after every prefix match
+        # ------------------------------------
+        fuzzy = self._fuzzy(q, need, max(2, len(q) // 2))
+
+        return prefix + heapq.nsmallest(need, fuzzy, key=lambda m: _rank(*m))
+
+    def _fuzzy(self, q: str, need: int, max_distance: int) -> list[tuple[dict, int]]:
+        """
+        Non-prefix tags within `max_distance` edits of `q`, found by
+        deepening k = 0, 1, ... until `need` matches at distance <= k.
+        Work is capped at TAG_SEARCH_FUZZY_BUDGET postings, so queries
+        with nothing close by get the best matches found within it.
+
+        A tag within k edits shares at least G - 3k of the query's G
+        padded trigrams, so it appears in at least one of ANY 3k + 1
+        query trigram postings (the shortest are used). Below that
+        bound short queries fall back to length buckets.
+        """
+        grams = sorted(_grams(q), key=lambda g: len(self.grams.get(g, ())))
+
+        found: dict[int, int] = {}
+        seen: set[int] = set()
+
+        for k in range(max_distance + 1):
+            if len(grams) - 3 * k >= 1:
+                postings = [self.grams.get(g, ()) for g in grams[:3 * k + 1]]
+            else:
+                postings = [
+                    self.by_len.get(n, ())
+                    for n in range(max(1, len(q) - k), len(q) + k + 1)
+                ]
+
+            # Over budget: scan the shortest postings that fit, then stop
+            last = sum(map(len, postings)) > TAG_SEARCH_FUZZY_BUDGET
+            if last:
+                postings = _within_budget(postings)
+
+            candidates = list(set().union(*postings) - seen)
+            seen.update(candidates)
+
+            for key, distance, i in process.extract(
+                q,
+                [self.keys[eid] for eid in candidates],
+                scorer=Levenshtein.distance,
+                score_cutoff=max_distance,
+                limit=None,
+            ):
+                # Prefix matches are already ranked first
+                if not key.startswith(q):
+                    found[candidates[i]] = distance
+
+            if last or sum(1 for d in found.values() if d <= k) >= need:
+                break
+
+        return [(self.tags[eid], d) for eid, d in found.items()]
+
+
+class TagIndex:
+    """
+    Process-wide in-memory tag autocomplete index (one per group).
+
+    Loaded from the `tag` table on startup (or first search), kept in
+    sync by create_tag / ensure_tag (`add`) and tag assignment
+    (`record_usage`), so searches never hit the database.
+    """
+
+    def __init__(self):
+        self._groups: dict[str, _GroupIndex] = {}
+        self._tags: dict[str, dict] = {}
+        self._loaded = False
+        self._lock = RLock()
+
+    def load(self, con=None):
+        if con is None:
+            con = get_db()
+
+        rows = con.execute(
+            """
+            SELECT id, label, group_id, usage_count, last_used
+            FROM tag
+            ORDER BY group_id, id
+            """
+        ).fetchall()
+
+        with self._lock:
+            self._groups = {}
+            self._tags = {}
+
+            for tag_id, label, group_id, usage_count, last_used in rows:
+                self._add(tag_id, label, group_id, usage_count, last_used, keep_sorted=False)
+
+            for group in self._groups.values():
+                group.sort()
+
+            self._loaded = True
+
+    def _ensure_loaded(self, con=None):
+        if not self._loaded:
+            with self._lock:
+                if not self._loaded:
+                    self.load(con)
+
+    # -------------------------
+    # Updates
+    # -------------------------
+
+    def add(self, tag_id: str, label: str, group_id: str, con=None):
+        """
+        Index a (possibly) new tag; known ids are left unchanged.
+        """
+        self._ensure_loaded(con)
+
+        with self._lock:
+            if tag_id not in self._tags:
+                self._add(tag_id, label, group_id, 0, None)
+
+    def _add(self, tag_id, label, group_id, usage_count, last_used, keep_sorted=True):
+        tag = {
+            "id": tag_id,
+            "label": label,
+            "usage_count": usage_count or 0,
+            "last_used": last_used,
+        }
+
+        self._tags[tag_id] = tag
+        self._groups.setdefault(group_id, _GroupIndex()).add(tag, keep_sorted)
+
+    def record_usage(self, deltas: dict[str, int], when=None):
+        """
+        Mirror usage_count / last_used changes ({tag_id: delta}) for ranking.
+        """
+        with self._lock:
+            for tag_id, delta in deltas.items():
+                tag = self._tags.get(tag_id)
+                if tag is None:
+                    continue
+
+                tag["usage_count"] = max(0, tag["usage_count"] + delta)
+                if delta > 0 and when is not None:
+                    tag["last_used"] = when
+
+    def set_usage(self, counts: dict[str, int]):
+        """
+        Overwrite usage_count ({tag_id: count}), e.g. after reconciliation.
+        """
+        with self._lock:
+            for tag_id, count in counts.items():
+                tag = self._tags.get(tag_id)
+                if tag is not None:
+                    tag["usage_count"] = count
+
+    def usage(self, tag_id: str, con=None) -> int:
+        """
+        usage_count of a tag (0 if unknown), e.g. for query planning.
+        """
+        self._ensure_loaded(con)
+
+        tag = self._tags.get(tag_id)
+        return tag["usage_count"] if tag else 0
+
+    # -------------------------
+    # Search
+    # -------------------------
+
+    def search(self, group_id: str, query: str, limit: int = 10, con=None) -> list[dict]:
+        self._ensure_loaded(con)
+
+        with self._lock:
+            group = self._groups.get(group_id)
+            if group is None:
+                return []
+
+            matches = group.search(query, limit)
+
+            return [
+                {**tag, "distance": distance}
+                for tag, distance in matches
+            ]
+
+
+tag_index = TagIndex()
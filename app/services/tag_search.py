@@ -1,11 +1,10 @@
 from app.db import get_db
+from app.services.tag_index import tag_index
 
 
-def search_tags(group_id: str, query: str | None, limit: int = 10):
-    q = query.lower()
-    max_distance = max(2, len(q) // 2)
-
-    con = get_db()
+def search_tags(group_id: str, query: str | None, limit: int = 10, con=None):
+    if con is None:
+        con = get_db()
 
     # ------------------------------------
     # No query → top used
@@ -39,60 +38,6 @@ def search_tags(group_id: str, query: str | None, limit: int = 10):
         ]
 
     # ------------------------------------
-    # Prefix + fuzzy ranking (FIXED)
+    # Prefix + fuzzy ranking (in-memory index)
     # ------------------------------------
-    q = query.lower()
-
-    rows = con.execute(
-        """
-        SELECT
-            id,
-            label,
-            usage_count,
-            last_used,
-            CASE
-                WHEN lower(label) LIKE ? THEN 1
-                ELSE 0
-            END AS prefix_match,
-            editdist3(
-                replace(lower(label), ' ', '_'),
-                ?
-            ) AS distance
-        FROM tag
-        WHERE group_id = ?
-        AND (
-            lower(label) LIKE ?
-            OR editdist3(
-                replace(lower(label), ' ', '_'),
-                ?
-            ) <= ?
-        )
-        ORDER BY
-            prefix_match DESC,
-            distance ASC,
-            usage_count DESC,
-            last_used DESC
-        LIMIT ?
-        """,
-        (
-            f"{q}%",
-            q,
-            group_id,
-            f"{q}%",
-            q,
-            max_distance,
-            limit,
-        ),
-    ).fetchall()
-
-
-    return [
-        {
-            "id": r[0],
-            "label": r[1],
-            "usage_count": r[2],
-            "last_used": r[3],
-            "distance": r[5],
-        }
-        for r in rows
-    ]
+    return tag_index.search(group_id, query, limit, con=con)
@@ -0,0 +1,258 @@
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime
+
+from app.db import get_db
+from app.services.tag_index import tag_index
+
+log = logging.getLogger(__name__)
+
+TAG_USAGE_FLUSH_INTERVAL = float(os.getenv("TAG_USAGE_FLUSH_INTERVAL", "5"))
+TAG_USAGE_FLUSH_SIZE = int(os.getenv("TAG_USAGE_FLUSH_SIZE", "500"))
+TAG_USAGE_RECONCILE_INTERVAL = float(os.getenv("TAG_USAGE_RECONCILE_INTERVAL", "3600"))
+
+DELTA_SCHEMA = json.dumps([{
+    "tag_id": "VARCHAR",
+    "delta": "INTEGER",
+    "last_used": "TIMESTAMP",
+}])
+
+
+class TagUsageCounter:
+    """
+    Write-behind tag.usage_count / tag.last_used.
+
+    Assign / unassign only record deltas in memory (and in the tag
+    search index, so ranking is current). A background thread writes
+    them to `tag` with ONE batched UPDATE every `flush_interval`
+    seconds, or sooner once `flush_size` tags are pending, and on
+    shutdown.
+
+    `reconcile` recomputes exact counts from content_tag, on a slow
+    interval and on demand, so drift (a crash before a flush, writes
+    that bypass the counter) can't build up.
+    """
+
+    def __init__(
+        self,
+        flush_interval: float = TAG_USAGE_FLUSH_INTERVAL,
+        flush_size: int = TAG_USAGE_FLUSH_SIZE,
+        reconcile_interval: float = TAG_USAGE_RECONCILE_INTERVAL,
+    ):
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.reconcile_interval = reconcile_interval
+
+        self._pending: dict[str, list] = {}  # tag_id → [delta, last_used]
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread = None
+
+        self.stats = {
+            "recorded": 0,
+            "flushes": 0,
+            "flushed_tags": 0,
+            "flush_errors": 0,
+            "reconciles": 0,
+            "reconciled_tags": 0,
+        }
+
+    # -------------------------
+    # Lifecycle
+    # -------------------------
+
+    def start(self):
+        if self._thread is not None:
+            return
+
+        self._stop.clear()
+        self._thread = threading.Thread(
+            target=self._run,
+            name="tag-usage-flusher",
+            daemon=True,
+        )
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is not None:
+            self._stop.set()
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+
+        # Final flush (also covers a counter that was never started)
+        self.flush()
+
+    def _run(self):
+        next_reconcile = time.monotonic() + self.reconcile_interval
+
+        while not self._stop.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+
+            if self._stop.is_set():
+                break
+
+            try:
+                if time.monotonic() >= next_reconcile:
+                    self.reconcile()
+                    next_reconcile = time.monotonic() + self.reconcile_interval
+                else:
+                    self.flush()
+            except Exception:
+                log.exception("Tag usage flush failed")
+
+    # -------------------------
+    # Recording
+    # -------------------------
+
+    def record(self, deltas: dict[str, int], when: datetime | None = None):
+        """
+        Queue usage deltas ({tag_id: +n / -n}); `when` is last_used
+        for positive deltas.
+        """
+        deltas = {tag_id: d for tag_id, d in deltas.items() if d}
+        if not deltas:
+            return
+
+        with self._lock:
+            for tag_id, delta in deltas.items():
+                entry = self._pending.setdefault(tag_id, [0, None])
+                entry[0] += delta
+
+                if delta > 0 and when is not None:
+                    entry[1] = max(entry[1], when) if entry[1] else when
+
+            self.stats["recorded"] += len(deltas)
+            full = len(self._pending) >= self.flush_size
+
+        tag_index.record_usage(deltas, when)
+
+        if full:
+            self._wake.set()
+
+    # -------------------------
+    # Flush / reconcile
+    # -------------------------
+
+    def flush(self, con=None) -> int:
+        """
+        Write pending deltas to `tag` in one UPDATE. Returns the number
+        of tags written. On failure the deltas are put back.
+        """
+        with self._flush_lock:
+            return self._flush(con)
+
+    def _flush(self, con=None) -> int:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+
+        if not pending:
+            return 0
+
+        if con is None:
+            con = get_db()
+
+        batch = json.dumps(
+            [
+                {"tag_id": tag_id, "delta": delta, "last_used": last_used}
+                for tag_id, (delta, last_used) in pending.items()
+            ],
+            default=str,
+        )
+
+        try:
+            con.execute(
+                f"""
+                UPDATE tag
+                SET usage_count = GREATEST(COALESCE(usage_count, 0) + d.delta, 0),
+                    last_used = CASE
+                        WHEN d.last_used IS NULL THEN tag.last_used
+                        ELSE GREATEST(COALESCE(tag.last_used, d.last_used), d.last_used)
+                    END
+                FROM (
+                    SELECT unnest(from_json(?, '{DELTA_SCHEMA}'), recursive := true)
+                ) d
+                WHERE tag.id = d.tag_id
+                """,
+                (batch,),
+            )
+
+        except Exception:
+            # Merge back; newer deltas may have arrived meanwhile
+            with self._lock:
+                for tag_id, (delta, last_used) in pending.items():
+                    entry = self._pending.setdefault(tag_id, [0, None])
+                    entry[0] += delta
+                    if last_used is not None:
+                        entry[1] = max(entry[1], last_used) if entry[1] else last_used
+
+                self.stats["flush_errors"] += 1
+            raise
+
+        with self._lock:
+            self.stats["flushes"] += 1
+            self.stats["flushed_tags"] += len(pending)
+
+        return len(pending)
+
+    def reconcile(self, con=None) -> int:
+        """
+        Flush, then set every tag's usage_count to its exact
+        content_tag count. Returns the number of tags corrected.
+        """
+        if con is None:
+            con = get_db()
+
+        with self._flush_lock:
+            self._flush(con)
+
+            rows = con.execute(
+                """
+                UPDATE tag
+                SET usage_count = c.n
+                FROM (
+                    SELECT t.id, COUNT(ct.tag_id) AS n
+                    FROM tag t
+                    LEFT JOIN content_tag ct ON ct.tag_id = t.id
+                    GROUP BY t.id
+                ) c
+                WHERE tag.id = c.id
+                  AND tag.usage_count IS DISTINCT FROM c.n
+                RETURNING tag.id, tag.usage_count
+                """
+            ).fetchall()
+
+        tag_index.set_usage(dict(rows))
+
+        with self._lock:
+            self.stats["reconciles"] += 1
+            self.stats["reconciled_tags"] += len(rows)
+
+        if rows:
+            log.info("Reconciled usage_count for %d tags", len(rows))
+
+        return len(rows)
+
+    # -------------------------
+    # Reporting
+    # -------------------------
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "running": self._thread is not None,
+                "pending_tags": len(self._pending),
+                "flush_interval": self.flush_interval,
+                "flush_size": self.flush_size,
+                "reconcile_interval": self.reconcile_interval,
+                **self.stats,
+            }
+
+
+tag_usage = TagUsageCounter()
@@ -1,22 +1,57 @@
+import json
 from typing import List
 from app.db import get_db
+from app.services.content_group_count import group_counts
+from app.services.tag_group_model import tag_group_model
 
 
 class TagValidationError(Exception):
     pass
 
 
-def validate_tag_assignment_delta(content_id: str, tag_ids: List[str]):
+def validate_tag_assignment_delta(content_id: str, tag_ids: List[str], con=None):
     """
     Validate that assigning tag_ids to content_id does not violate
     tag group constraints *incrementally*.
+
+    Checked in memory against the cached group model and the item's
+    content_group_count row(s).
     """
-    con = get_db()
+    if con is None:
+        con = get_db()
 
     if not tag_ids:
         return
 
-    # Map tags → groups
+    model = tag_group_model.get(con)
+
+    missing = model.unknown_tags(tag_ids)
+    if missing:
+        # Tags created outside create_tag / ensure_tag
+        missing = _resolve_tags(missing, con)
+
+    if missing:
+        raise TagValidationError(
+            f"Unknown tag(s): {', '.join(missing)}"
+        )
+
+    over = model.over_limit(
+        group_counts(content_id, con=con),
+        model.count(tag_ids),
+    )
+
+    if over:
+        raise TagValidationError("; ".join(
+            f"group '{group_id}' allows at most {model.by_id[group_id]['max']} tags"
+            for group_id in over
+        ))
+
+
+def _resolve_tags(tag_ids: List[str], con) -> List[str]:
+    """
+    Look up tags missing from the group model; found ones are added to
+    it. Returns the ids that really don't exist.
+    """
     rows = con.execute(
         f"""
         SELECT id, group_id
@@ -26,131 +61,189 @@ def validate_tag_assignment_delta(content_id: str, tag_ids: List[str]):
         tag_ids,
     ).fetchall()
 
-    if len(rows) != len(tag_ids):
-        found_ids = {r[0] for r in rows}
-        missing = [t for t in tag_ids if t not in found_ids]
+    for tag_id, group_id in rows:
+        tag_group_model.add_tag(tag_id, group_id)
+
+    found = {r[0] for r in rows}
+    return [t for t in tag_ids if t not in found]
+
+# Violations listed in a batch error before truncating
+MAX_REPORTED_VIOLATIONS = 10
+
+
+def validate_tag_assignment_batch(content_ids: List[str], tag_ids: List[str], con=None):
+    """
+    Batch version of validate_tag_assignment_delta: assigning every
+    tag_id to every content_id must keep each item within its groups'
+    max_count. Pairs that already exist don't count twice.
+
+    All items are checked with ONE grouped query.
+    """
+    if con is None:
+        con = get_db()
+
+    if not content_ids or not tag_ids:
+        return
+
+    params = (json.dumps(content_ids), json.dumps(tag_ids))
+
+    missing_tags, missing_content = con.execute(
+        """
+        WITH
+            c AS (SELECT DISTINCT unnest(from_json(?, '["VARCHAR"]')) AS id),
+            t AS (SELECT DISTINCT unnest(from_json(?, '["VARCHAR"]')) AS id)
+        SELECT
+            (SELECT list(t.id ORDER BY t.id) FROM t ANTI JOIN tag USING (id)),
+            (SELECT list(c.id ORDER BY c.id) FROM c ANTI JOIN content USING (id))
+        """,
+        params,
+    ).fetchone()
+
+    if missing_tags:
         raise TagValidationError(
-            f"Unknown tag(s): {', '.join(missing)}"
+            f"Unknown tag(s): {', '.join(missing_tags)}"
         )
 
-    tag_to_group = {r[0]: r[1] for r in rows}
-
-    incoming_counts = {}
-    for group_id in tag_to_group.values():
-        incoming_counts[group_id] = incoming_counts.get(group_id, 0) + 1
+    if missing_content:
+        raise TagValidationError(
+            f"Unknown content: {', '.join(missing_content)}"
+        )
 
     rows = con.execute(
         """
+        WITH
+            c AS (SELECT DISTINCT unnest(from_json(?, '["VARCHAR"]')) AS content_id),
+            t AS (SELECT DISTINCT unnest(from_json(?, '["VARCHAR"]')) AS tag_id),
+            incoming AS (
+                SELECT c.content_id, tag.group_id, COUNT(*) AS n
+                FROM c
+                CROSS JOIN t
+                JOIN tag ON tag.id = t.tag_id
+                ANTI JOIN content_tag ct
+                  ON ct.content_id = c.content_id
+                 AND ct.tag_id = t.tag_id
+                GROUP BY c.content_id, tag.group_id
+            )
         SELECT
-            tg.id,
-            tg.min_count,
-            tg.max_count,
-            COUNT(ct.tag_id) AS current_count
-        FROM tag_group tg
-        LEFT JOIN tag t ON t.group_id = tg.id
-        LEFT JOIN content_tag ct
-          ON ct.tag_id = t.id
-         AND ct.content_id = ?
-        GROUP BY tg.id, tg.min_count, tg.max_count
+            i.content_id,
+            i.group_id,
+            tg.max_count
+        FROM incoming i
+        JOIN tag_group tg ON tg.id = i.group_id
+        LEFT JOIN content_group_count cur
+          ON cur.content_id = i.content_id
+         AND cur.group_id = i.group_id
+        WHERE tg.max_count IS NOT NULL
+          AND COALESCE(cur.n, 0) + i.n > tg.max_count
+        ORDER BY i.content_id, i.group_id
         """,
-        (content_id,),
+        params,
     ).fetchall()
 
-    violations = []
-
-    for group_id, min_c, max_c, current in rows:
-        incoming = incoming_counts.get(group_id, 0)
-
-        # Skip untouched groups
-        if incoming == 0 and current == 0:
-            continue
+    if not rows:
+        return
 
-        total = current + incoming
+    violations = [
+        f"content '{content_id}': group '{group_id}' allows at most {max_c} tags"
+        for content_id, group_id, max_c in rows[:MAX_REPORTED_VIOLATIONS]
+    ]
 
-        if max_c is not None and total > max_c:
-            violations.append(
-                f"group '{group_id}' allows at most {max_c} tags"
-            )
+    if len(rows) > MAX_REPORTED_VIOLATIONS:
+        violations.append(f"... {len(rows) - MAX_REPORTED_VIOLATIONS} more")
 
-    if violations:
-        raise TagValidationError("; ".join(violations))
+    raise TagValidationError("; ".join(violations))
 
-def validate_content_completeness(content_id: str):
+def validate_content_completeness(content_id: str, con=None):
     """
     Validate that content satisfies all tag group min_count constraints.
     Intended for publish / finalize / export.
     """
-    con = get_db()
+    if con is None:
+        con = get_db()
 
-    rows = con.execute(
-        """
-        SELECT
-            tg.id,
-            tg.min_count,
-            COUNT(ct.tag_id) AS current_count
-        FROM tag_group tg
-        LEFT JOIN tag t ON t.group_id = tg.id
-        LEFT JOIN content_tag ct
-          ON ct.tag_id = t.id
-         AND ct.content_id = ?
-        GROUP BY tg.id, tg.min_count
-        """,
-        (content_id,),
-    ).fetchall()
+    model = tag_group_model.get(con)
 
-    violations = []
-
-    for group_id, min_c, current in rows:
-        if min_c is not None and current < min_c:
-            violations.append(
-                f"group '{group_id}' requires at least {min_c} tags"
-            )
+    violations = [
+        f"group '{g['id']}' requires at least {g['min']} tags"
+        for g in model.evaluate(group_counts(content_id, con=con))
+        if g["status"] == "missing"
+    ]
 
     if violations:
         raise TagValidationError("; ".join(violations))
 
-def validate_content_completeness_detailed(content_id: str):
+def validate_content_completeness_detailed(content_id: str, con=None):
     """
     Return structured per-group completeness validation for content.
     """
-    con = get_db()
+    if con is None:
+        con = get_db()
+
+    model = tag_group_model.get(con)
+
+    results = [
+        {
+            "group_id": g["id"],
+            "min_required": g["min"] or 0,
+            "current": g["count"],
+            "valid": g["status"] != "missing",
+        }
+        for g in model.evaluate(group_counts(content_id, con=con))
+    ]
+
+    return {
+        "valid": all(r["valid"] for r in results),
+        "groups": results,
+    }
+
+def validate_content_completeness_batch(content_ids: List[str], con=None) -> dict:
+    """
+    Batch version of validate_content_completeness.
+
+    Group counts for every item come from ONE query over
+    content_group_count (flat rows; DuckDB MAP/LIST results convert to
+    Python much more slowly); the min_count check runs against the
+    cached group model. Returns {"items": {content_id: [violation, ...]},
+    "not_found": [content_id, ...]} in payload order (duplicates
+    dropped); an empty violation list means complete.
+    """
+    if con is None:
+        con = get_db()
+
+    content_ids = list(dict.fromkeys(content_ids))
+    if not content_ids:
+        return {"items": {}, "not_found": []}
 
     rows = con.execute(
         """
-        SELECT
-            tg.id AS group_id,
-            tg.min_count,
-            COUNT(ct.tag_id) AS current_count
-        FROM tag_group tg
-        LEFT JOIN tag t ON t.group_id = tg.id
-        LEFT JOIN content_tag ct
-          ON ct.tag_id = t.id
-         AND ct.content_id = ?
-        GROUP BY tg.id, tg.min_count
+        WITH c AS (SELECT DISTINCT unnest(from_json(?, '["VARCHAR"]')) AS id)
+        SELECT c.id, cgc.group_id, cgc.n
+        FROM c
+        SEMI JOIN content ON content.id = c.id
+        LEFT JOIN content_group_count cgc
+          ON cgc.content_id = c.id
+         AND cgc.n > 0
         """,
-        (content_id,),
+        (json.dumps(content_ids),),
     ).fetchall()
 
-    results = []
-    all_valid = True
-
-    for group_id, min_c, current in rows:
-        if min_c is None or min_c == 0:
-            valid = True
-        else:
-            valid = current >= min_c
-
-        if not valid:
-            all_valid = False
-
-        results.append({
-            "group_id": group_id,
-            "min_required": min_c or 0,
-            "current": current,
-            "valid": valid,
-        })
+    counts: dict[str, dict[str, int]] = {}
+    for content_id, group_id, n in rows:
+        item = counts.setdefault(content_id, {})
+        if group_id is not None:
+            item[group_id] = n
+
+    model = tag_group_model.get(con)
+    found = {
+        content_id: [
+            f"group '{g['id']}' requires at least {g['min']} tags"
+            for g in model.evaluate(item)
+            if g["status"] == "missing"
+        ]
+        for content_id, item in counts.items()
+    }
 
     return {
-        "valid": all_valid,
-        "groups": results,
+        "items": {cid: found[cid] for cid in content_ids if cid in found},
+        "not_found": [cid for cid in content_ids if cid not in found],
     }
@@ -1,6 +1,7 @@
 from pathlib import Path
 import configparser
 from app.db import get_db
+from app.services.tag_group_model import tag_group_model
 
 
 TAGGROUPS_FILE = Path(".taggroups")
@@ -70,3 +71,5 @@ def seed_taggroups():
                 pos,
             ),
         )
+
+    tag_group_model.invalidate()
@@ -2,12 +2,30 @@
 set -e
 
 DB_PATH="data/live.duckdb"
-BACKUP_REMOTE="gdrive:duckdb-backups/latest.duckdb"
+BACKUP_DIR="data/backups"
+BACKUP_REMOTE="${DRIVE_SYNC_REMOTE:-gdrive:duckdb-backups}"
 
 echo "⬇️  Restoring DuckDB from Google Drive"
 echo "   $BACKUP_REMOTE → $DB_PATH"
 
-rclone copyto "$BACKUP_REMOTE" "$DB_PATH"
+if output=$(rclone copy "$BACKUP_REMOTE/manifests" "$BACKUP_DIR/manifests" --checksum 2>&1); then
+    # Only the chunks not already on disk
+    rclone copy "$BACKUP_REMOTE/chunks" "$BACKUP_DIR/chunks" --size-only
+    python -m app.db.backup restore latest "$DB_PATH"
+else
+    case "$output" in
+        *"directory not found"*)
+            # Remote written before chunked backups: a single file
+            rclone copyto "$BACKUP_REMOTE/latest.duckdb" "$DB_PATH"
+            ;;
+        *)
+            # Never fall back to a stale local latest.json
+            echo "$output" >&2
+            echo "❌ Could not fetch backup manifests from $BACKUP_REMOTE" >&2
+            exit 1
+            ;;
+    esac
+fi
 
 echo "✅ DuckDB restore complete"
 
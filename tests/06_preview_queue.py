@@ -0,0 +1,29 @@
+"""
+Smoke test: preview worker queue depth.
+
+Usage:
+    python tests/06_preview_queue.py
+"""
+
+import requests
+import json
+
+API_BASE = "http://localhost:8000"
+
+
+def main():
+    url = f"{API_BASE}/debug/previews"
+
+    print(f"🖼️  GET {url}")
+
+    resp = requests.get(url)
+    resp.raise_for_status()
+
+    data = resp.json()
+
+    print(f"\n✅ {data['pending']} pending ({data['in_flight']} in flight)\n")
+    print(json.dumps(data, indent=2))
+
+
+if __name__ == "__main__":
+    main()
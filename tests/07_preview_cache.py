@@ -0,0 +1,39 @@
+"""
+Smoke test: preview cache counters, optional purge by host.
+
+Usage:
+    python tests/07_preview_cache.py [host-to-purge]
+"""
+
+import requests
+import json
+import sys
+
+API_BASE = "http://localhost:8000"
+
+
+def main():
+    url = f"{API_BASE}/debug/preview-cache"
+
+    if len(sys.argv) > 1:
+        host = sys.argv[1]
+        print(f"🧹 DELETE {url}?host={host}")
+
+        resp = requests.delete(url, params={"host": host})
+        resp.raise_for_status()
+
+        print(f"✅ purged {resp.json()['purged']} entries\n")
+
+    print(f"🖼️  GET {url}")
+
+    resp = requests.get(url)
+    resp.raise_for_status()
+
+    data = resp.json()
+
+    print(f"\n✅ {data['entries']} entries, hit ratio {data['hit_ratio']}\n")
+    print(json.dumps(data, indent=2))
+
+
+if __name__ == "__main__":
+    main()
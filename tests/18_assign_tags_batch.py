@@ -0,0 +1,59 @@
+"""
+Smoke test: assign (or unassign) a tag set across many content items.
+
+Usage:
+    python tests/18_assign_tags_batch.py <tag_id>[,<tag_id>...] <content_id> [content_id ...]
+    python tests/18_assign_tags_batch.py --unassign <tag_ids> <content_id> [content_id ...]
+
+Example:
+    python tests/18_assign_tags_batch.py \
+    niche:fitness,species:human \
+    b5f9279-fc37-40dd-9c94-15cd37d40b79 \
+    0d7c2f0e-3c2a-4a47-9a63-5d1f3d7e8a11
+"""
+
+import sys
+import requests
+
+API_BASE = "http://localhost:8000"
+
+
+def main():
+    args = sys.argv[1:]
+
+    unassign = bool(args) and args[0] == "--unassign"
+    if unassign:
+        args = args[1:]
+
+    if len(args) < 2:
+        print("❌ Usage: python tests/18_assign_tags_batch.py [--unassign] <tag_ids> <content_id> [content_id ...]")
+        sys.exit(1)
+
+    tag_ids = args[0].split(",")
+    content_ids = args[1:]
+
+    action = "unassign" if unassign else "assign"
+    url = f"{API_BASE}/tags/{action}/batch"
+
+    print(f"🔗 {action.title()}ing {len(tag_ids)} tags × {len(content_ids)} items")
+    print("Tags:", tag_ids)
+
+    resp = requests.post(url, json={"content_ids": content_ids, "tag_ids": tag_ids})
+
+    if resp.status_code == 400:
+        print("❌ Rejected:", resp.json()["detail"])
+        sys.exit(1)
+
+    resp.raise_for_status()
+    data = resp.json()
+
+    if unassign:
+        print(f"✅ Removed {data['removed']} tag assignments")
+    else:
+        print(f"✅ Assigned {data['assigned']} (skipped {data['skipped']} existing)")
+
+    print("Usage deltas:", data["usage"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,35 @@
+"""
+Smoke test: write-behind tag usage counters.
+
+Shows pending usage deltas / flush counters, or (with --reconcile)
+flushes and recomputes usage_count from content_tag.
+
+Usage:
+    python tests/19_tag_usage.py
+    python tests/19_tag_usage.py --reconcile
+"""
+
+import sys
+import requests
+
+API_BASE = "http://localhost:8000"
+
+
+def main():
+    if "--reconcile" in sys.argv[1:]:
+        resp = requests.post(f"{API_BASE}/debug/tag-usage/reconcile")
+        resp.raise_for_status()
+        data = resp.json()
+        print(f"✅ Reconciled, corrected {data['corrected']} tags")
+    else:
+        resp = requests.get(f"{API_BASE}/debug/tag-usage")
+        resp.raise_for_status()
+        data = resp.json()
+
+    print(f"📊 Pending tags: {data['pending_tags']} (flush every {data['flush_interval']} s or {data['flush_size']} tags)")
+    print(f"Flushes: {data['flushes']} ({data['flushed_tags']} tags, {data['flush_errors']} errors)")
+    print(f"Reconciles: {data['reconciles']} ({data['reconciled_tags']} tags corrected)")
+
+
+if __name__ == "__main__":
+    main()
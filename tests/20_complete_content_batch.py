@@ -0,0 +1,47 @@
+"""
+Smoke test: validate (or complete) many content items at once.
+
+Usage:
+    python tests/20_complete_content_batch.py <content_id> [content_id ...]
+    python tests/20_complete_content_batch.py --complete <content_id> [content_id ...]
+"""
+
+import sys
+import requests
+
+API_BASE = "http://localhost:8000"
+
+
+def main():
+    args = sys.argv[1:]
+
+    complete = bool(args) and args[0] == "--complete"
+    if complete:
+        args = args[1:]
+
+    if not args:
+        print("❌ Usage: python tests/20_complete_content_batch.py [--complete] <content_id> [content_id ...]")
+        sys.exit(1)
+
+    action = "complete" if complete else "validate"
+
+    resp = requests.post(f"{API_BASE}/content/{action}/batch", json={"content_ids": args})
+    resp.raise_for_status()
+    data = resp.json()
+
+    if complete:
+        print(f"✅ Completed {len(data['completed'])} items")
+        failed = data["failed"]
+    else:
+        print(f"✅ {data['valid']} valid, {data['invalid']} invalid")
+        failed = [i for i in data["items"] if not i["valid"]]
+
+    for item in failed:
+        print(f"❌ {item['content_id']}: {'; '.join(item['violations'])}")
+
+    if data["not_found"]:
+        print("Not found:", data["not_found"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Smoke test: stream a content export to a file.
+
+Usage:
+    python tests/21_export_content.py [txt|csv|ndjson] [tag_id ...]
+"""
+
+import sys
+import requests
+
+API_BASE = "http://localhost:8000"
+
+
+def main():
+    args = sys.argv[1:]
+
+    fmt = args[0] if args else "txt"
+    tag_ids = args[1:]
+
+    url = f"{API_BASE}/content/export"
+
+    print(f"📦 POST {url} ({fmt})")
+
+    with requests.post(url, json={"format": fmt, "tag_ids": tag_ids}, stream=True) as resp:
+        resp.raise_for_status()
+
+        filename = resp.headers["content-disposition"].split('filename="')[1].rstrip('"')
+
+        lines = 0
+        with open(filename, "wb") as f:
+            for chunk in resp.iter_content(chunk_size=1 << 16):
+                f.write(chunk)
+                lines += chunk.count(b"\n")
+
+    print(f"✅ Wrote {filename} ({lines} lines)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Smoke test: background database snapshots.
+
+Shows the snapshot worker status (pending changes, next snapshot due,
+last snapshot size / duration, chunks its backup added), or (with --now) forces a snapshot
+regardless of the debounce window and waits for it.
+
+With --backoff (no server needed) runs a SnapshotWorker whose snapshot
+path can't be written, over the change threshold: failed snapshots
+must wait for the next window, not retry in a loop.
+
+Usage:
+    python tests/22_snapshot.py
+    python tests/22_snapshot.py --now
+    python tests/22_snapshot.py --backoff
+"""
+
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import requests
+
+API_BASE = "http://localhost:8000"
+
+
+def check_backoff():
+    os.chdir(tempfile.mkdtemp(prefix="snapshot-backoff-"))
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+    from app.db import database
+    from app.services.snapshot_worker import SnapshotWorker
+
+    worker = SnapshotWorker(path=Path("missing/latest.duckdb"), interval=0.5, max_changes=5)
+    worker.mark_dirty(10)
+    worker.start()
+    time.sleep(1.2)
+
+    status = worker.status()
+    worker.stop()  # one last (failing) attempt
+    database.close()
+
+    # t=0, 0.5, 1.0: three attempts, not thousands
+    assert 2 <= status["failed"] <= 4, status["failed"]
+    assert status["pending_changes"] == 10 and status["due_in"] <= 0.5, status
+    print(f"✅ {status['failed']} failed snapshots in 1.2 s, next retry in {status['due_in']} s")
+
+
+def main():
+    if "--backoff" in sys.argv[1:]:
+        check_backoff()
+        return
+
+    if "--now" in sys.argv[1:]:
+        resp = requests.post(f"{API_BASE}/debug/snapshot")
+        resp.raise_for_status()
+        print("📸 Snapshot queued")
+
+        while True:
+            resp = requests.get(f"{API_BASE}/debug/snapshot")
+            resp.raise_for_status()
+            data = resp.json()
+            if not data["pending"] and not data["in_progress"]:
+                break
+            time.sleep(0.5)
+    else:
+        resp = requests.get(f"{API_BASE}/debug/snapshot")
+        resp.raise_for_status()
+        data = resp.json()
+
+    last = data["last"]
+    if last:
+        print(f"✅ {last['path']}: {last['bytes'] / 1e6:.1f} MB in {last['duration_ms'] / 1000:.1f} s ({last['created_at']})")
+        backup = last["backup"]
+        print(f"   backup {backup['name']}: {backup['new_chunks']}/{backup['chunks']} new chunks, "
+              f"{backup['stored_bytes'] / 1e6:.1f} MB written{' (unchanged)' if backup['unchanged'] else ''}")
+    else:
+        print("No snapshot yet")
+
+    if data["pending"]:
+        print(f"⏳ {data['pending_changes']} changes pending, due in {data['due_in']} s")
+
+    print(f"Changes: {data['changes']} in {data['marked']} writes → {data['snapshots']} snapshots ({data['failed']} failed)")
+    if data["last_error"]:
+        print(f"❌ {data['last_error']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+Test: Drive sync queue against a fake rclone.
+
+Runs DriveSyncQueue in a scratch directory (its own data/live.duckdb,
+a small snapshot database and backup store) with a fake `rclone` executable that copies / syncs
+into a local "remote" directory and can be told to fail or to be slow.
+Checks superseding, retries with backoff, giving up, skipping
+unchanged backups, uploading only new chunks (and deleting GC'd ones),
+a backup + GC landing in the middle of an upload, draining on stop, a
+stop that times out mid-upload and the attempt history.
+
+Usage:
+    python tests/23_drive_sync.py
+"""
+
+import os
+import stat
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+FAKE_RCLONE = """#!{python}
+import os, shutil, sys, time
+from pathlib import Path
+
+state = Path({state!r})
+command, src, dst, *_ = sys.argv[1:]
+src, remote = Path(src), state / "remote" / dst.split(":", 1)[1]
+
+with open(state / "calls", "a") as f:
+    f.write(f"{{command}} {{src}}\\n")
+
+time.sleep(float((state / "delay").read_text() or 0))
+
+# "<command> <folder> <file>": back up <file> (GC down to 1) right then
+hook = state / "hook"
+if hook.exists() and hook.read_text().split()[:2] == [command, src.name]:
+    data = hook.read_text().split()[2]
+    hook.unlink()
+    os.environ["BACKUP_KEEP"] = "1"
+    sys.path.insert(0, {root!r})
+    from app.db.backup import write_backup
+    write_backup(Path(data))
+
+fails = int((state / "fail").read_text() or 0)
+if fails:
+    (state / "fail").write_text(str(fails - 1))
+    sys.exit("fake rclone: upload failed")
+
+files = {{p.relative_to(src) for p in src.rglob("*") if p.is_file()}}
+for name in files:
+    target = remote / name
+    if not target.exists() or target.read_bytes() != (src / name).read_bytes():
+        target.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(src / name, target)
+        with open(state / "transfers", "a") as f:
+            f.write(f"{{name}}\\n")
+
+if command == "sync":
+    for target in [p for p in remote.rglob("*") if p.is_file()]:
+        if target.relative_to(remote) not in files:
+            target.unlink()
+"""
+
+
+def wait_idle(queue, con, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        status = queue.status(con=con)
+        if status["queued"] is None and status["uploading"] is None:
+            return
+        time.sleep(0.05)
+    raise AssertionError("queue did not drain")
+
+
+def main():
+    workdir = Path(tempfile.mkdtemp(prefix="drive-sync-"))
+    os.chdir(workdir)
+    (workdir / "data").mkdir()
+
+    state = workdir / "rclone"
+    (state / "remote").mkdir(parents=True)
+    (state / "fail").write_text("0")
+    (state / "delay").write_text("0")
+
+    rclone = state / "rclone"
+    rclone.write_text(FAKE_RCLONE.format(python=sys.executable, state=str(state), root=str(ROOT)))
+    rclone.chmod(rclone.stat().st_mode | stat.S_IEXEC)
+
+    from app.db import get_db, database
+    from app.db import backup
+    from app.db.snapshot import fingerprint
+    from app.services.drive_sync import DriveSyncQueue
+
+    con = get_db()
+
+    # Stands in for a snapshot: about 70 backup chunks
+    data = workdir / "snapshot.duckdb"
+
+    def edit(sql: str):
+        db = duckdb.connect(str(data))
+        db.execute(sql)
+        db.close()
+
+    def data_fingerprint(path=data):
+        db = duckdb.connect(str(path), read_only=True)
+        try:
+            return fingerprint(db)
+        finally:
+            db.close()
+
+    edit("CREATE TABLE t AS SELECT i, md5(i::VARCHAR) || md5((i * 7)::VARCHAR) AS v FROM range(20000) r(i)")
+    result = backup.write_backup(data)
+    snapshot = Path(result["manifest"])
+    remote = state / "remote" / "backups"
+
+    def lines(name):
+        path = state / name
+        return path.read_text().splitlines() if path.exists() else []
+
+    def calls():
+        # Uploads that got as far as the manifests (one sync each)
+        return sum(1 for line in lines("calls") if line.startswith("sync") and "manifests" in line)
+
+    def remote_copy():
+        # Fingerprint of the latest backup, restored from the remote
+        restored = workdir / "restored.duckdb"
+        backup.restore_backup("latest", restored, store=remote)
+        return data_fingerprint(restored)
+
+    def make_queue(**kwargs):
+        return DriveSyncQueue(
+            remote="fake:backups",
+            rclone=str(rclone),
+            **{"max_attempts": 3, "retry_base": 0.2, **kwargs},
+        )
+
+    # 1. Jobs queued before start: only the newest is uploaded
+    queue = make_queue()
+    job_ids = [queue.enqueue(snapshot) for _ in range(3)]
+    queue.start()
+    wait_idle(queue, con)
+
+    statuses = dict(con.execute("SELECT id, status FROM drive_sync_job").fetchall())
+    assert [statuses[j] for j in job_ids] == ["superseded", "superseded", "success"], statuses
+    assert calls() == 1 and remote_copy() == data_fingerprint()
+    print("✅ superseded jobs skipped, newest uploaded")
+
+    # 2. Failures are retried with backoff, every attempt recorded
+    (state / "fail").write_text("2")
+    job_id = queue.enqueue(snapshot)
+    wait_idle(queue, con)
+
+    attempts = con.execute(
+        """
+        SELECT attempt, status, started_at, duration_ms, bytes, error
+        FROM drive_sync_attempt WHERE job_id = ? ORDER BY attempt
+        """,
+        (job_id,),
+    ).fetchall()
+    assert [a[1] for a in attempts] == ["failed", "failed", "success"], attempts
+    assert "upload failed" in attempts[0][5] and attempts[2][4] == result["stored_bytes"]
+    gaps = [(b[2] - a[2]).total_seconds() for a, b in zip(attempts, attempts[1:])]
+    assert gaps[0] >= 0.2 and gaps[1] >= 0.4, gaps
+    print(f"✅ retried after {gaps[0]:.1f} s, {gaps[1]:.1f} s")
+
+    # 3. Gives up after max_attempts
+    (state / "fail").write_text("99")
+    job_id = queue.enqueue(snapshot)
+    wait_idle(queue, con)
+
+    status, attempts = con.execute(
+        "SELECT status, attempts FROM drive_sync_job WHERE id = ?", (job_id,)
+    ).fetchone()
+    assert (status, attempts) == ("failed", 3), (status, attempts)
+    assert queue.last_sync(con=con)["status"] == "failed"
+    print("✅ failed after 3 attempts")
+
+    # 4. A new snapshot supersedes a job waiting on backoff
+    queue.stop()
+    queue = make_queue(retry_base=60)
+    queue.start()
+    (state / "fail").write_text("1")
+    old_id = queue.enqueue(snapshot)
+    time.sleep(0.5)
+    new_id = queue.enqueue(snapshot)
+    wait_idle(queue, con)
+
+    statuses = dict(con.execute("SELECT id, status FROM drive_sync_job").fetchall())
+    assert (statuses[old_id], statuses[new_id]) == ("superseded", "success"), statuses
+    print("✅ backoff job superseded by a newer snapshot")
+
+    # 5. An unchanged snapshot (same fingerprint) isn't uploaded again
+    before = calls()
+    first = queue.enqueue(snapshot, "fp-1")
+    wait_idle(queue, con)
+    same = queue.enqueue(snapshot, "fp-1")
+    wait_idle(queue, con)
+    changed = queue.enqueue(snapshot, "fp-2")
+    wait_idle(queue, con)
+
+    statuses = dict(con.execute("SELECT id, status FROM drive_sync_job").fetchall())
+    assert [statuses[j] for j in (first, same, changed)] == ["success", "skipped", "success"], statuses
+    assert calls() == before + 2, calls() - before
+    assert queue.last_sync(con=con)["status"] == "success"
+    print("✅ unchanged snapshot skipped")
+
+    # 6. A changed snapshot uploads only its new chunks; chunks GC'd
+    #    locally are deleted from the remote too
+    backup.BACKUP_KEEP = 1
+    edit("UPDATE t SET v = 'changed' WHERE i = 5000")
+
+    transfers = len(lines("transfers"))
+    result = backup.write_backup(data, "fp-3")
+    snapshot = Path(result["manifest"])
+    queue.enqueue(snapshot, "fp-3")
+    wait_idle(queue, con)
+
+    uploaded = [name for name in lines("transfers")[transfers:] if not name.endswith(".json")]
+    remote_chunks = {p.name for p in (remote / "chunks").rglob("*") if p.is_file()}
+    # One row changed: its chunk (two if the row now ends a chunk)
+    assert len(uploaded) == result["new_chunks"] <= 2, (uploaded, result["new_chunks"])
+    assert remote_chunks == {digest for digest, _ in backup.read_manifest()["chunks"]}
+    assert remote_copy() == data_fingerprint()
+    print(f"✅ {len(uploaded)}/{result['chunks']} chunks uploaded, "
+          f"{result['gc']['chunks_removed']} GC'd chunks deleted")
+
+    # 7. A backup (+ GC) landing mid-upload, before the last step: the
+    #    remote still gets one consistent backup
+    edit("UPDATE t SET v = 'changed' WHERE i = 15000")
+
+    (state / "hook").write_text(f"sync chunks {data}")
+    queue.enqueue(snapshot, "fp-4")
+    wait_idle(queue, con)
+
+    remote_latest = backup.read_manifest(store=remote)
+    remote_chunks = {p.name for p in (remote / "chunks").rglob("*") if p.is_file()}
+    assert not (state / "hook").exists()
+    assert remote_latest["name"] == snapshot.name, remote_latest["name"]
+    assert {digest for digest, _ in remote_latest["chunks"]} <= remote_chunks
+    remote_copy()
+    print("✅ backup written mid-upload left the remote consistent")
+
+    snapshot = Path(backup.write_backup(data)["manifest"])
+
+    # 8. stop() finishes the running upload and the queued one
+    (state / "delay").write_text("0.5")
+    before = calls()
+    queue.enqueue(snapshot)
+    time.sleep(0.2)
+    last_id = queue.enqueue(snapshot)
+    queue.stop()
+
+    assert calls() == before + 2, calls() - before
+    assert con.execute(
+        "SELECT status FROM drive_sync_job WHERE id = ?", (last_id,)
+    ).fetchone()[0] == "success"
+    print("✅ drained on stop")
+
+    # 9. stop() timing out mid-upload keeps the worker (still using the
+    #    DB); start() waits for it instead of adding a second one
+    queue = make_queue(drain_timeout=0.2)
+    queue.start()
+    job_id = queue.enqueue(snapshot)
+    time.sleep(0.2)
+
+    assert queue.stop() is False and queue.status(con=con)["running"]
+    queue.start()
+    workers = [t for t in threading.enumerate() if t.name == "drive-sync"]
+    assert len(workers) == 1, workers
+    wait_idle(queue, con)
+    assert queue.stop()
+
+    assert con.execute(
+        "SELECT status FROM drive_sync_job WHERE id = ?", (job_id,)
+    ).fetchone()[0] == "success"
+    print("✅ timed-out stop kept the upload, restart ran one worker")
+
+    for row in queue.history(5, con=con):
+        print(f"   {row['started_at']:%H:%M:%S.%f} attempt {row['attempt']} {row['status']:7} "
+              f"{row['duration_ms']:7.1f} ms {row['bytes']} bytes {row['error'] or ''}")
+
+    con.close()
+    database.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+Benchmark: per-call duckdb.connect (legacy) vs shared connection + pooled cursor.
+
+Runs in-process against a throwaway database, replaying the
+GET /content/{id} service path (snapshot + validation).
+
+Usage:
+    python tests/40_bench_db_pool.py [requests] [content_rows]
+"""
+
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from uuid import uuid4
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.db import Database
+import app.db.db as db_module
+import app.services.content_snapshot as content_snapshot
+import app.services.content_validation as content_validation
+
+
+def seed(database: Database, rows: int) -> list[str]:
+    con = database.cursor()
+
+    for pos, group_id in enumerate(["species", "mood", "niche"]):
+        con.execute(
+            "INSERT INTO tag_group VALUES (?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP)",
+            (group_id, group_id, pos != 1, 1 if pos != 1 else 0, 3, pos),
+        )
+        for i in range(20):
+            con.execute(
+                "INSERT INTO tag VALUES (?, ?, ?, ?, 0, NULL)",
+                (f"{group_id}:t{i}", f"t{i}", group_id, group_id),
+            )
+
+    ids = [str(uuid4()) for _ in range(rows)]
+    con.execute(
+        """
+        INSERT INTO content (id, url, source_url, status, created_at)
+        SELECT id, 'https://example.com/' || id || '.jpg', NULL, 'draft', now()
+        FROM unnest(?) AS t(id)
+        """,
+        (ids,),
+    )
+    con.execute(
+        """
+        INSERT INTO content_tag
+        SELECT id, 'species:t' || (hash(id) % 20)::INT
+        FROM unnest(?) AS t(id)
+        """,
+        (ids,),
+    )
+
+    return ids
+
+
+def percentiles(samples: list[float]) -> tuple[float, float]:
+    samples = sorted(samples)
+    p50 = statistics.median(samples)
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+    return p50 * 1000, p99 * 1000
+
+
+def bench_legacy(path: str, ids: list[str], n: int):
+    opened = 0
+    open_cons = []
+
+    def legacy_get_db():
+        nonlocal opened
+        opened += 1
+        con = duckdb.connect(path)
+        open_cons.append(con)
+        return con
+
+    content_snapshot.get_db = legacy_get_db
+    content_validation.get_db = legacy_get_db
+
+    # Old code path: validation opened its own connection
+    validate_content = content_snapshot.validate_content
+    content_snapshot.validate_content = (
+        lambda content_id, con=None: validate_content(content_id)
+    )
+
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        content_snapshot.get_content_snapshot(ids[i % len(ids)])
+        samples.append(time.perf_counter() - start)
+
+        # Legacy connections were dropped (and closed) at request end
+        while open_cons:
+            open_cons.pop().close()
+
+    content_snapshot.validate_content = validate_content
+
+    return opened / n, percentiles(samples)
+
+
+def bench_pooled(path: str, ids: list[str], n: int):
+    database = Database(path)
+    database.connection  # open once, like app startup
+
+    samples = []
+    for i in range(n):
+        start = time.perf_counter()
+        with database.acquire() as con:
+            content_snapshot.get_content_snapshot(ids[i % len(ids)], con=con)
+        samples.append(time.perf_counter() - start)
+
+    stats = dict(database.stats)
+    database.close()
+
+    return stats["connections_opened"] / n, stats, percentiles(samples)
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    rows = int(sys.argv[2]) if len(sys.argv) > 2 else 10_000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = str(Path(tmp) / "bench.duckdb")
+
+        database = Database(path)
+        ids = seed(database, rows)
+        database.close()
+
+        print(f"📊 {n} snapshot requests over {rows} content rows\n")
+
+        per_req, (p50, p99) = bench_legacy(path, ids, n)
+        print("Before (duckdb.connect per get_db call)")
+        print(f"   connections/request: {per_req:.2f}")
+        print(f"   p50: {p50:.2f} ms   p99: {p99:.2f} ms\n")
+
+        content_snapshot.get_db = db_module.get_db
+        content_validation.get_db = db_module.get_db
+
+        per_req, stats, (p50, p99) = bench_pooled(path, ids, n)
+        print("After (shared connection, one pooled cursor per request)")
+        print(f"   connections/request: {per_req:.4f}")
+        print(f"   cursors created:     {stats['cursors_created']}")
+        print(f"   p50: {p50:.2f} ms   p99: {p99:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Benchmark: sequential vs concurrent /content/expand.
+
+Starts local stub HTTP servers serving Imgur- and ArtStation-shaped
+JSON fixtures (plus HTML pages with og:image for previews), each with
+artificial latency, and expands the same gallery URLs with the old
+sequential path (expand_url per URL) and with expand_urls().
+
+Runs in a scratch directory (its own data/live.duckdb), so nothing
+touches the app's database; expand itself doesn't use the preview
+cache (no DB), so both runs really fetch.
+
+Usage:
+    python tests/41_bench_expand.py [galleries] [latency_ms]
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import app.services.content_expand as content_expand
+
+IMAGES_PER_GALLERY = 4
+PAGES_PER_GALLERY = 2
+
+
+def start_stub(latency: float) -> str:
+    """
+    One stub host. Routes:
+      /gallery/<id>.json   Imgur gallery JSON
+      /projects/<id>.json  ArtStation project JSON
+      /page/<id>           HTML page with og:image (needs a preview fetch)
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            base = f"http://{self.headers['Host']}"
+            name = self.path.rsplit("/", 1)[-1].removesuffix(".json")
+
+            media = [f"{base}/img/{name}_{i}.jpg" for i in range(IMAGES_PER_GALLERY)]
+            pages = [f"{base}/page/{name}_{i}" for i in range(PAGES_PER_GALLERY)]
+
+            if self.path.startswith("/gallery/"):
+                body = {"data": {"images": [{"link": u} for u in media + pages]}}
+                return self._send(json.dumps(body), "application/json")
+
+            if self.path.startswith("/projects/"):
+                body = {"assets": [{"image_url": u} for u in media + pages]}
+                return self._send(json.dumps(body), "application/json")
+
+            if self.path.startswith("/page/"):
+                html = (
+                    f"<html><head><title>{name}</title>"
+                    f'<meta property="og:image" content="/img/{name}.jpg">'
+                    f"</head><body></body></html>"
+                )
+                return self._send(html, "text/html")
+
+            self.send_response(404)
+            self.end_headers()
+
+        def _send(self, body: str, content_type: str):
+            data = body.encode()
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    return f"http://127.0.0.1:{server.server_port}"
+
+
+def main():
+    galleries = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 100) / 1000
+
+    # app.db opens ./data/live.duckdb
+    os.chdir(tempfile.mkdtemp(prefix="expand-bench-"))
+    os.mkdir("data")
+
+    content_expand.IMGUR_BASE = start_stub(latency)
+    content_expand.ARTSTATION_BASE = start_stub(latency)
+
+    urls = [
+        f"https://imgur.com/gallery/abc{i:04d}"
+        if i % 2 == 0
+        else f"https://www.artstation.com/artwork/art{i:04d}"
+        for i in range(galleries)
+    ]
+
+    print(
+        f"📊 {galleries} galleries × {IMAGES_PER_GALLERY + PAGES_PER_GALLERY} "
+        f"media, {latency * 1000:.0f} ms per stub request\n"
+    )
+
+    start = time.perf_counter()
+    before = [content_expand.expand_url(u) for u in urls]
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = content_expand.expand_urls(urls)
+    concurrent = time.perf_counter() - start
+
+    assert before == after, "concurrent expansion changed the results"
+
+    items = sum(len(r["items"]) for r in after)
+    print(f"Before (sequential):  {sequential:7.2f} s")
+    print(
+        f"After  (concurrent):  {concurrent:7.2f} s   "
+        f"(workers={content_expand.EXPAND_WORKERS}, "
+        f"per_host={content_expand.EXPAND_PER_HOST})"
+    )
+    print(f"Speedup: {sequential / concurrent:.1f}x, {items} items, same order ✅")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Benchmark: per-call requests.get vs the shared pooled http_client.
+
+Starts a local keep-alive HTTP stub (Imgur-like JSON, small per-request
+latency) and issues the same GETs from a thread pool, first with a
+fresh requests.get per call (new TCP connection every time), then
+through app.services.http_client (one keep-alive pool per host).
+
+Usage:
+    python tests/42_bench_http_pool.py [requests] [threads]
+"""
+
+import json
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.http_client import http_client
+
+LATENCY = 0.005
+
+
+class Handler(BaseHTTPRequestHandler):
+    # Keep-alive needs HTTP/1.1 + Content-Length; headers and body are
+    # separate writes, so disable Nagle to avoid delayed-ACK stalls
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    connections = 0
+
+    def setup(self):
+        super().setup()
+        Handler.connections += 1
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        data = json.dumps({"data": {"images": [{"link": self.path}]}}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def run(get, urls: list[str], threads: int) -> float:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        for res in pool.map(get, urls):
+            res.raise_for_status()
+    return time.perf_counter() - start
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    base = f"http://127.0.0.1:{server.server_port}"
+    urls = [f"{base}/gallery/g{i}.json" for i in range(n)]
+
+    print(f"📊 {n} GETs, {threads} threads, {LATENCY * 1000:.0f} ms server latency\n")
+
+    Handler.connections = 0
+    before = run(lambda u: requests.get(u, timeout=10), urls, threads)
+    before_conns = Handler.connections
+
+    Handler.connections = 0
+    after = run(http_client.get, urls, threads)
+    after_conns = Handler.connections
+
+    stats = http_client.stats
+    print(f"Before (requests.get):  {before:6.2f} s   {before_conns:5d} connections")
+    print(f"After  (http_client):   {after:6.2f} s   {after_conns:5d} connections")
+    print(
+        f"Client stats: {stats['connections_opened']} opened, "
+        f"{stats['connections_reused']} reused, {stats['retries']} retries"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Benchmark: full-body BeautifulSoup preview parse vs head-only streaming.
+
+Serves heavy pages (OG tags in <head>, a large <body>) from a local
+stub and extracts previews the old way (download r.text, build the
+whole soup) and with content_preview.fetch_preview (stream to </head>,
+regex meta scan).
+
+Usage:
+    python tests/43_bench_preview_parse.py [pages] [body_kb]
+"""
+
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import requests
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.services.content_preview import fetch_preview, preview_fetch_stats
+
+PAGE = b""
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(PAGE)))
+        self.end_headers()
+        try:
+            self.wfile.write(PAGE)
+        except (BrokenPipeError, ConnectionResetError):
+            # Head-only readers hang up early
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+class Server(ThreadingHTTPServer):
+    def handle_error(self, request, client_address):
+        # Connections reset by head-only readers are expected
+        pass
+
+
+def build_page(body_kb: int) -> bytes:
+    head = (
+        "<!doctype html><html><head>"
+        '<meta charset="utf-8"><title>Heavy page</title>'
+        + '<link rel="stylesheet" href="/s.css">' * 50
+        + '<meta property="og:title" content="Heavy &amp; slow">'
+        '<meta property="og:image" content="/img/cover.jpg?w=1200">'
+        '<meta name="description" content="A big page">'
+        "</head>"
+    )
+    row = '<div class="card"><img src="/t.jpg"><p>lorem ipsum dolor sit</p></div>'
+    body = "<body>" + row * (body_kb * 1024 // len(row)) + "</body></html>"
+    return (head + body).encode()
+
+
+def old_preview(url: str) -> tuple[dict, int]:
+    r = requests.get(url, timeout=10)
+    soup = BeautifulSoup(r.text, "html.parser")
+    og = soup.find("meta", property="og:image")
+    return {"preview_url": og["content"] if og else None}, len(r.content)
+
+
+def main():
+    global PAGE
+
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    body_kb = int(sys.argv[2]) if len(sys.argv) > 2 else 512
+
+    PAGE = build_page(body_kb)
+
+    server = Server(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    urls = [f"http://127.0.0.1:{server.server_port}/p{i}" for i in range(pages)]
+
+    print(f"📊 {pages} pages × {len(PAGE) / 1024:.0f} KB\n")
+
+    start = time.perf_counter()
+    old_bytes = sum(old_preview(u)[1] for u in urls)
+    before = time.perf_counter() - start
+
+    start = time.perf_counter()
+    previews = [fetch_preview(u) for u in urls]
+    after = time.perf_counter() - start
+
+    assert all(p["preview_type"] == "image" for p in previews)
+
+    stats = preview_fetch_stats()
+    print(f"Before (full soup):  {before / pages * 1000:8.1f} ms/page  {old_bytes / pages / 1024:8.1f} KB/page")
+    print(
+        f"After  (head-only):  {after / pages * 1000:8.1f} ms/page  "
+        f"{stats['avg_bytes'] / 1024:8.1f} KB/page  "
+        f"(parse {stats['avg_parse_ms']} ms, {stats['soup_fallbacks']} soup fallbacks)"
+    )
+
+
+if __name__ == "__main__":
+    main()
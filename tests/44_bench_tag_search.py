@@ -0,0 +1,128 @@
+"""
+Benchmark: SQL editdist3 autocomplete vs the in-memory tag index.
+
+Loads N synthetic tags into one group of an in-memory DuckDB, then runs
+the same autocomplete queries (prefixes, one-letter typos, scrambled
+labels) through the old per-query SQL and through TagIndex.search.
+
+Usage:
+    python tests/44_bench_tag_search.py [tags] [queries]
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.schema import init_schema
+from app.services.tag_index import TagIndex
+
+GROUP = "niche"
+
+LEGACY_SQL = """
+    SELECT
+        id,
+        CASE WHEN lower(label) LIKE ? THEN 1 ELSE 0 END AS prefix_match,
+        editdist3(replace(lower(label), ' ', '_'), ?) AS distance
+    FROM tag
+    WHERE group_id = ?
+    AND (
+        lower(label) LIKE ?
+        OR editdist3(replace(lower(label), ' ', '_'), ?) <= ?
+    )
+    ORDER BY prefix_match DESC, distance ASC, usage_count DESC, last_used DESC
+    LIMIT ?
+"""
+
+
+def make_labels(n: int) -> list[str]:
+    consonants = "bcdfghjklmnprstvwz"
+    syllables = [c + v for c in consonants for v in "aeiou"]
+    syllables += [s + e for s in syllables for e in "nrstlk"]
+
+    labels = set()
+    while len(labels) < n:
+        words = random.choices([1, 2], [3, 1])[0]
+        labels.add(" ".join(
+            "".join(random.choices(syllables, k=random.randint(1, 3)))
+            for _ in range(words)
+        ))
+    return sorted(labels)
+
+
+def legacy_search(con, q: str, limit: int = 10) -> list[str]:
+    q = q.lower()
+    rows = con.execute(
+        LEGACY_SQL,
+        (f"{q}%", q, GROUP, f"{q}%", q, max(2, len(q) // 2), limit),
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return f"p50 {pick(0.5):7.2f} ms  p95 {pick(0.95):7.2f} ms  p99 {pick(0.99):7.2f} ms"
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    queries = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+
+    random.seed(7)
+    labels = make_labels(n)
+
+    con = duckdb.connect()
+    init_schema(con)
+
+    rows = [
+        {"id": f"{GROUP}:{i}", "label": label, "usage": random.randint(0, 500)}
+        for i, label in enumerate(labels)
+    ]
+    con.execute(
+        """
+        INSERT INTO tag (id, label, category, group_id, usage_count)
+        SELECT id, label, ?, ?, usage
+        FROM (SELECT unnest(from_json(?, '[{"id":"VARCHAR","label":"VARCHAR","usage":"INTEGER"}]'), recursive := true))
+        """,
+        (GROUP, GROUP, json.dumps(rows)),
+    )
+
+    index = TagIndex()
+    start = time.perf_counter()
+    index.load(con)
+    print(f"📊 {n} tags in '{GROUP}', index built in {time.perf_counter() - start:.2f} s\n")
+
+    sample = random.sample(labels, queries)
+    qs = [label[: random.randint(2, 8)] for label in sample[: queries // 3]]
+    qs += [label[:-2] + "x" + label[-1] for label in sample[queries // 3: 2 * queries // 3]]
+    qs += ["".join(random.sample(label, len(label))) for label in sample[2 * queries // 3:]]
+
+    before, old_results = [], []
+    for q in qs:
+        start = time.perf_counter()
+        old_results.append(legacy_search(con, q))
+        before.append((time.perf_counter() - start) * 1000)
+
+    after, new_results = [], []
+    for q in qs:
+        start = time.perf_counter()
+        new_results.append([t["id"] for t in index.search(GROUP, q)])
+        after.append((time.perf_counter() - start) * 1000)
+
+    same_top = sum(
+        old[:1] == new[:1] for old, new in zip(old_results, new_results)
+    )
+
+    print(f"Before (SQL editdist3):  {percentiles(before)}")
+    print(f"After  (tag index):      {percentiles(after)}")
+    print(f"Same top result: {same_top}/{len(qs)} queries")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""
+Benchmark: SQL tag group validators vs the cached group model.
+
+Loads synthetic tag groups, tags and content_tag rows into an
+in-memory DuckDB, then validates random content items three ways:
+
+  - legacy:   tag_group ⋈ tag ⋈ content_tag join per item
+  - counts:   tag_group ⋈ content_group_count per item
+  - model:    validate_content (cached model + content_group_count)
+
+Usage:
+    python tests/45_bench_group_validation.py [items] [tags] [validations]
+"""
+
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.schema import init_schema
+from app.services.content_group_count import rebuild_group_counts
+from app.services.content_validation import validate_content
+
+GROUPS = [
+    # id, required, min, max
+    ("species", True, 1, 1),
+    ("mood", False, 0, 3),
+    ("niche", True, 1, None),
+    ("style", False, 0, 2),
+    ("color", False, 0, None),
+    ("setting", True, 1, 2),
+    ("lighting", False, 0, 1),
+    ("source", False, 0, None),
+]
+
+LEGACY_SQL = """
+    SELECT
+        tg.id,
+        tg.required,
+        tg.min_count,
+        tg.max_count,
+        COUNT(ct.tag_id) AS tag_count
+    FROM tag_group tg
+    LEFT JOIN tag t ON t.group_id = tg.id
+    LEFT JOIN content_tag ct
+      ON ct.tag_id = t.id
+     AND ct.content_id = ?
+    GROUP BY tg.id, tg.required, tg.min_count, tg.max_count, tg.position
+    ORDER BY tg.position
+"""
+
+COUNTS_SQL = """
+    SELECT
+        tg.id,
+        tg.required,
+        tg.min_count,
+        tg.max_count,
+        COALESCE(cgc.n, 0) AS tag_count
+    FROM tag_group tg
+    LEFT JOIN content_group_count cgc
+      ON cgc.group_id = tg.id
+     AND cgc.content_id = ?
+    ORDER BY tg.position
+"""
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return f"p50 {pick(0.5):7.3f} ms  p95 {pick(0.95):7.3f} ms"
+
+
+def sql_status(rows) -> list[tuple]:
+    return [
+        (
+            group_id,
+            "missing" if count < min_c
+            else "over_limit" if max_c is not None and count > max_c
+            else "ok",
+        )
+        for group_id, required, min_c, max_c, count in rows
+    ]
+
+
+def main():
+    items = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    tags = int(sys.argv[2]) if len(sys.argv) > 2 else 20_000
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 500
+
+    random.seed(7)
+
+    con = duckdb.connect()
+    init_schema(con)
+
+    con.executemany(
+        """
+        INSERT INTO tag_group (id, required, min_count, max_count, position)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(*g, pos) for pos, g in enumerate(GROUPS)],
+    )
+
+    tag_rows = [
+        {"id": f"{g[0]}:{i}", "group_id": g[0]}
+        for i in range(tags)
+        for g in [GROUPS[i % len(GROUPS)]]
+    ]
+    con.execute(
+        """
+        INSERT INTO tag (id, label, category, group_id)
+        SELECT id, id, group_id, group_id
+        FROM (SELECT unnest(from_json(?, '[{"id":"VARCHAR","group_id":"VARCHAR"}]'), recursive := true))
+        """,
+        (json.dumps(tag_rows),),
+    )
+
+    pairs = {
+        (f"c{c}", tag["id"])
+        for c in range(items)
+        for tag in random.sample(tag_rows, random.randint(2, 8))
+    }
+    con.execute(
+        """
+        INSERT INTO content_tag (content_id, tag_id)
+        SELECT unnest(from_json(?, '["VARCHAR"]')), unnest(from_json(?, '["VARCHAR"]'))
+        """,
+        (json.dumps([p[0] for p in pairs]), json.dumps([p[1] for p in pairs])),
+    )
+    rebuild_group_counts(con)
+
+    print(f"📊 {len(GROUPS)} groups, {tags} tags, {items} items, {len(pairs)} assignments\n")
+
+    sample = [f"c{random.randrange(items)}" for _ in range(runs)]
+
+    # Warm-up (model load, plan caches)
+    validate_content(sample[0], con=con)
+    con.execute(LEGACY_SQL, (sample[0],)).fetchall()
+    con.execute(COUNTS_SQL, (sample[0],)).fetchall()
+
+    results = {}
+    for name, run in [
+        ("legacy", lambda cid: sql_status(con.execute(LEGACY_SQL, (cid,)).fetchall())),
+        ("counts", lambda cid: sql_status(con.execute(COUNTS_SQL, (cid,)).fetchall())),
+        ("model", lambda cid: [(g["id"], g["status"]) for g in validate_content(cid, con=con)["groups"]]),
+    ]:
+        timings, outputs = [], []
+        for cid in sample:
+            start = time.perf_counter()
+            outputs.append(run(cid))
+            timings.append((time.perf_counter() - start) * 1000)
+        results[name] = (timings, outputs)
+
+    print(f"Legacy join (tag_group ⋈ tag ⋈ content_tag): {percentiles(results['legacy'][0])}")
+    print(f"SQL over content_group_count:               {percentiles(results['counts'][0])}")
+    print(f"Cached group model:                         {percentiles(results['model'][0])}")
+
+    same = sum(
+        a == b == c
+        for a, b, c in zip(*(results[k][1] for k in ("legacy", "counts", "model")))
+    )
+    print(f"\nSame result: {same}/{runs} items")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark: GET /content/next query vs leased claims from content_queue.
+
+Fills an in-memory DuckDB with N content rows of which only the newest
+`open` are not complete (the usual shape: a long tail of finished
+work), then times the old `status != 'complete' ORDER BY created_at`
+pick against claim_content for growing N.
+
+Usage:
+    python tests/46_bench_content_queue.py [open] [claims] [sizes...]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.schema import init_schema
+from app.services.content_queue import claim_content, rebuild_queue
+
+LEGACY_SQL = """
+    SELECT id
+    FROM content
+    WHERE status != 'complete'
+    ORDER BY created_at
+    LIMIT 1
+"""
+
+
+def percentiles(samples: list[float]) -> str:
+    samples = sorted(samples)
+    pick = lambda p: samples[min(len(samples) - 1, int(len(samples) * p))]
+    return f"p50 {pick(0.5):7.2f} ms  p95 {pick(0.95):7.2f} ms"
+
+
+def timed(fn, runs: int) -> list[float]:
+    samples = []
+    for i in range(runs):
+        start = time.perf_counter()
+        fn(i)
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def main():
+    open_items = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000
+    claims = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    sizes = [int(s) for s in sys.argv[3:]] or [100_000, 1_000_000, 2_000_000]
+
+    for n in sizes:
+        con = duckdb.connect()
+        init_schema(con)
+
+        con.execute(
+            """
+            INSERT INTO content (id, url, status, created_at)
+            SELECT
+                'c' || i,
+                'https://example.com/' || i,
+                CASE WHEN i < ? THEN 'complete' ELSE 'draft' END,
+                TIMESTAMP '2024-01-01' + to_microseconds(i * 1000)
+            FROM range(?) r(i)
+            """,
+            (n - open_items, n),
+        )
+        rebuild_queue(con)
+
+        before = timed(lambda i: con.execute(LEGACY_SQL).fetchone(), claims)
+        after = timed(lambda i: claim_content(f"tagger{i % 8}", 10, con=con), claims)
+
+        print(f"📊 {n:>9} items, {open_items} open")
+        print(f"   Before (/next, 1 item, no lease):  {percentiles(before)}")
+        print(f"   After  (claim 10, leased):         {percentiles(after)}")
+
+        con.close()
+
+
+if __name__ == "__main__":
+    main()
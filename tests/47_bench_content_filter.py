@@ -0,0 +1,160 @@
+"""
+Benchmark: per-predicate tag semi-joins vs planned filter SQL.
+
+Fills an in-memory DuckDB with N content items tagged from a skewed
+(few very common, many rare) tag vocabulary, then counts the matches
+of a few filter expressions two ways:
+
+  - naive:    one `c.id IN (SELECT ... WHERE tag_id = ?)` per tag, in
+              the order written
+  - planned:  compile_filter (tag predicates merged into one
+              content_tag set query, most selective operands first)
+
+Usage:
+    python tests/47_bench_content_filter.py [items] [runs]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.schema import init_schema
+from app.services.content_filter import compile_filter, parse_filter
+from app.services.tag_group_model import tag_group_model
+from app.services.tag_index import tag_index
+
+GROUPS = 8
+TAGS = 400
+TAGS_PER_ITEM = 5
+
+FILTERS = [
+    "tag:g0:t0 AND tag:g1:t1 AND tag:g7:t399",
+    "group:g0 has all [t0, t8, t392]",
+    "(tag:g0:t0 OR tag:g2:t2) AND NOT tag:g1:t1",
+    "group:g3 has any [t3, t11, t19] AND group:g4 has none [t4, t12]",
+    "tag:g0:t0 AND status:new AND created >= 2024-06-01",
+]
+
+
+def naive_sql(node) -> tuple[str, list]:
+    kind = node[0]
+
+    if kind == "tags":
+        parts = ["c.id IN (SELECT content_id FROM content_tag WHERE tag_id = ?)"] * len(node[2])
+        joiner = " AND " if node[1] == "all" else " OR "
+        return joiner.join(parts), list(node[2])
+
+    if kind in ("and", "or"):
+        sqls, params = [], []
+        for child in node[1]:
+            sql, child_params = naive_sql(child)
+            sqls.append(f"({sql})")
+            params += child_params
+        return f" {kind.upper()} ".join(sqls), params
+
+    if kind == "not":
+        sql, params = naive_sql(node[1])
+        return f"NOT ({sql})", params
+
+    if kind == "status":
+        return f"c.status IN ({', '.join('?' * len(node[1]))})", list(node[1])
+
+    if kind == "created":
+        return f"c.created_at {node[1]} ?", [node[2]]
+
+    raise ValueError(kind)
+
+
+def best_of(con, sql: str, params: list, runs: int) -> tuple[float, int]:
+    best, count = float("inf"), 0
+    for _ in range(runs):
+        start = time.perf_counter()
+        count = con.execute(f"SELECT COUNT(*) FROM content c WHERE {sql}", params).fetchone()[0]
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, count
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    con = duckdb.connect()
+    init_schema(con)
+
+    con.execute(
+        """
+        INSERT INTO tag_group (id, description, required, min_count, max_count, position)
+        SELECT 'g' || i, 'Group ' || i, false, 0, NULL, i
+        FROM range(?) r(i)
+        """,
+        (GROUPS,),
+    )
+
+    con.execute(
+        """
+        INSERT INTO tag (id, label, group_id)
+        SELECT 'g' || (k % ?) || ':t' || k, 't' || k, 'g' || (k % ?)
+        FROM range(?) r(k)
+        """,
+        (GROUPS, GROUPS, TAGS),
+    )
+
+    con.execute(
+        """
+        INSERT INTO content (id, url, status, created_at)
+        SELECT
+            'c' || i,
+            'https://example.com/' || i,
+            CASE WHEN i % 3 = 0 THEN 'complete' ELSE 'new' END,
+            TIMESTAMP '2024-01-01' + to_seconds(i * 30)
+        FROM range(?) r(i)
+        """,
+        (n,),
+    )
+
+    # Tag k drawn with probability ~ skewed towards small k
+    con.execute(
+        """
+        INSERT OR IGNORE INTO content_tag (content_id, tag_id)
+        SELECT 'c' || i, 'g' || (k % ?) || ':t' || k
+        FROM (
+            SELECT i, floor(pow(random(), 3) * ?)::INTEGER AS k
+            FROM range(?) r(i), range(?) s(j)
+        )
+        """,
+        (GROUPS, TAGS, n, TAGS_PER_ITEM),
+    )
+
+    con.execute(
+        """
+        UPDATE tag
+        SET usage_count = u.n
+        FROM (SELECT tag_id, COUNT(*) AS n FROM content_tag GROUP BY tag_id) u
+        WHERE tag.id = u.tag_id
+        """
+    )
+
+    tag_group_model.invalidate()
+    tag_index.load(con)
+
+    rows = con.execute("SELECT COUNT(*) FROM content_tag").fetchone()[0]
+    print(f"📊 {n} items, {rows} content_tag rows, {TAGS} tags")
+
+    for text in FILTERS:
+        node = parse_filter(text, con)
+
+        before, expected = best_of(con, *naive_sql(node), runs)
+        after, count = best_of(con, *compile_filter(node, con), runs)
+
+        assert count == expected, (text, count, expected)
+
+        print(f"   {text}")
+        print(f"      naive {before:8.1f} ms   planned {after:8.1f} ms   ({count} matches)")
+
+
+if __name__ == "__main__":
+    main()
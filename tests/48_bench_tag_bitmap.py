@@ -0,0 +1,165 @@
+"""
+Benchmark: content_tag SQL vs the in-memory tag bitmap index.
+
+Fills an in-memory DuckDB with N content items tagged from a skewed
+(few very common, many rare) tag vocabulary, loads the bitmap index
+and compares, per filter expression:
+
+  - count:   COUNT(*) over compile_filter's content_tag set query vs
+             bitmap match() + bit count
+  - facets:  per-tag counts of the matching items via
+             content_tag GROUP BY vs TagBitmapIndex.facets()
+
+Also reports index load time and memory, the first (cold) facet call
+and the memory of the facet bitmap copies it builds.
+
+Usage:
+    python tests/48_bench_tag_bitmap.py [items] [runs]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.schema import init_schema
+from app.services.content_filter import compile_filter, parse_filter
+from app.services.tag_bitmap import tag_bitmaps
+from app.services.tag_group_model import tag_group_model
+from app.services.tag_index import tag_index
+
+GROUPS = 8
+TAGS = 400
+TAGS_PER_ITEM = 5
+
+FILTERS = [
+    "tag:g0:t0",
+    "tag:g0:t0 AND tag:g1:t1 AND tag:g7:t399",
+    "(tag:g0:t0 OR tag:g2:t2) AND NOT tag:g1:t1",
+    "group:g3 has any [t3, t11, t19] AND group:g4 has none [t4, t12]",
+]
+
+
+def best_of(fn, runs: int):
+    best, result = float("inf"), None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best, result
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+
+    con = duckdb.connect()
+    init_schema(con)
+
+    con.execute(
+        """
+        INSERT INTO tag_group (id, description, required, min_count, max_count, position)
+        SELECT 'g' || i, 'Group ' || i, false, 0, NULL, i
+        FROM range(?) r(i)
+        """,
+        (GROUPS,),
+    )
+
+    con.execute(
+        """
+        INSERT INTO tag (id, label, group_id)
+        SELECT 'g' || (k % ?) || ':t' || k, 't' || k, 'g' || (k % ?)
+        FROM range(?) r(k)
+        """,
+        (GROUPS, GROUPS, TAGS),
+    )
+
+    con.execute(
+        """
+        INSERT INTO content (id, url, created_at)
+        SELECT 'c' || i, 'https://example.com/' || i, TIMESTAMP '2024-01-01' + to_seconds(i * 30)
+        FROM range(?) r(i)
+        """,
+        (n,),
+    )
+
+    # Tag k drawn with probability ~ skewed towards small k
+    con.execute(
+        """
+        INSERT OR IGNORE INTO content_tag (content_id, tag_id)
+        SELECT 'c' || i, 'g' || (k % ?) || ':t' || k
+        FROM (
+            SELECT i, floor(pow(random(), 3) * ?)::INTEGER AS k
+            FROM range(?) r(i), range(?) s(j)
+        )
+        """,
+        (GROUPS, TAGS, n, TAGS_PER_ITEM),
+    )
+
+    tag_group_model.invalidate()
+    tag_index.load(con)
+
+    rows = con.execute("SELECT COUNT(*) FROM content_tag").fetchone()[0]
+    print(f"📊 {n} items, {rows} content_tag rows, {TAGS} tags")
+
+    # SQL side first, before the planner can use the index
+    sql_times = {}
+    for text in FILTERS:
+        where, params = compile_filter(parse_filter(text, con), con)
+
+        count_ms, count = best_of(
+            lambda: con.execute(f"SELECT COUNT(*) FROM content c WHERE {where}", params).fetchone()[0],
+            runs,
+        )
+        facets_ms, facets = best_of(
+            lambda: dict(con.execute(
+                f"""
+                SELECT ct.tag_id, COUNT(*)
+                FROM content_tag ct
+                JOIN content c ON c.id = ct.content_id
+                WHERE {where}
+                GROUP BY ct.tag_id
+                """,
+                params,
+            ).fetchall()),
+            runs,
+        )
+        sql_times[text] = (count_ms, count, facets_ms, facets)
+
+    start = time.perf_counter()
+    tag_bitmaps.load(con)
+    load_ms = (time.perf_counter() - start) * 1000
+
+    stats = tag_bitmaps.stats()
+    print(
+        f"   load {load_ms:.0f} ms, {stats['bytes'] / 1e6:.1f} MB "
+        f"({stats['bitmaps']} bitmaps, {stats['tags'] - stats['bitmaps']} arrays)"
+    )
+
+    start = time.perf_counter()
+    tag_bitmaps.facets(parse_filter(FILTERS[0], con))
+    print(
+        f"   first facets {(time.perf_counter() - start) * 1000:.0f} ms, "
+        f"facet bitmap copies {tag_bitmaps.stats()['facet_bytes'] / 1e6:.1f} MB"
+    )
+
+    for text in FILTERS:
+        node = parse_filter(text, con)
+        sql_count_ms, expected, sql_facets_ms, expected_facets = sql_times[text]
+
+        count_ms, count = best_of(lambda: tag_bitmaps.match(node).bit_count(), runs)
+        facets_ms, facets = best_of(lambda: tag_bitmaps.facets(node), runs)
+
+        assert count == expected == facets["count"], (text, count, expected)
+        assert {t: c for t, c in facets["facets"].items() if c} == expected_facets, text
+
+        print(f"   {text}")
+        print(f"      count   sql {sql_count_ms:8.1f} ms   bitmap {count_ms:8.1f} ms   ({count} matches)")
+        print(f"      facets  sql {sql_facets_ms:8.1f} ms   bitmap {facets_ms:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
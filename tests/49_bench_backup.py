@@ -0,0 +1,104 @@
+"""
+Benchmark: chunked, content-addressed backups vs whole-file copies.
+
+Builds a live DuckDB file with N content rows in a scratch directory,
+then snapshots it (db.snapshot) and stores each snapshot as a chunked
+backup (db.backup):
+
+  1. first backup (every chunk is new)
+  2. after inserting 1% new rows and updating 0.25% (oldest rows)
+  3. after updating 0.25% of rows spread over the whole table
+  4. after no data change (same fingerprint → nothing written)
+
+For each: snapshot size vs export bytes in new chunks and bytes
+actually written (= uploaded by Drive sync). Then restores the latest backup, checks its fingerprint
+against the live database, and GCs down to one backup.
+
+Usage:
+    python tests/49_bench_backup.py [rows]
+"""
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(ROOT))
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+
+    # db.snapshot / db.backup keep their files under ./data/backups
+    os.chdir(tempfile.mkdtemp(prefix="backup-bench-"))
+
+    from app.db.backup import gc_backups, restore_backup, write_backup
+    from app.db.schema import init_schema
+    from app.db.snapshot import SNAPSHOT_PATH, fingerprint, snapshot_db
+
+    con = duckdb.connect("data/live.duckdb")
+    init_schema(con)
+
+    con.execute(
+        """
+        INSERT INTO content (id, url, source_url, status, created_at)
+        SELECT 'c' || i, 'https://example.com/' || i || '.jpg', NULL, 'new',
+               TIMESTAMP '2024-01-01' + i * INTERVAL 1 SECOND
+        FROM range(?) r(i)
+        """,
+        (n,),
+    )
+
+    def backup(label: str):
+        snapshot = snapshot_db(con)
+        result = write_backup(SNAPSHOT_PATH, snapshot["fingerprint"])
+        print(
+            f"{label:<22} {snapshot['bytes'] / 1e6:>8.1f} MB {result['new_chunks']:>5}/{result['chunks']:<5} "
+            f"{result['new_bytes'] / 1e6:>8.1f} MB {result['stored_bytes'] / 1e6:>8.2f} MB "
+            f"{snapshot['duration_ms']:>9.0f} ms {result['duration_ms']:>7.0f} ms"
+        )
+        return result
+
+    print(f"📊 {n} rows\n")
+    print(f"{'':<22} {'snapshot':>11} {'new chunks':>11} {'new data':>11} {'written':>11} "
+          f"{'snapshot':>12} {'backup':>10}")
+
+    backup("first backup")
+
+    con.execute(
+        """
+        INSERT INTO content (id, url, source_url, status, created_at)
+        SELECT 'n' || i, 'https://example.com/n' || i || '.jpg', NULL, 'new', now()
+        FROM range(?) r(i)
+        """,
+        (n // 100,),
+    )
+    con.execute("UPDATE content SET status = 'draft' WHERE id IN (SELECT 'c' || i FROM range(?) r(i))", (n // 400,))
+    backup("+1% rows, 0.25% upd.")
+
+    # Same number of updates, spread over the whole table
+    con.execute("UPDATE content SET status = 'review' WHERE hash(id) % 400 = 0")
+    backup("0.25% upd. scattered")
+
+    result = backup("unchanged")
+    assert result["unchanged"]
+
+    restored = Path("data/restored.duckdb")
+    restore_backup("latest", restored)
+    check = duckdb.connect(str(restored), read_only=True)
+    assert fingerprint(check) == fingerprint(con)
+    check.close()
+    print(f"\n✅ restored {restored} ({restored.stat().st_size / 1e6:.1f} MB), fingerprint matches")
+
+    gc = gc_backups(keep=1)
+    print(f"🧹 GC (keep 1): {gc['manifests_removed']} backups, {gc['chunks_removed']} chunks, "
+          f"{gc['bytes_freed'] / 1e6:.2f} MB freed")
+
+    con.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Benchmark: GET /content page latency vs depth.
+
+Fills an in-memory DuckDB with N content items (created_at in insert
+order, like the API writes them) and times single pages of
+list_content_page at several depths two ways:
+
+  - keyset:  the cursor of the row just before the page
+  - offset:  the same page as ORDER BY ... LIMIT/OFFSET
+
+There is no index on created_at (DuckDB doesn't use one for ORDER BY /
+ranges): keyset pages stay flat because the top-N's filter skips row
+groups by their min/max, OFFSET pages grow with depth.
+
+Usage:
+    python tests/50_bench_content_pages.py [items] [runs]
+"""
+
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from app.db.schema import init_schema
+from app.services.content_snapshot import encode_cursor, list_content_page
+
+PAGE = 50
+DEPTHS = [0, 0.01, 0.1, 0.5, 0.99]
+
+
+def best_of(runs: int, fn) -> float:
+    best = float("inf")
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        best = min(best, (time.perf_counter() - start) * 1000)
+    return best
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+    con = duckdb.connect()
+    init_schema(con)
+
+    con.execute(
+        """
+        INSERT INTO content (id, url, source_url, status, created_at)
+        SELECT 'c' || lpad(i::VARCHAR, 9, '0'), 'https://example.com/' || i || '.jpg', NULL,
+               CASE WHEN i % 50 = 0 THEN 'deleted' ELSE 'new' END,
+               TIMESTAMP '2024-01-01' + i * INTERVAL 1 SECOND
+        FROM range(?) r(i)
+        """,
+        (n,),
+    )
+
+    visible = con.execute("SELECT COUNT(*) FROM content WHERE status <> 'deleted'").fetchone()[0]
+
+    print(f"📊 {n} items, {PAGE} per page, best of {runs}\n")
+    print(f"{'depth':>8} {'keyset':>10} {'offset':>10}")
+
+    for depth in DEPTHS:
+        skip = int(visible * depth)
+
+        cursor = None
+        if skip:
+            created_at, content_id = con.execute(
+                """
+                SELECT created_at, id FROM content
+                WHERE status <> 'deleted'
+                ORDER BY created_at DESC, id DESC
+                LIMIT 1 OFFSET ?
+                """,
+                (skip - 1,),
+            ).fetchone()
+            cursor = encode_cursor(created_at, content_id)
+
+        page = list_content_page(PAGE, cursor, con=con)
+        offset_ids = [
+            row[0]
+            for row in con.execute(
+                """
+                SELECT id FROM content
+                WHERE status <> 'deleted'
+                ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?
+                """,
+                (PAGE, skip),
+            ).fetchall()
+        ]
+        assert [item["id"] for item in page["items"]] == offset_ids
+
+        keyset_ms = best_of(runs, lambda: list_content_page(PAGE, cursor, con=con))
+        offset_ms = best_of(
+            runs,
+            lambda: con.execute(
+                """
+                SELECT id, url, status, created_at FROM content
+                WHERE status <> 'deleted'
+                ORDER BY created_at DESC, id DESC
+                LIMIT ? OFFSET ?
+                """,
+                (PAGE, skip),
+            ).fetchall(),
+        )
+
+        print(f"{skip:>8} {keyset_ms:>8.1f} ms {offset_ms:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
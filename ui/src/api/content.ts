@@ -7,10 +7,45 @@ import type {
 } from "../types/content"
 
 /**
- * List content snapshots (GET /content)
+ * One page of content (GET /content)
  */
-export async function listContent(): Promise<Content[]> {
-  return apiFetch<Content[]>("/content")
+export interface ContentPage {
+  items: Content[]
+  count: number
+  next_cursor: string | null
+}
+
+export interface ListContentParams {
+  limit?: number
+  cursor?: string | null
+  status?: string[]
+  tag_ids?: string[]
+  groups_complete?: boolean
+  missing_group?: string
+  source_domain?: string
+  /** Filter expression, e.g. `group:mood has any [calm] AND status:new` */
+  q?: string
+}
+
+/**
+ * List content, keyset-paginated (pass next_cursor back as cursor)
+ */
+export async function listContent(
+  params: ListContentParams = {}
+): Promise<ContentPage> {
+  const query = new URLSearchParams()
+
+  for (const [key, value] of Object.entries(params)) {
+    if (value === undefined || value === null) continue
+    if (Array.isArray(value)) {
+      value.forEach((v) => query.append(key, v))
+    } else {
+      query.append(key, String(value))
+    }
+  }
+
+  const qs = query.toString()
+  return apiFetch<ContentPage>(`/content/${qs ? `?${qs}` : ""}`)
 }
 
 /**
@@ -29,6 +64,37 @@ export async function getNextContent(): Promise<Content | null> {
   return apiFetch<Content | null>("/content/next")
 }
 
+/**
+ * Lease the next items to a tagger (POST /content/claim) and hand
+ * them back (POST /content/release)
+ */
+export interface ClaimResult {
+  tagger: string
+  lease_expires_at: string
+  items: ContentSnapshot[]
+}
+
+export async function claimContent(
+  tagger: string,
+  count = 1,
+  leaseSeconds?: number
+): Promise<ClaimResult> {
+  return apiFetch<ClaimResult>("/content/claim", {
+    method: "POST",
+    body: JSON.stringify({ tagger, count, lease_seconds: leaseSeconds }),
+  })
+}
+
+export async function releaseContent(
+  tagger: string,
+  contentIds: string[]
+): Promise<{ status: "ok"; released: number }> {
+  return apiFetch("/content/release", {
+    method: "POST",
+    body: JSON.stringify({ tagger, content_ids: contentIds }),
+  })
+}
+
 /**
  * Mark content as complete (POST /content/{id}/complete)
  */
@@ -43,6 +109,47 @@ export async function completeContent(
   })
 }
 
+/**
+ * Validate / complete many items at once
+ * (POST /content/validate/batch, POST /content/complete/batch)
+ */
+export interface CompletionViolations {
+  content_id: string
+  violations: string[]
+}
+
+export interface ValidateBatchResult {
+  valid: number
+  invalid: number
+  items: (CompletionViolations & { valid: boolean })[]
+  not_found: string[]
+}
+
+export interface CompleteBatchResult {
+  status: "ok"
+  completed: string[]
+  failed: CompletionViolations[]
+  not_found: string[]
+}
+
+export async function validateContentBatch(
+  contentIds: string[]
+): Promise<ValidateBatchResult> {
+  return apiFetch<ValidateBatchResult>("/content/validate/batch", {
+    method: "POST",
+    body: JSON.stringify({ content_ids: contentIds }),
+  })
+}
+
+export async function completeContentBatch(
+  contentIds: string[]
+): Promise<CompleteBatchResult> {
+  return apiFetch<CompleteBatchResult>("/content/complete/batch", {
+    method: "POST",
+    body: JSON.stringify({ content_ids: contentIds }),
+  })
+}
+
 /**
  * Bulk create content (POST /content/bulk)
  */
@@ -16,6 +16,31 @@ export async function searchTags(
   return res.json();
 }
 
+export interface TagFacets {
+  count: number;
+  facets: Record<string, number>;
+}
+
+export async function getTagFacets(params: {
+  tagIds?: string[];
+  q?: string;
+  group?: string;
+} = {}): Promise<TagFacets> {
+  const query = new URLSearchParams();
+  for (const tagId of params.tagIds ?? []) query.append("tag_ids", tagId);
+  if (params.q) query.set("q", params.q);
+  if (params.group) query.set("group", params.group);
+
+  const res = await fetch(`${API_BASE}/tags/facets?${query}`);
+
+  if (!res.ok) {
+    const body = await res.json().catch(() => null);
+    throw new Error(body?.detail ?? "Facets failed");
+  }
+
+  return res.json();
+}
+
 export async function ensureTag(group: string, label: string): Promise<Tag> {
   const res = await fetch(`${API_BASE}/tags/ensure`, {
     method: "POST",
@@ -60,3 +85,51 @@ export async function unassignTags(
 
   return res.json();
 }
+
+export interface BatchAssignResult {
+  status: string;
+  assigned: number;
+  skipped: number;
+  usage: Record<string, number>;
+}
+
+export async function assignTagsBatch(
+  contentIds: string[],
+  tagIds: string[]
+): Promise<BatchAssignResult> {
+  const res = await fetch(`${API_BASE}/tags/assign/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      content_ids: contentIds,
+      tag_ids: tagIds,
+    }),
+  });
+
+  if (!res.ok) {
+    const body = await res.json().catch(() => null);
+    throw new Error(body?.detail ?? "Batch assign failed");
+  }
+
+  return res.json();
+}
+
+export async function unassignTagsBatch(
+  contentIds: string[],
+  tagIds: string[]
+) {
+  const res = await fetch(`${API_BASE}/tags/unassign/batch`, {
+    method: "POST",
+    headers: { "Content-Type": "application/json" },
+    body: JSON.stringify({
+      content_ids: contentIds,
+      tag_ids: tagIds,
+    }),
+  });
+
+  if (!res.ok) {
+    throw new Error("Batch unassign failed");
+  }
+
+  return res.json();
+}
@@ -1,8 +1,6 @@
 import { useEffect, useState } from "react";
-import { fetchContentSnapshot,  } from "../api/content";
-import type {ContentSnapshot} from "../api/content";
-
-const API_BASE = import.meta.env.VITE_API_BASE || "http://localhost:8000";
+import { getContentSnapshot, listContent } from "../api/content";
+import type { ContentSnapshot } from "../types/content";
 
 export function useLatestContent() {
   const [snapshot, setSnapshot] = useState<ContentSnapshot | null>(null);
@@ -10,12 +8,11 @@ export function useLatestContent() {
 
   useEffect(() => {
     async function load() {
-      const res = await fetch(`${API_BASE}/debug/content`);
-      const rows = await res.json();
-      if (!rows.length) return;
+      // Newest first: one item is enough
+      const page = await listContent({ limit: 1 });
+      if (!page.items.length) return;
 
-      const latestId = rows[rows.length - 1][0];
-      const snap = await fetchContentSnapshot(latestId);
+      const snap = await getContentSnapshot(page.items[0].id);
       setSnapshot(snap);
       setLoading(false);
     }
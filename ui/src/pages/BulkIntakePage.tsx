@@ -204,6 +204,10 @@ export default function BulkIntakePage() {
           url: item.url,
           source_url: item.source_url,
           tag_ids: selectedTagIds,
+          // Already resolved by /content/expand → stored, not refetched
+          preview_type: item.preview_type,
+          preview_url: item.preview_url,
+          preview_url_normalized: item.preview_url_normalized,
         }))
       )
       : validUrls.map((l) => ({
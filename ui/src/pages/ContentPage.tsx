@@ -1,12 +1,16 @@
-import { useEffect, useState, useMemo } from "react";
+import { useEffect, useState, useMemo, useRef, useCallback } from "react";
 import { useOutletContext } from "react-router-dom";
 import MasonryGrid from "../components/gallery/MasonryGrid";
 import TagFilterBar from "../components/filters/TagFilterBar";
 import ContentCarousel from "../components/carousel/ContentCarousel";
+import { listContent } from "../api/content";
 
 const API_BASE =
   import.meta.env.VITE_API_BASE || "http://localhost:8000";
 
+// Items per GET /content page (infinite scroll)
+const PAGE_SIZE = 100;
+
 type ContentItem = {
   id: string;
   url: string;
@@ -31,6 +35,10 @@ export default function ContentPage() {
 
   const [items, setItems] = useState<ContentItem[]>([]);
   const [loading, setLoading] = useState(true);
+  const [nextCursor, setNextCursor] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const loadingMoreRef = useRef(false);
+  const sentinelRef = useRef<HTMLDivElement | null>(null);
   const [selectedTags, setSelectedTags] = useState<Set<string>>(new Set());
   // const [carouselItem, setCarouselItem] = useState<any | null>(null);
   const [carouselIndex, setCarouselIndex] = useState<number | null>(null);
@@ -131,21 +139,52 @@ export default function ContentPage() {
     setRightPanel(null);
   }, [setRightPanel]);
 
-  // Load content
+  // Load content: first page, the rest as the grid scrolls
   async function loadContent() {
     setLoading(true);
     try {
-      const res = await fetch(`${API_BASE}/debug/content`);
-      const data = await res.json();
-      setItems(data);
+      const page = await listContent({ limit: PAGE_SIZE });
+      setItems(page.items as ContentItem[]);
+      setNextCursor(page.next_cursor);
     } finally {
       setLoading(false);
     }
   }
 
+  const loadMore = useCallback(async () => {
+    if (!nextCursor || loadingMoreRef.current) return;
+
+    loadingMoreRef.current = true;
+    setLoadingMore(true);
+    try {
+      const page = await listContent({ limit: PAGE_SIZE, cursor: nextCursor });
+      setItems((prev) => [...prev, ...(page.items as ContentItem[])]);
+      setNextCursor(page.next_cursor);
+    } finally {
+      loadingMoreRef.current = false;
+      setLoadingMore(false);
+    }
+  }, [nextCursor]);
+
   useEffect(() => {
     loadContent();
   }, []);
+
+  // Next page when the end of the grid scrolls into view
+  useEffect(() => {
+    const sentinel = sentinelRef.current;
+    if (!sentinel || !nextCursor) return;
+
+    const observer = new IntersectionObserver(
+      (entries) => {
+        if (entries[0].isIntersecting) loadMore();
+      },
+      { rootMargin: "800px" }
+    );
+
+    observer.observe(sentinel);
+    return () => observer.disconnect();
+  }, [loadMore, nextCursor, loading]);
   async function deleteSelected() {
     if (selectedContentIds.size === 0) return;
 
@@ -313,6 +352,10 @@ export default function ContentPage() {
           onOpen={openCarousel}
         />
 
+        <div ref={sentinelRef} className="content-sentinel">
+          {loadingMore && "Loading more…"}
+        </div>
+
 
       </div>
 